@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+"""
+Performance benchmarks for loading weather data, the prediction models
+and EventDecision over synthetic histories from 30 days to 10 million days.
+
+Histories longer than BENCHMARK_MAX_DAYS days (environment variable,
+default 100,000) are left out, as 10 million days takes several GB of
+memory and a few minutes to load.
+
+    BENCHMARK_MAX_DAYS=10000000 python benchmark_a2.py --json
+"""
+
+__author__ = "Jinyuan Chen"
+
+import os
+import shutil
+import tempfile
+
+from testrunner import BenchmarkCase, TestMaster
+
+from event_decision import Event, EventDecision
+from model_registry import MODEL_REGISTRY, INCREMENTAL_UPDATE
+from prediction import SophisticatedPrediction
+from weather_data import WeatherData
+from weather_generator import write_csv
+
+HISTORY_SIZES = (30, 1_000, 100_000, 1_000_000, 10_000_000)
+MAX_DAYS = int(os.environ.get('BENCHMARK_MAX_DAYS', 100_000))
+# Histories at least this long are only timed once
+LONG_HISTORY = 1_000_000
+
+
+class TestBenchmarks(BenchmarkCase):
+    sizes = [size for size in HISTORY_SIZES if size <= MAX_DAYS]
+    directory = None
+    paths = {}
+    histories = {}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        for size in cls.sizes:
+            cls.paths[size] = path = os.path.join(cls.directory, f'weather_{size}.csv')
+            write_csv(path, size)
+            cls.histories[size] = data = WeatherData()
+            data.load(path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.histories.clear()
+        shutil.rmtree(cls.directory, ignore_errors=True)
+
+    def run_benchmark(self, size, func, *args, name):
+        if size >= LONG_HISTORY:
+            return self.benchmark(func, *args, name=name, warmup=0, repeat=1)
+        return self.benchmark(func, *args, name=name)
+
+    def test_load(self):
+        """ WeatherData.load """
+        for size in self.sizes:
+            self.run_benchmark(size, WeatherData().load, self.paths[size], name=f'load {size}')
+
+    def test_get_data(self):
+        """ WeatherData.get_data for the whole history """
+        for size in self.sizes:
+            data = self.histories[size]
+            self.run_benchmark(size, data.get_data, size, name=f'get_data {size}')
+
+    def test_models(self):
+        """ construct each registered model and make every prediction """
+        def predict(spec, capability, data, past_n_days):
+            model = spec.create(data, past_n_days, capability)
+            model.chance_of_rain()
+            model.high_temperature()
+            model.low_temperature()
+            model.humidity()
+            model.cloud_cover()
+            model.wind_speed()
+
+        for spec in MODEL_REGISTRY.get_specs():
+            for capability in [None] + ([INCREMENTAL_UPDATE] if spec.supports(INCREMENTAL_UPDATE) else []):
+                label = spec.get_name() + (f' ({capability})' if capability else '')
+                for size in self.sizes:
+                    self.run_benchmark(size, predict, spec, capability, self.histories[size], size,
+                                       name=f'{label} {size}')
+
+    def test_advisability(self):
+        """ EventDecision.advisability using SophisticatedPrediction """
+        event = Event('Benchmark', True, False, 13)
+        for size in self.sizes:
+            decision = EventDecision(event, SophisticatedPrediction(self.histories[size], size))
+            self.run_benchmark(size, decision.advisability, name=f'advisability {size}')
+
+
+def main():
+    master = TestMaster(max_diff=None, timeout=0)
+    master.run([TestBenchmarks])
+
+
+if __name__ == '__main__':
+    main()
@@ -10,9 +10,18 @@
 __author__ = "Jinyuan Chen"
 __email__ = "jinyuan.chen@uqconnect.edu.au"
 
+import argparse
+import sys
+from collections import namedtuple
+
+import instrumentation
+from instrumentation import DECISION_METHODS
 from weather_data import WeatherData
 from prediction import WeatherPrediction, YesterdaysWeather, SimplePrediction, SophisticatedPrediction
-# Import your SimplePrediction and SophisticatedPrediction classes once defined.
+from model_registry import MODEL_REGISTRY
+
+# File the --profile option saves cProfile statistics to by default.
+PROFILE_FILE = "event_decision.prof"
 
 
 # Define your Event Class here
@@ -101,48 +110,16 @@ class EventDecision(object):
         Return:
             (float) Temperature Factor
         """
-        humidity_value = self._prediction_model.humidity()
-        high_temperature = self._prediction_model.high_temperature()
-        low_temperature = self._prediction_model.low_temperature()
-        is_cloud_cover = self._prediction_model.cloud_cover()
-        wind_speed = self._prediction_model.wind_speed()
-        is_outdoors = self._event.get_outdoors()
-        is_cover_available = self._event.get_cover_available()
-        time = self._event.get_time()
-        HUMIDITY_FACTOR = 70
-
-        if humidity_value > HUMIDITY_FACTOR:
-            humidity_factor = humidity_value / 20
-            if high_temperature > 0:
-                high_temperature = high_temperature + humidity_factor
-            elif high_temperature < 0:
-                high_temperature = high_temperature - humidity_factor
-            if low_temperature > 0:
-                low_temperature = low_temperature + humidity_factor
-            elif low_temperature < 0:
-                low_temperature = low_temperature - humidity_factor
-
-        if 6 <= time <= 19 and is_outdoors and high_temperature >= 30:
-            initial_temp_factor = high_temperature / -5 + 6
-        elif high_temperature >= 45:
-            initial_temp_factor = high_temperature / -5 + 6
-        elif (0 <= time <= 5 or 20 <= time <= 23) and low_temperature < 5 and high_temperature < 45:
-            initial_temp_factor = low_temperature / 5 - 1.1
-        elif low_temperature > 15 and high_temperature < 30:
-            initial_temp_factor = (high_temperature - low_temperature) / 5
-        else:
-            initial_temp_factor = 0
-
-        temperature_factor = initial_temp_factor
-        if initial_temp_factor < 0:
-            if is_cover_available:
-                temperature_factor = initial_temp_factor + 1
-            if 3 < wind_speed < 10:
-                temperature_factor = initial_temp_factor + 1
-            if is_cloud_cover > 4:
-                temperature_factor = initial_temp_factor + 1
-
-        return float(temperature_factor)
+        high_temperature, low_temperature = adjusted_temperatures(
+            self._prediction_model.humidity(),
+            self._prediction_model.high_temperature(),
+            self._prediction_model.low_temperature())
+        return temperature_factor(high_temperature, low_temperature,
+                                  self._prediction_model.cloud_cover(),
+                                  self._prediction_model.wind_speed(),
+                                  self._event.get_outdoors(),
+                                  self._event.get_cover_available(),
+                                  self._event.get_time())
 
     def _rain_factor(self):
         """
@@ -152,27 +129,10 @@ class EventDecision(object):
         Return:
             (float) Rain Factor
         """
-        chance_of_rain = self._prediction_model.chance_of_rain()
-        is_outdoors = self._event.get_outdoors()
-        is_cover_available = self._event.get_cover_available()
-        wind_speed = self._prediction_model.wind_speed()
-
-        if chance_of_rain < 20:
-            initial_rain_factor = chance_of_rain / -5 + 4
-        elif chance_of_rain > 50:
-            initial_rain_factor = chance_of_rain / -20 + 1
-        else:
-            initial_rain_factor = 0
-
-        rain_factor = initial_rain_factor
-        if is_outdoors and is_cover_available and wind_speed < 5:
-            rain_factor = initial_rain_factor + 1
-        if initial_rain_factor < 2 and wind_speed > 15:
-            rain_factor = (initial_rain_factor + (wind_speed / -15))
-            if rain_factor < -9:
-                rain_factor = -9
-
-        return float(rain_factor)
+        return rain_factor(self._prediction_model.chance_of_rain(),
+                           self._prediction_model.wind_speed(),
+                           self._event.get_outdoors(),
+                           self._event.get_cover_available())
 
     def advisability(self):
         """Determine how advisable it is to continue with the planned event.
@@ -181,13 +141,255 @@ class EventDecision(object):
             (float) Value in range of -5 to +5,
                     -5 is very bad, 0 is neutral, 5 is very beneficial
         """
-        advisability_ranking = self._temperature_factor() + self._rain_factor()
-        if advisability_ranking < -5:
-            advisability_ranking = -5
-        if advisability_ranking > 5:
-            advisability_ranking = 5
+        return clamp_advisability(self._temperature_factor() + self._rain_factor())
+
+    def explain(self):
+        """Determine the advisability along with the factors that make it up.
+
+        The prediction is read once, the same as for advisability.
+
+        Return:
+            (Explanation) Advisability, both factors and the rules that set them.
+        """
+        prediction_model = self._prediction_model
+        wind_speed = prediction_model.wind_speed()
+        high_temperature, low_temperature = adjusted_temperatures(
+            prediction_model.humidity(), prediction_model.high_temperature(),
+            prediction_model.low_temperature())
+        temperature = temperature_rule(high_temperature, low_temperature,
+                                       prediction_model.cloud_cover(), wind_speed,
+                                       self._event.get_outdoors(),
+                                       self._event.get_cover_available(),
+                                       self._event.get_time())
+        rain = rain_rule(prediction_model.chance_of_rain(), wind_speed,
+                         self._event.get_outdoors(), self._event.get_cover_available())
+        return Explanation(clamp_advisability(temperature[0] + rain[0]), *temperature, *rain)
+
+    def rank_start_times(self):
+        """Rank every hour of the day as the event's start time.
+
+        Return:
+            ([RankedStart]) The event's setting at each hour, most advisable
+                            first, earlier times first among equally
+                            advisable hours.
+        """
+        return rank_start_times(self._prediction_model,
+                                outdoors_options=(self._event.get_outdoors(),),
+                                cover_options=(self._event.get_cover_available(),))
+
+
+# Humidity above which it makes temperatures feel more extreme.
+HUMIDITY_FACTOR = 70
+
+# Rules that can set the initial temperature factor, in the order they are tried.
+TEMPERATURE_RULES = ("hot_outdoors", "extreme_heat", "cold_night", "mild", "neutral")
+# Rules that can set the initial rain factor, in the order they are tried.
+RAIN_RULES = ("low_chance", "high_chance", "neutral")
+# Adjustments to the rain factor, the first that applies wins.
+RAIN_ADJUSTMENTS = ("windy", "sheltered", "none")
+
+# Breakdown of an advisability.
+#   temperature_rule and rain_rule are names from TEMPERATURE_RULES and RAIN_RULES,
+#   temperature_mitigated is True if cover, wind or cloud eased a negative
+#   temperature factor and rain_adjustment is a name from RAIN_ADJUSTMENTS.
+Explanation = namedtuple("Explanation", (
+    "advisability", "temperature_factor", "temperature_rule", "temperature_mitigated",
+    "rain_factor", "rain_rule", "rain_adjustment"))
 
-        return advisability_ranking
+# Advisability of an event starting at an hour, in one setting.
+RankedStart = namedtuple("RankedStart", ("advisability", "time", "outdoors", "cover_available"))
+
+
+def adjusted_temperatures(humidity, high_temperature, low_temperature):
+    """Temperatures as they feel once humidity is taken into account.
+
+    Parameters:
+        humidity (int): Predicted humidity.
+        high_temperature (float): Predicted high temperature.
+        low_temperature (float): Predicted low temperature.
+
+    Return:
+        (tuple<float, float>) Adjusted high and low temperatures.
+    """
+    if humidity > HUMIDITY_FACTOR:
+        humidity_factor = humidity / 20
+        if high_temperature > 0:
+            high_temperature = high_temperature + humidity_factor
+        elif high_temperature < 0:
+            high_temperature = high_temperature - humidity_factor
+        if low_temperature > 0:
+            low_temperature = low_temperature + humidity_factor
+        elif low_temperature < 0:
+            low_temperature = low_temperature - humidity_factor
+    return high_temperature, low_temperature
+
+
+def temperature_factor(high_temperature, low_temperature, cloud_cover, wind_speed,
+                       outdoors, cover_available, time):
+    """How advisable an event is based on the predicted temperature.
+
+    Parameters:
+        high_temperature (float): High temperature from adjusted_temperatures.
+        low_temperature (float): Low temperature from adjusted_temperatures.
+        cloud_cover (int): Predicted amount of cloud cover.
+        wind_speed (int): Predicted average wind speed.
+        outdoors (bool): Whether the event is outdoors.
+        cover_available (bool): Whether there is cover available.
+        time (int): The closest hour to the starting time of the event.
+
+    Return:
+        (float) Temperature Factor
+    """
+    return temperature_rule(high_temperature, low_temperature, cloud_cover, wind_speed,
+                            outdoors, cover_available, time)[0]
+
+
+def temperature_rule(high_temperature, low_temperature, cloud_cover, wind_speed,
+                     outdoors, cover_available, time):
+    """The temperature factor and the rules that produced it.
+
+    Parameters:
+        high_temperature (float): High temperature from adjusted_temperatures.
+        low_temperature (float): Low temperature from adjusted_temperatures.
+        cloud_cover (int): Predicted amount of cloud cover.
+        wind_speed (int): Predicted average wind speed.
+        outdoors (bool): Whether the event is outdoors.
+        cover_available (bool): Whether there is cover available.
+        time (int): The closest hour to the starting time of the event.
+
+    Return:
+        (tuple<float, str, bool>) Temperature factor, the rule from
+            TEMPERATURE_RULES that set its initial value and whether it
+            was mitigated.
+    """
+    if 6 <= time <= 19 and outdoors and high_temperature >= 30:
+        initial_temp_factor = high_temperature / -5 + 6
+        rule = "hot_outdoors"
+    elif high_temperature >= 45:
+        initial_temp_factor = high_temperature / -5 + 6
+        rule = "extreme_heat"
+    elif (0 <= time <= 5 or 20 <= time <= 23) and low_temperature < 5 and high_temperature < 45:
+        initial_temp_factor = low_temperature / 5 - 1.1
+        rule = "cold_night"
+    elif low_temperature > 15 and high_temperature < 30:
+        initial_temp_factor = (high_temperature - low_temperature) / 5
+        rule = "mild"
+    else:
+        initial_temp_factor = 0
+        rule = "neutral"
+
+    factor = initial_temp_factor
+    if initial_temp_factor < 0:
+        if cover_available:
+            factor = initial_temp_factor + 1
+        if 3 < wind_speed < 10:
+            factor = initial_temp_factor + 1
+        if cloud_cover > 4:
+            factor = initial_temp_factor + 1
+
+    return float(factor), rule, factor != initial_temp_factor
+
+
+def rain_factor(chance_of_rain, wind_speed, outdoors, cover_available):
+    """How advisable an event is based on the predicted rainfall.
+
+    Parameters:
+        chance_of_rain (int): Predicted percentage chance of rain.
+        wind_speed (int): Predicted average wind speed.
+        outdoors (bool): Whether the event is outdoors.
+        cover_available (bool): Whether there is cover available.
+
+    Return:
+        (float) Rain Factor
+    """
+    return rain_rule(chance_of_rain, wind_speed, outdoors, cover_available)[0]
+
+
+def rain_rule(chance_of_rain, wind_speed, outdoors, cover_available):
+    """The rain factor and the rules that produced it.
+
+    Parameters:
+        chance_of_rain (int): Predicted percentage chance of rain.
+        wind_speed (int): Predicted average wind speed.
+        outdoors (bool): Whether the event is outdoors.
+        cover_available (bool): Whether there is cover available.
+
+    Return:
+        (tuple<float, str, str>) Rain factor, the rule from RAIN_RULES that
+            set its initial value and the adjustment from RAIN_ADJUSTMENTS
+            applied to it.
+    """
+    if chance_of_rain < 20:
+        initial_rain_factor = chance_of_rain / -5 + 4
+        rule = "low_chance"
+    elif chance_of_rain > 50:
+        initial_rain_factor = chance_of_rain / -20 + 1
+        rule = "high_chance"
+    else:
+        initial_rain_factor = 0
+        rule = "neutral"
+
+    factor = initial_rain_factor
+    adjustment = "none"
+    if outdoors and cover_available and wind_speed < 5:
+        factor = initial_rain_factor + 1
+        adjustment = "sheltered"
+    if initial_rain_factor < 2 and wind_speed > 15:
+        factor = (initial_rain_factor + (wind_speed / -15))
+        adjustment = "windy"
+        if factor < -9:
+            factor = -9
+
+    return float(factor), rule, adjustment
+
+
+def clamp_advisability(advisability):
+    """(float) Advisability limited to the range -5 to +5."""
+    if advisability < -5:
+        advisability = -5
+    if advisability > 5:
+        advisability = 5
+    return advisability
+
+
+def rank_start_times(prediction_model, outdoors_options=(True, False),
+                     cover_options=(True, False)):
+    """Rank every start hour, and event setting, for one prediction.
+
+    The prediction is read once and the weather dependent parts of the
+    rules are worked out once, then only the time and setting dependent
+    rules are applied for each of the 24 hours, without making an Event
+    or EventDecision for each.
+
+    Parameters:
+        prediction_model (WeatherPrediction): Prediction to score against.
+        outdoors_options ([bool]): Outdoors settings to try.
+        cover_options ([bool]): Cover available settings to try.
+
+    Return:
+        ([RankedStart]) Every combination, most advisable first. Equally
+                        advisable combinations keep time order, then the
+                        order of the options.
+    """
+    wind_speed = prediction_model.wind_speed()
+    cloud_cover = prediction_model.cloud_cover()
+    chance_of_rain = prediction_model.chance_of_rain()
+    high_temperature, low_temperature = adjusted_temperatures(
+        prediction_model.humidity(), prediction_model.high_temperature(),
+        prediction_model.low_temperature())
+
+    ranked = []
+    for outdoors in outdoors_options:
+        for cover_available in cover_options:
+            rain = rain_factor(chance_of_rain, wind_speed, outdoors, cover_available)
+            for time in range(24):
+                temperature = temperature_factor(high_temperature, low_temperature, cloud_cover,
+                                                 wind_speed, outdoors, cover_available, time)
+                ranked.append(RankedStart(clamp_advisability(temperature + rain), time,
+                                          outdoors, cover_available))
+    # Stable, so equal scores at the same time keep the order of the options
+    ranked.sort(key=lambda option: (-option.advisability, option.time))
+    return ranked
 
 
 class UserInteraction(object):
@@ -255,27 +457,24 @@ class UserInteraction(object):
             (WeatherPrediction): Object of the selected prediction model.
         """
 
+        MODEL_REGISTRY.load_entry_points()
+        specs = MODEL_REGISTRY.get_specs()
+
         while True:
             print("Select the weather prediction model you wish to use:")
-            print("  1) Yesterday's weather.")
-            print("  2) Simple prediction.")
-            print("  3) Sophisticated prediction.")
+            for number, spec in enumerate(specs, 1):
+                print(f"  {number}) {spec.get_description()}")
             # Error handling can be added to this method.
             model_choice = input("> ")
-            if model_choice == '1':
-                self._prediction_model = YesterdaysWeather(weather_data)
-                break
-            elif model_choice == '2':
-                past_n_days = input("Enter how many days of data you wish to use for making the prediction: ")
-                self._prediction_model = SimplePrediction(weather_data, int(past_n_days))
-                break
-            elif model_choice == '3':
-                past_n_days = input("Enter how many days of data you wish to use for making the prediction: ")
-                self._prediction_model = SophisticatedPrediction(weather_data, int(past_n_days))
+            if model_choice.isdigit() and 1 <= int(model_choice) <= len(specs):
+                spec = specs[int(model_choice) - 1]
+                past_n_days = None
+                if spec.get_uses_past_days():
+                    past_n_days = int(input("Enter how many days of data you wish to use for making the prediction: "))
+                self._prediction_model = spec.create(weather_data, past_n_days)
                 break
             else:
                 print("\nPlease enter an existed model!\n")
-        # Cater for other prediction models when they are implemented.
         return self._prediction_model
 
     def output_advisability(self, impact):
@@ -308,8 +507,8 @@ class UserInteraction(object):
                 print("Please enter 'Y' or 'Yes' or 'N' or 'No'.")
 
 
-def main():
-    """Main application's starting point."""
+def run_interaction():
+    """Ask about an event and report its advisability until the user is done."""
     check_again = True
     weather_data = WeatherData()
     weather_data.load("weather_data.csv")
@@ -326,5 +525,26 @@ def main():
         check_again = user_interface.another_check()
 
 
+def main(arguments=None):
+    """Main application's starting point.
+
+    Parameters:
+        arguments ([str]): Command line arguments, defaults to sys.argv.
+    """
+    parser = argparse.ArgumentParser(
+        description="Determine how suitable an event is for the predicted weather.")
+    parser.add_argument("--profile", nargs="?", const=PROFILE_FILE, metavar="FILE",
+                        help="time the prediction pipeline, printing a summary and "
+                             f"saving cProfile statistics to FILE ({PROFILE_FILE})")
+    args = parser.parse_args(arguments)
+
+    if args.profile is None:
+        run_interaction()
+    else:
+        summary = instrumentation.profile(run_interaction, args.profile,
+                                          extra_targets=[(EventDecision, DECISION_METHODS)])
+        print(summary, file=sys.stderr)
+
+
 if __name__ == "__main__":
     main()
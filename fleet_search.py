@@ -0,0 +1,77 @@
+"""
+    Search for the best places and times to hold an event.
+
+    top_k: The K most advisable (station, day, hour) combinations for an
+           event, given a multi-day Forecast for each station.
+
+    The rules of EventDecision only depend on the start hour through
+    whether it is during the day (6 to 19) or not, so each station and day
+    is scored twice, once for day hours and once for night hours, rather
+    than 24 times. Only the best K groups of hours are expanded into
+    individual results, chosen with a heap.
+"""
+
+__author__ = "Jinyuan Chen"
+__email__ = "jinyuan.chen@uqconnect.edu.au"
+
+import heapq
+
+from event_decision import (adjusted_temperatures, clamp_advisability, rain_factor,
+                            temperature_factor)
+
+# Start hours treated as during the day by EventDecision.
+DAY_HOURS = tuple(range(6, 20))
+# Start hours treated as at night by EventDecision.
+NIGHT_HOURS = tuple(range(0, 6)) + tuple(range(20, 24))
+
+
+def _scored_hours(event, forecasts):
+    """Advisability of each group of hours at each station and day.
+
+    Return:
+        (iterator<(float, int, int, (int,...))>) (advisability, station position,
+            day, hours) for every station, day and group of hours.
+    """
+    outdoors = event.get_outdoors()
+    cover_available = event.get_cover_available()
+    for position, forecast in enumerate(forecasts.values()):
+        columns = forecast.to_columns()
+        for day, (chance_of_rain, high, low, humidity, cloud_cover, wind_speed) in enumerate(
+                zip(columns["chance_of_rain"], columns["high_temperature"],
+                    columns["low_temperature"], columns["humidity"],
+                    columns["cloud_cover"], columns["wind_speed"])):
+            high, low = adjusted_temperatures(humidity, high, low)
+            rain = rain_factor(chance_of_rain, wind_speed, outdoors, cover_available)
+            for hours in (NIGHT_HOURS, DAY_HOURS):
+                temperature = temperature_factor(high, low, cloud_cover, wind_speed,
+                                                 outdoors, cover_available, hours[0])
+                yield clamp_advisability(temperature + rain), position, day, hours
+
+
+def top_k(event, forecasts, k=10):
+    """Find the most advisable stations, days and start hours for an event.
+
+    Parameters:
+        event (Event): Event to place, its start time is ignored.
+        forecasts (dict<str, Forecast>): Forecast for each station, by station name.
+        k (int): Number of results wanted.
+
+    Return:
+        ([(float, str, int, int)]) Up to k (advisability, station, day, hour)
+            tuples, most advisable first. Equally advisable results are
+            ordered by the order of forecasts, then day, then hour. Day 0
+            is the first day of the station's forecast.
+    """
+    if k <= 0:
+        return []
+    # Every hour in a group has the group's score and no earlier hour than
+    # its first, so the best k hours all come from the best k groups.
+    groups = heapq.nsmallest(k, _scored_hours(event, forecasts),
+                             key=lambda group: (-group[0], group[1], group[2], group[3][0]))
+
+    stations = list(forecasts)
+    results = [(advisability, position, day, hour)
+               for advisability, position, day, hours in groups for hour in hours]
+    results = heapq.nsmallest(k, results, key=lambda result: (-result[0],) + result[1:])
+    return [(advisability, stations[position], day, hour)
+            for advisability, position, day, hour in results]
@@ -0,0 +1,144 @@
+"""
+    Forecasts for several days ahead from the incremental prediction models.
+
+    Forecast: Predicted weather for each day of a horizon, stored compactly.
+    roll_forward: Forecast by feeding a model's expected days back into it.
+    forecast: Forecast from a registered model.
+
+    Only tomorrow is predicted from observed weather. Each later day is
+    predicted after pushing the day before, as the model predicted it, into
+    a copy of the model, so the model's window is updated in O(1) per day
+    instead of a new list of days being made for every step. The pushed
+    day holds the model's predicted temperatures, humidity, cloud cover and
+    wind speed, e.g. SimplePrediction's highest high and the pressure
+    adjusted values of SophisticatedPrediction; the rainfall and pressure
+    pushed are the model's averages, as no model predicts them as amounts.
+"""
+
+__author__ = "Jinyuan Chen"
+__email__ = "jinyuan.chen@uqconnect.edu.au"
+
+from array import array
+from datetime import timedelta
+
+from event_decision import EventDecision
+from model_registry import MODEL_REGISTRY, INCREMENTAL_UPDATE
+from prediction import FixedPrediction
+
+# Predicted values stored for each day, in the order held by Forecast.
+FIELDS = ("chance_of_rain", "high_temperature", "low_temperature",
+          "humidity", "cloud_cover", "wind_speed")
+# Predictions that are whole numbers.
+INTEGER_FIELDS = ("chance_of_rain", "humidity", "cloud_cover", "wind_speed")
+# Days ahead usually planned for.
+DEFAULT_HORIZON = 14
+
+
+class Forecast(object):
+    """Predicted weather for consecutive days, starting with tomorrow.
+
+    The values for all days are kept in one flat array of floats, FIELDS
+    values per day.
+    """
+
+    def __init__(self, values, number_days, first_date=None):
+        """
+        Parameters:
+            values (array<float>): FIELDS values for each day, day after day.
+            number_days (int): Number of days forecast.
+            first_date (datetime.date): Date of the first day, if known.
+
+        Pre-condition:
+            len(values) == number_days * len(FIELDS)
+        """
+        self._values = values
+        self._number_days = number_days
+        self._first_date = first_date
+
+    def get_number_days(self):
+        """(int) Number of days forecast."""
+        return self._number_days
+
+    def get_date(self, day):
+        """(datetime.date) Date of a day, counting tomorrow as 0, or None if unknown."""
+        if self._first_date is None:
+            return None
+        return self._first_date + timedelta(days=day)
+
+    def get_values(self, day):
+        """Returns the predicted values for a day.
+
+        Parameters:
+            day (int): Days after tomorrow, 0 for tomorrow.
+
+        Return:
+            (dict<str, float|int>) Predicted value of each of FIELDS.
+        """
+        start = day * len(FIELDS)
+        values = dict(zip(FIELDS, self._values[start:start + len(FIELDS)]))
+        for field in INTEGER_FIELDS:
+            values[field] = int(values[field])
+        return values
+
+    def get_prediction(self, day):
+        """(FixedPrediction) Prediction for a day, counting tomorrow as 0,
+        for use with EventDecision."""
+        return FixedPrediction(**self.get_values(day))
+
+    def advisabilities(self, event):
+        """([float]) Advisability of holding the event on each day of the forecast."""
+        return [EventDecision(event, self.get_prediction(day)).advisability()
+                for day in range(self._number_days)]
+
+    def to_columns(self):
+        """(dict<str, [float]>) Values of each of FIELDS for every day, in day order."""
+        width = len(FIELDS)
+        return {field: list(self._values[position::width])
+                for position, field in enumerate(FIELDS)}
+
+
+def roll_forward(model, number_days=DEFAULT_HORIZON):
+    """Forecast days ahead by rolling an incremental model forward.
+
+    The model itself is not changed, the days are pushed into a copy.
+
+    Parameters:
+        model (_IncrementalPrediction): Model predicting tomorrow, e.g. one
+                                        created with INCREMENTAL_UPDATE.
+        number_days (int): Number of days to forecast.
+
+    Return:
+        (Forecast) Predictions for tomorrow and the following days.
+
+    Pre-condition:
+        number_days > 0
+    """
+    model = model.copy()
+    values = array("d")
+    first_date = None
+    for day in range(number_days):
+        values.extend((model.chance_of_rain(), model.high_temperature(), model.low_temperature(),
+                       model.humidity(), model.cloud_cover(), model.wind_speed()))
+        expected = model.next_day()
+        if day == 0:
+            first_date = expected.get_date()
+        if day < number_days - 1:
+            model.push(expected)
+    return Forecast(values, number_days, first_date)
+
+
+def forecast(name, weather_data, past_n_days=None, number_days=DEFAULT_HORIZON):
+    """Forecast days ahead with a registered model.
+
+    Parameters:
+        name (str): Name the model is registered under, which must support
+                    INCREMENTAL_UPDATE.
+        weather_data (WeatherData): Observed weather up to today.
+        past_n_days (int): Number of days the model uses, if it uses past days.
+        number_days (int): Number of days to forecast.
+
+    Return:
+        (Forecast) Predictions for tomorrow and the following days.
+    """
+    model = MODEL_REGISTRY.create(name, weather_data, past_n_days, INCREMENTAL_UPDATE)
+    return roll_forward(model, number_days)
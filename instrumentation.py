@@ -0,0 +1,242 @@
+"""
+    Opt-in timing and counting of the decision pipeline.
+
+    Instrumentation: Call counts, timers and counters collected while enabled.
+    enable: Wrap the methods of the pipeline classes to record into an Instrumentation.
+    disable: Put the original methods back.
+    profile: Run a function under cProfile with instrumentation enabled.
+
+    Nothing is wrapped until enable is called and disable restores the
+    original methods, so instrumentation costs nothing while it is off.
+    Rows scanned counts the days returned by the get_data methods of
+    WeatherData, its snapshots and SharedWeatherData, credited both to the
+    total and to the instrumented method that asked for them, e.g.
+    SophisticatedPrediction.__init__ or OnlineSimplePrediction.update.
+
+    A method called through super() by an instrumented method of the same
+    name on the same object, e.g. SeasonalPrediction.push calling
+    ExponentialPrediction.push, is part of the outer call and is not
+    recorded again.
+"""
+
+__author__ = "Jinyuan Chen"
+__email__ = "jinyuan.chen@uqconnect.edu.au"
+
+import cProfile
+import io
+import pstats
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from model_registry import MODEL_REGISTRY
+from shared_weather_data import SharedWeatherData
+from weather_data import WeatherData, WeatherDataSnapshot
+
+# Methods of the prediction models that are timed.
+MODEL_METHODS = ("__init__", "update", "push", "chance_of_rain", "high_temperature",
+                 "low_temperature", "humidity", "cloud_cover", "wind_speed")
+# Methods of EventDecision that are timed.
+DECISION_METHODS = ("_temperature_factor", "_rain_factor", "advisability")
+# Methods returning days of weather data, counted as rows scanned.
+SCAN_METHODS = ((WeatherData, "get_data"), (WeatherDataSnapshot, "get_data"),
+                (SharedWeatherData, "get_data"))
+# Counter of the days returned by SCAN_METHODS.
+ROWS_SCANNED = "rows_scanned"
+# Counter of the days read by WeatherData.load.
+ROWS_LOADED = "rows_loaded"
+# Number of lines of cProfile output included in a summary.
+PROFILE_LINES = 20
+
+
+class Instrumentation(object):
+    """Call counts and times of instrumented methods, and named counters."""
+
+    def __init__(self):
+        """
+        """
+        self.reset()
+
+    def reset(self):
+        """Forget everything recorded so far."""
+        # Method name -> [number of calls, total seconds]
+        self._timers = OrderedDict()
+        self._counters = OrderedDict()
+        # Names of the instrumented methods currently running and the objects
+        # they were called on, innermost last.
+        self._active = []
+
+    def add_call(self, name, seconds):
+        """Record one call of a method.
+
+        Parameters:
+            name (str): Qualified method name, e.g. "SimplePrediction.humidity".
+            seconds (float): Time the call took, including nested calls.
+        """
+        timer = self._timers.get(name)
+        if timer is None:
+            self._timers[name] = [1, seconds]
+        else:
+            timer[0] += 1
+            timer[1] += seconds
+
+    def increment(self, name, amount=1):
+        """Add amount to the counter called name."""
+        self._counters[name] = self._counters.get(name, 0) + amount
+
+    def add_rows_scanned(self, rows):
+        """Count rows read from the weather data by the innermost running method."""
+        self.increment(ROWS_SCANNED, rows)
+        if self._active:
+            self.increment(f"{ROWS_SCANNED}:{self._active[-1][0]}", rows)
+
+    def get_calls(self, name):
+        """(int) Number of recorded calls of a method."""
+        return self._timers.get(name, (0, 0))[0]
+
+    def get_time(self, name):
+        """(float) Total seconds spent in a method."""
+        return self._timers.get(name, (0, 0))[1]
+
+    def get_counter(self, name):
+        """(int) Value of a counter, 0 if it was never incremented."""
+        return self._counters.get(name, 0)
+
+    def to_dict(self):
+        """(dict) Recorded timers and counters, e.g. to save as JSON."""
+        return dict(timers={name: dict(calls=calls, seconds=seconds)
+                            for name, (calls, seconds) in self._timers.items()},
+                    counters=dict(self._counters))
+
+    def summary(self):
+        """(str) Table of the timers, slowest first, followed by the counters."""
+        lines = [f"{'calls':>10} {'total (s)':>10} {'mean (us)':>10}  method"]
+        for name, (calls, seconds) in sorted(self._timers.items(),
+                                             key=lambda item: item[1][1], reverse=True):
+            lines.append(f"{calls:>10} {seconds:>10.4f} {seconds / calls * 1e6:>10.1f}  {name}")
+        for name, value in self._counters.items():
+            lines.append(f"{value:>10}  {name}")
+        return "\n".join(lines)
+
+
+# Instrumentation used when none is given.
+INSTRUMENTATION = Instrumentation()
+# (class, method name, method found in the class's own __dict__ or None)
+_wrapped = []
+# Recording done after a call returns, by method, given the
+# instrumentation, the object called and the result.
+_AFTER_CALL = {
+    f"{cls.__name__}.{name}": lambda instrumentation, _data, result:
+        instrumentation.add_rows_scanned(len(result))
+    for cls, name in SCAN_METHODS
+}
+_AFTER_CALL["WeatherData.load"] = lambda instrumentation, data, _result: \
+    instrumentation.increment(ROWS_LOADED, data.size())
+
+
+def _instrument(instrumentation, cls, name):
+    """Replace cls.name with a wrapper recording its calls."""
+    original = cls.__dict__.get(name)
+    method = getattr(cls, name)
+    # Wrap the method itself, not a wrapper inherited from an instrumented superclass
+    method = getattr(method, "_instrumented_method", method)
+    label = f"{cls.__name__}.{name}"
+    after_call = _AFTER_CALL.get(label)
+    active = instrumentation._active
+    clock = time.perf_counter
+
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        caller = active[-1] if active else None
+        if caller is not None and caller[1] is args[0] and caller[0].endswith(f".{name}"):
+            # Called through super() by a subclass's method, already being recorded
+            return method(*args, **kwargs)
+        active.append((label, args[0]))
+        start = clock()
+        try:
+            result = method(*args, **kwargs)
+        finally:
+            instrumentation.add_call(label, clock() - start)
+            active.pop()
+        if after_call is not None:
+            after_call(instrumentation, args[0], result)
+        return result
+
+    wrapper._instrumented_method = method
+    setattr(cls, name, wrapper)
+    _wrapped.append((cls, name, original))
+
+
+def is_enabled():
+    """(bool) True if methods are currently wrapped."""
+    return bool(_wrapped)
+
+
+def enable(instrumentation=INSTRUMENTATION, extra_targets=()):
+    """Start recording the pipeline's calls.
+
+    WeatherData.load, SCAN_METHODS, and MODEL_METHODS of every registered
+    model and capability implementation, are always instrumented.
+
+    Parameters:
+        instrumentation (Instrumentation): Where calls are recorded.
+        extra_targets ([(type, [str])]): Further classes and their method
+                                         names, e.g. (EventDecision, DECISION_METHODS).
+    """
+    if is_enabled():
+        disable()
+
+    targets = OrderedDict()
+    targets[WeatherData] = ["load"]
+    for cls, name in SCAN_METHODS:
+        targets.setdefault(cls, []).append(name)
+    for spec in MODEL_REGISTRY.get_specs():
+        model_classes = [spec.get_model_class()]
+        model_classes += [spec.get_implementation(capability)
+                          for capability in spec.get_capabilities()]
+        for model_class in model_classes:
+            targets[model_class] = [name for name in MODEL_METHODS if hasattr(model_class, name)]
+    for cls, names in extra_targets:
+        targets[cls] = names
+
+    for cls, names in targets.items():
+        for name in names:
+            _instrument(instrumentation, cls, name)
+
+
+def disable():
+    """Stop recording, restoring the original methods."""
+    while _wrapped:
+        cls, name, original = _wrapped.pop()
+        if original is None:
+            delattr(cls, name)
+        else:
+            setattr(cls, name, original)
+
+
+def profile(function, stats_file, instrumentation=INSTRUMENTATION, extra_targets=()):
+    """Run a function with instrumentation enabled and under cProfile.
+
+    Parameters:
+        function (callable): Function to run, called without arguments.
+        stats_file (str): File to save the cProfile statistics to, readable
+                          with pstats or tools such as snakeviz.
+        instrumentation (Instrumentation): Where calls are recorded.
+        extra_targets ([(type, [str])]): Further classes to instrument, see enable.
+
+    Return:
+        (str) Instrumentation summary followed by the functions with the
+              largest cumulative time.
+    """
+    profiler = cProfile.Profile()
+    enable(instrumentation, extra_targets)
+    try:
+        profiler.runcall(function)
+    finally:
+        disable()
+        profiler.dump_stats(stats_file)
+
+    output = io.StringIO()
+    stats = pstats.Stats(profiler, stream=output)
+    stats.sort_stats("cumulative").print_stats(PROFILE_LINES)
+    return instrumentation.summary() + "\n" + output.getvalue()
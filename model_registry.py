@@ -0,0 +1,235 @@
+"""
+    Registry of the available weather prediction models.
+
+    ModelSpec: Describes one registered WeatherPrediction subclass.
+    ModelRegistry: Ordered collection of ModelSpecs, with entry-point discovery.
+    register_model: Class decorator adding a model to MODEL_REGISTRY.
+
+    Capabilities let callers pick a fast path per model without knowing
+    the concrete classes, e.g.
+        spec = MODEL_REGISTRY.get("simple")
+        if spec.supports(INCREMENTAL_UPDATE):
+            model = spec.create(weather_data, 7, INCREMENTAL_UPDATE)
+"""
+
+__author__ = "Jinyuan Chen"
+__email__ = "jinyuan.chen@uqconnect.edu.au"
+
+from collections import OrderedDict
+
+# Entry-point group that third party packages use to provide models.
+ENTRY_POINT_GROUP = "event_planning.prediction_models"
+
+# Capabilities a model may declare.
+BATCH_WINDOWS = "batch_windows"
+INCREMENTAL_UPDATE = "incremental_update"
+
+
+class ModelSpec(object):
+    """Details about a single registered prediction model."""
+
+    def __init__(self, name, model_class, description, uses_past_days=False):
+        """
+        Parameters:
+            name (str): Unique key the model is registered under.
+            model_class (type): WeatherPrediction subclass implementing the model.
+            description (str): Text shown when listing the models.
+            uses_past_days (bool): True if the model is constructed with
+                                   (weather_data, past_n_days), otherwise
+                                   with (weather_data) only.
+        """
+        self._name = name
+        self._model_class = model_class
+        self._description = description
+        self._uses_past_days = uses_past_days
+        # Capability -> class implementing that capability.
+        self._capabilities = OrderedDict()
+
+    def get_name(self):
+        """(str) Key the model is registered under."""
+        return self._name
+
+    def get_model_class(self):
+        """(type) WeatherPrediction subclass implementing the model."""
+        return self._model_class
+
+    def get_description(self):
+        """(str) Text shown when listing the models."""
+        return self._description
+
+    def get_uses_past_days(self):
+        """(bool) True if the model needs the number of past days to use."""
+        return self._uses_past_days
+
+    def get_capabilities(self):
+        """([str]) Capabilities declared for the model, in declaration order."""
+        return list(self._capabilities)
+
+    def add_capability(self, capability, implementation=None):
+        """Declare that the model supports a capability.
+
+        Parameters:
+            capability (str): Name of the capability, e.g. INCREMENTAL_UPDATE.
+            implementation (type): Class providing the capability with the same
+                                   constructor and results as the model class.
+                                   Defaults to the model class itself.
+        """
+        if implementation is None:
+            implementation = self._model_class
+        self._capabilities[capability] = implementation
+
+    def supports(self, capability):
+        """(bool) True if the model declares the given capability."""
+        return capability in self._capabilities
+
+    def get_implementation(self, capability=None):
+        """Returns the class to construct for an optional capability.
+
+        Parameters:
+            capability (str): Capability required, or None for the plain model.
+
+        Return:
+            (type) Class implementing the model with the capability.
+        """
+        if capability is None:
+            return self._model_class
+        if capability not in self._capabilities:
+            raise ValueError(f"Model '{self._name}' does not support '{capability}'")
+        return self._capabilities[capability]
+
+    def create(self, weather_data, past_n_days=None, capability=None):
+        """Construct the model over the given weather data.
+
+        Parameters:
+            weather_data (WeatherData): Collection of weather data.
+            past_n_days (int): Number of days to use, ignored by models that
+                               do not use past days.
+            capability (str): Capability the constructed object must support.
+
+        Return:
+            (WeatherPrediction) The constructed prediction model.
+        """
+        model_class = self.get_implementation(capability)
+        if self._uses_past_days:
+            if past_n_days is None:
+                raise ValueError(f"Model '{self._name}' requires past_n_days")
+            return model_class(weather_data, past_n_days)
+        return model_class(weather_data)
+
+
+class ModelRegistry(object):
+    """Ordered collection of the available prediction models."""
+
+    def __init__(self):
+        """
+        """
+        self._specs = OrderedDict()
+        self._entry_points_loaded = False
+
+    def register(self, name, model_class, description, uses_past_days=False,
+                 capabilities=()):
+        """Add a model to the registry, replacing any model with the same name.
+
+        A replaced model keeps its position in the listing order.
+
+        Parameters:
+            name (str): Unique key for the model.
+            model_class (type): WeatherPrediction subclass implementing the model.
+            description (str): Text shown when listing the models.
+            uses_past_days (bool): True if the model takes past_n_days.
+            capabilities ([str]): Capabilities provided by model_class itself.
+
+        Return:
+            (ModelSpec) The registered model details.
+        """
+        spec = ModelSpec(name, model_class, description, uses_past_days)
+        for capability in capabilities:
+            spec.add_capability(capability)
+        self._specs[name] = spec
+        return spec
+
+    def add_capability(self, name, capability, implementation=None):
+        """Declare a capability for an already registered model.
+
+        Parameters:
+            name (str): Key of the registered model.
+            capability (str): Name of the capability.
+            implementation (type): Class providing the capability,
+                                   defaults to the model class.
+        """
+        self.get(name).add_capability(capability, implementation)
+
+    def get(self, name):
+        """(ModelSpec) Returns the details of the model registered as name."""
+        try:
+            return self._specs[name]
+        except KeyError:
+            raise ValueError(f"No prediction model registered as '{name}'") from None
+
+    def get_specs(self):
+        """([ModelSpec]) All registered models, in registration order."""
+        return list(self._specs.values())
+
+    def get_names(self):
+        """([str]) Keys of all registered models, in registration order."""
+        return list(self._specs)
+
+    def with_capability(self, capability):
+        """([ModelSpec]) Registered models supporting the given capability."""
+        return [spec for spec in self._specs.values() if spec.supports(capability)]
+
+    def create(self, name, weather_data, past_n_days=None, capability=None):
+        """Construct the model registered as name, see ModelSpec.create."""
+        return self.get(name).create(weather_data, past_n_days, capability)
+
+    def load_entry_points(self, group=ENTRY_POINT_GROUP):
+        """Register models advertised by installed packages.
+
+        Each entry point in the group either refers to a WeatherPrediction
+        subclass, which is registered under the entry point's name, or to a
+        callable which is given this registry to register models itself.
+        A class may set MODEL_DESCRIPTION and USES_PAST_DAYS attributes to
+        control how it is listed. Entry points are only loaded once.
+
+        Parameters:
+            group (str): Entry-point group to search.
+        """
+        if self._entry_points_loaded:
+            return
+        self._entry_points_loaded = True
+
+        from importlib import metadata
+        entry_points = metadata.entry_points()
+        if hasattr(entry_points, "select"):
+            entry_points = entry_points.select(group=group)
+        else:
+            entry_points = entry_points.get(group, ())
+
+        for entry_point in entry_points:
+            plugin = entry_point.load()
+            if isinstance(plugin, type):
+                self.register(entry_point.name, plugin,
+                              getattr(plugin, "MODEL_DESCRIPTION", entry_point.name),
+                              getattr(plugin, "USES_PAST_DAYS", False))
+            else:
+                plugin(self)
+
+
+MODEL_REGISTRY = ModelRegistry()
+
+
+def register_model(name, description, uses_past_days=False, capabilities=()):
+    """Class decorator registering a WeatherPrediction subclass in MODEL_REGISTRY.
+
+    Parameters:
+        name (str): Unique key for the model.
+        description (str): Text shown when listing the models.
+        uses_past_days (bool): True if the model takes past_n_days.
+        capabilities ([str]): Capabilities provided by the decorated class.
+    """
+    def decorator(model_class):
+        MODEL_REGISTRY.register(name, model_class, description,
+                                uses_past_days, capabilities)
+        return model_class
+
+    return decorator
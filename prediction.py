@@ -3,12 +3,29 @@
 
     WeatherPrediction: Defines the super class for all weather prediction models.
     YesterdaysWeather: Predict weather to be similar to yesterday's weather.
+    SimplePrediction: Predict weather from the average of the past n days.
+    SophisticatedPrediction: Average of the past n days adjusted by
+                             yesterday's air pressure, wind and gusts.
+    OnlineSimplePrediction: SimplePrediction updated in O(1) per new day.
+    OnlineSophisticatedPrediction: SophisticatedPrediction updated in O(1)
+                                   per new day.
+    ExponentialPrediction: Exponentially weighted averages of past days.
+    SeasonalPrediction: ExponentialPrediction blended with the weather
+                        recorded around the same day in previous years.
+    FixedPrediction: Predicted values calculated elsewhere, e.g. in bulk.
+
+    Each model is added to model_registry.MODEL_REGISTRY when defined.
 """
 
 __author__ = "Jinyuan Chen"
 __email__ = "jinyuan.chen@uqconnect.edu.au"
 
-from weather_data import WeatherData
+import copy
+from datetime import timedelta
+
+from weather_data import WeatherData, WeatherDataItem, DAYS_IN_YEAR, day_of_year
+from model_registry import MODEL_REGISTRY, INCREMENTAL_UPDATE, register_model
+from rolling_window import RollingWindow
 
 
 class WeatherPrediction(object):
@@ -23,6 +40,15 @@ class WeatherPrediction(object):
             weather_data.size() > 0
         """
         self._weather_data = weather_data
+        # Days are read from one snapshot, so later appends and loads can't
+        # change them or the version they are recorded as
+        self._snapshot = weather_data.snapshot() if weather_data is not None else None
+        self._data_version = self._snapshot.get_version() if weather_data is not None else None
+
+    def get_data_version(self):
+        """(int) Version of the weather data the prediction was made from,
+        e.g. for keys of cached predictions, or None if not known."""
+        return self._data_version
 
     def get_number_days(self):
         """(int) Number of days of data being used in prediction"""
@@ -53,6 +79,7 @@ class WeatherPrediction(object):
         raise NotImplementedError
 
 
+@register_model("yesterday", "Yesterday's weather.")
 class YesterdaysWeather(WeatherPrediction):
     """Simple prediction model, based on yesterday's weather."""
 
@@ -65,7 +92,7 @@ class YesterdaysWeather(WeatherPrediction):
             weather_data.size() > 0
         """
         super().__init__(weather_data)
-        self._yesterdays_weather = self._weather_data.get_data(1)
+        self._yesterdays_weather = self._snapshot.get_data(1)
         self._yesterdays_weather = self._yesterdays_weather[0]
 
     def get_number_days(self):
@@ -118,6 +145,7 @@ class YesterdaysWeather(WeatherPrediction):
 
 # Your implementations of the SimplePrediction and SophisticatedPrediction
 # classes should go here.
+@register_model("simple", "Simple prediction.", uses_past_days=True)
 class SimplePrediction(WeatherPrediction):
     """Object predicts the weather based on the average of the past n days' worth of weather data."""
 
@@ -132,13 +160,13 @@ class SimplePrediction(WeatherPrediction):
             weather_data.size() > 0
         """
         super().__init__(weather_data)
-        available_day = weather_data.size()
+        available_day = self._snapshot.size()
         self._past_n_days = past_n_days
 
         if self._past_n_days > available_day:
             past_n_days = available_day
 
-        self._simple_prediction_weather = self._weather_data.get_data(past_n_days)
+        self._simple_prediction_weather = self._snapshot.get_data(past_n_days)
 
     def get_number_days(self):
         """(int) Returns the number of days of data being used"""
@@ -205,6 +233,7 @@ class SimplePrediction(WeatherPrediction):
         return round(average_wind_speed)
 
 
+@register_model("sophisticated", "Sophisticated prediction.", uses_past_days=True)
 class SophisticatedPrediction(WeatherPrediction):
     """Object predicts the weather based on the average of the past n days' worth of weather data."""
 
@@ -219,14 +248,14 @@ class SophisticatedPrediction(WeatherPrediction):
                     weather_data.size() > 0
                 """
         super().__init__(weather_data)
-        available_day = weather_data.size()
+        available_day = self._snapshot.size()
         self._past_n_days = past_n_days
 
         if self._past_n_days > available_day:
             past_n_days = available_day
 
-        self._sophisticated_prediction_weather = self._weather_data.get_data(past_n_days)
-        self._yesterdays_weather = self._weather_data.get_data(1)
+        self._sophisticated_prediction_weather = self._snapshot.get_data(past_n_days)
+        self._yesterdays_weather = self._snapshot.get_data(1)
         self._yesterdays_weather = self._yesterdays_weather[0]
 
     def get_number_days(self):
@@ -370,6 +399,534 @@ class SophisticatedPrediction(WeatherPrediction):
         return round(wind_speed_result)
 
 
+class FixedPrediction(WeatherPrediction):
+    """Prediction of values that have already been calculated.
+
+    Lets EventDecision score predictions calculated in bulk, without
+    constructing the model that would produce them.
+    """
+
+    def __init__(self, chance_of_rain, high_temperature, low_temperature,
+                 humidity, cloud_cover, wind_speed, number_days=1):
+        """
+        Parameters:
+            chance_of_rain (int): Percentage indicating chance of rain occurring.
+            high_temperature (float): Expected high temperature.
+            low_temperature (float): Expected low temperature.
+            humidity (int): Expected humidity.
+            cloud_cover (int): Expected amount of cloud cover.
+            wind_speed (int): Expected average wind speed.
+            number_days (int): Number of days of data the values came from.
+        """
+        super().__init__(None)
+        self._chance_of_rain = chance_of_rain
+        self._high_temperature = high_temperature
+        self._low_temperature = low_temperature
+        self._humidity = humidity
+        self._cloud_cover = cloud_cover
+        self._wind_speed = wind_speed
+        self._number_days = number_days
+
+    def get_number_days(self):
+        """(int) Number of days of data being used in prediction"""
+        return self._number_days
+
+    def chance_of_rain(self):
+        """(int) Percentage indicating chance of rain occurring."""
+        return self._chance_of_rain
+
+    def high_temperature(self):
+        """(float) Expected high temperature."""
+        return self._high_temperature
+
+    def low_temperature(self):
+        """(float) Expected low temperature."""
+        return self._low_temperature
+
+    def humidity(self):
+        """(int) Expected humidity."""
+        return self._humidity
+
+    def cloud_cover(self):
+        """(int) Expected amount of cloud cover."""
+        return self._cloud_cover
+
+    def wind_speed(self):
+        """(int) Expected average wind speed."""
+        return self._wind_speed
+
+
+class _IncrementalPrediction(WeatherPrediction):
+    """Superclass for models updated incrementally as new days arrive."""
+
+    def __init__(self, weather_data, past_n_days):
+        """
+        Parameters:
+            weather_data (WeatherData): Collection of weather data.
+            past_n_days (int): Past number of days' weather data.
+
+        Pre-condition:
+            weather_data.size() > 0
+            past_n_days > 0
+        """
+        super().__init__(weather_data)
+        self._past_n_days = past_n_days
+        self._start(self._snapshot)
+
+    def _start(self, snapshot):
+        """Starts the prediction afresh from the days of a snapshot.
+
+        Parameters:
+            snapshot (WeatherDataSnapshot): Weather data to start from.
+        """
+        self._follow(snapshot)
+
+    def _follow(self, snapshot):
+        """Records the snapshot whose days have all been used.
+
+        Parameters:
+            snapshot (WeatherDataSnapshot): Weather data started from or
+                                            last updated from.
+        """
+        self._snapshot = snapshot
+        self._days_seen = snapshot.size()
+        self._generation = snapshot.get_generation()
+        self._data_version = snapshot.get_version()
+
+    def get_number_days(self):
+        """(int) Returns the number of days of data being used"""
+        return self._past_n_days
+
+    def push(self, weather_item):
+        """Add the weather for the next day to the prediction in O(1).
+
+        Parameters:
+            weather_item (WeatherDataItem): Weather for the day after the
+                                            most recent day used so far.
+        """
+        raise NotImplementedError
+
+    def update(self):
+        """Add any days appended to the weather data since the last update.
+
+        If the days have been replaced since, e.g. by a load, the prediction
+        starts again from the new days.
+        """
+        # Days appended while updating are left for the next update
+        snapshot = self._weather_data.snapshot()
+        if snapshot.get_generation() != self._generation:
+            self._start(snapshot)
+            return
+        new_days = snapshot.size() - self._days_seen
+        if new_days > 0:
+            for day in snapshot.get_data(new_days):
+                self.push(day)
+        self._follow(snapshot)
+
+    def next_day(self):
+        """Expected weather for the day after the most recent day used.
+
+        The day holds the model's own predictions of the high and low
+        temperatures, humidity, cloud cover and wind speed. Rainfall and air
+        pressure, which no model predicts as amounts, come from the model's
+        averages, and fields such as wind direction are carried over from
+        the most recent day, see _carried_over.
+
+        Return:
+            (WeatherDataItem) The expected day, which can be pushed to roll
+                              the prediction forward.
+        """
+        latest, rain, pressure = self._carried_over()
+        return _following_day(latest, rain, self.high_temperature(), self.low_temperature(),
+                              self.humidity(), self.cloud_cover(), self.wind_speed(), pressure)
+
+    def _carried_over(self):
+        """Values of the expected day that the model doesn't predict.
+
+        Return:
+            (tuple<WeatherDataItem, float, float>) Most recent day used, and
+                the expected rainfall and air pressure.
+        """
+        raise NotImplementedError
+
+    def copy(self):
+        """(_IncrementalPrediction) Independent copy that days can be pushed to
+        without changing this prediction. The weather data is shared."""
+        return copy.copy(self)
+
+
+def _following_day(latest, rain, high, low, humidity, cloud, wind, pressure):
+    """(WeatherDataItem) Day after latest with the given expected values."""
+    recorded = latest.get_date()
+    return WeatherDataItem(rain, high, low, latest.get_sunshine_hours(), humidity, wind,
+                           latest.get_maximum_wind_speed(), latest.get_wind_direction(),
+                           cloud, pressure,
+                           recorded + timedelta(days=1) if recorded is not None else None)
+
+
+class _OnlinePrediction(_IncrementalPrediction):
+    """Superclass for models calculated over a rolling window of past days."""
+
+    def _start(self, snapshot):
+        """Fills a rolling window with the past n days of a snapshot.
+
+        Parameters:
+            snapshot (WeatherDataSnapshot): Weather data to start from.
+        """
+        super()._start(snapshot)
+        self._window = RollingWindow(self._past_n_days)
+        for day in snapshot.get_data(min(self._past_n_days, snapshot.size())):
+            self._window.push(day)
+
+    def push(self, weather_item):
+        """Add the weather for the next day to the prediction in O(1).
+
+        Parameters:
+            weather_item (WeatherDataItem): Weather for the day after the
+                                            most recent day used so far.
+        """
+        self._window.push(weather_item)
+
+    def _average(self, name):
+        """(float) Average of a field over the past n days."""
+        return self._window.get_total(name) / self._past_n_days
+
+    def _carried_over(self):
+        """Latest day of the window and the window's average rainfall and
+        pressure, see _IncrementalPrediction._carried_over."""
+        return self._window.get_latest(), self._average("rain"), self._average("pressure")
+
+    def copy(self):
+        """(_OnlinePrediction) Independent copy, see _IncrementalPrediction.copy."""
+        other = copy.copy(self)
+        other._window = self._window.copy()
+        return other
+
+
+class OnlineSimplePrediction(_OnlinePrediction):
+    """SimplePrediction maintained from running totals of the past n days.
+
+    Results match SimplePrediction over the same days exactly, as the window
+    sums the days the way SimplePrediction does, see RollingWindow.
+    """
+
+    def chance_of_rain(self):
+        """(int) Return the percentage indicating chance of rain occurring."""
+        result = self._average("rain") * 9
+        if result > 100:
+            result = 100
+        return round(result)
+
+    def high_temperature(self):
+        """(float) Return the highest temperature recorded in the past n days."""
+        return float(self._window.get_highest_temperature())
+
+    def low_temperature(self):
+        """(float) Return the lowest temperature recorded in the past n days."""
+        return float(self._window.get_lowest_temperature())
+
+    def humidity(self):
+        """(int) Return the average of humidity data from the past n days."""
+        return round(self._average("humidity"))
+
+    def cloud_cover(self):
+        """(int) Return the average of cloud_cover data from the past n days."""
+        return round(self._average("cloud"))
+
+    def wind_speed(self):
+        """(int) Return the average of wind_speed data from the past n days"""
+        return round(self._average("wind"))
+
+
+class OnlineSophisticatedPrediction(_OnlinePrediction):
+    """SophisticatedPrediction maintained from running totals of the past n days.
+
+    Results match SophisticatedPrediction over the same days exactly, as the
+    window sums the days the way SophisticatedPrediction does, see RollingWindow.
+    """
+
+    def chance_of_rain(self):
+        """(int) Return the percentage indicating chance of rain occurring."""
+        yesterday = self._window.get_latest()
+        average_rainfall = self._average("rain")
+        average_air_pressure = self._average("pressure")
+
+        if yesterday.get_air_pressure() < average_air_pressure:
+            average_rainfall = average_rainfall * 10
+        elif yesterday.get_air_pressure() >= average_air_pressure:
+            average_rainfall = average_rainfall * 7
+
+        rainfall_result = average_rainfall
+        if yesterday.get_wind_direction() in ("NNE", "NE", "ENE", "E", "ESE", "SE", "SSE"):
+            rainfall_result = average_rainfall * 1.2
+        if rainfall_result > 100:
+            rainfall_result = 100
+
+        return round(rainfall_result)
+
+    def high_temperature(self):
+        """(float) Return the average high temperature recorded in the past n days."""
+        high_temperature_result = self._average("high")
+        if self._window.get_latest().get_air_pressure() > self._average("pressure"):
+            high_temperature_result = high_temperature_result + 2
+        return float(high_temperature_result)
+
+    def low_temperature(self):
+        """(float) Return the average low temperature recorded in the past n days."""
+        low_temperature_result = self._average("low")
+        if self._window.get_latest().get_air_pressure() < self._average("pressure"):
+            low_temperature_result = low_temperature_result - 2
+        return float(low_temperature_result)
+
+    def humidity(self):
+        """(int) Return the average of humidity data from the past n days."""
+        yesterday_air_pressure = self._window.get_latest().get_air_pressure()
+        average_air_pressure = self._average("pressure")
+
+        humidity_result = self._average("humidity")
+        if yesterday_air_pressure < average_air_pressure:
+            humidity_result = humidity_result + 15
+        elif yesterday_air_pressure > average_air_pressure:
+            humidity_result = humidity_result - 15
+        if humidity_result < 0:
+            humidity_result = 0
+        if humidity_result > 100:
+            humidity_result = 100
+
+        return round(humidity_result)
+
+    def cloud_cover(self):
+        """(int) Return the average of cloud_cover from the past n days."""
+        cloud_cover_result = self._average("cloud")
+        if self._window.get_latest().get_air_pressure() < self._average("pressure"):
+            cloud_cover_result = cloud_cover_result + 2
+        if cloud_cover_result > 9:
+            cloud_cover_result = 9
+        return round(cloud_cover_result)
+
+    def wind_speed(self):
+        """(int) Return the average of wind_speed from the past n days"""
+        average_wind_speed = self._average("wind")
+        wind_speed_result = average_wind_speed
+        if self._window.get_latest().get_maximum_wind_speed() > 4 * average_wind_speed:
+            wind_speed_result = average_wind_speed * 1.2
+        return round(wind_speed_result)
+
+
+# Position of each field in the state of the exponentially weighted models.
+_RAIN, _HIGH, _LOW, _HUMIDITY, _CLOUD, _WIND, _PRESSURE = range(7)
+# DayOfYearIndex field at each position.
+_INDEX_FIELDS = ("rain", "high", "low", "humidity", "cloud", "wind", "pressure")
+
+
+def _smoothed_values(day):
+    """(tuple<float>) Values of a day tracked by the exponentially weighted models."""
+    return (day.get_rainfall(), day.get_high_temperature(), day.get_low_temperature(),
+            day.get_humidity(), day.get_cloud_cover(), day.get_average_wind_speed(),
+            day.get_air_pressure())
+
+
+@register_model("exponential", "Exponentially weighted prediction.",
+                uses_past_days=True, capabilities=(INCREMENTAL_UPDATE,))
+class ExponentialPrediction(_IncrementalPrediction):
+    """Predicts the weather from exponentially weighted averages of past days.
+
+    The weight of a day decays by (1 - alpha) for each newer day, with
+    alpha = 2 / (n + 1) so that the average age of the data matches an
+    n day window. Only one smoothed value per field is kept.
+    """
+    # Spans of history used to start the averages, older days would carry
+    # less than e^-20 of the weight.
+    WARMUP_SPANS = 10
+
+    def __init__(self, weather_data, past_n_days):
+        """Starts the averages from the most recent days' weather data.
+
+        Parameters:
+            weather_data (WeatherData): Collection of weather data.
+            past_n_days (int): Span of the averages in days.
+
+        Pre-condition:
+            weather_data.size() > 0
+            past_n_days > 0
+        """
+        self._alpha = 2 / (past_n_days + 1)
+        super().__init__(weather_data, past_n_days)
+
+    def _start(self, snapshot):
+        """Starts the averages from the most recent days of a snapshot.
+
+        Parameters:
+            snapshot (WeatherDataSnapshot): Weather data to start from.
+        """
+        super()._start(snapshot)
+        self._state = None
+        self._latest = None
+        warmup_days = min(self.WARMUP_SPANS * self._past_n_days, snapshot.size())
+        for day in snapshot.get_data(warmup_days):
+            self.push(day)
+
+    def push(self, weather_item):
+        """Add the weather for the next day to the averages in O(1).
+
+        Parameters:
+            weather_item (WeatherDataItem): Weather for the day after the
+                                            most recent day used so far.
+        """
+        values = _smoothed_values(weather_item)
+        self._latest = weather_item
+        if self._state is None:
+            self._state = list(values)
+            return
+
+        alpha = self._alpha
+        state = self._state
+        for index, value in enumerate(values):
+            state[index] += alpha * (value - state[index])
+
+    def _expected(self, field):
+        """(float) Expected value of a field, e.g. _RAIN, for the next day."""
+        return self._state[field]
+
+    def _carried_over(self):
+        """Latest day and the expected rainfall and pressure, see
+        _IncrementalPrediction._carried_over."""
+        return self._latest, self._expected(_RAIN), self._expected(_PRESSURE)
+
+    def copy(self):
+        """(ExponentialPrediction) Independent copy, see _IncrementalPrediction.copy."""
+        other = copy.copy(self)
+        other._state = list(self._state)
+        return other
+
+    def chance_of_rain(self):
+        """(int) Return the percentage indicating chance of rain occurring."""
+        result = self._expected(_RAIN) * 9
+        if result > 100:
+            result = 100
+        return round(result)
+
+    def high_temperature(self):
+        """(float) Return the expected high temperature."""
+        return float(self._expected(_HIGH))
+
+    def low_temperature(self):
+        """(float) Return the expected low temperature."""
+        return float(self._expected(_LOW))
+
+    def humidity(self):
+        """(int) Return the expected humidity."""
+        return round(self._expected(_HUMIDITY))
+
+    def cloud_cover(self):
+        """(int) Return the expected amount of cloud cover."""
+        return round(self._expected(_CLOUD))
+
+    def wind_speed(self):
+        """(int) Return the expected average wind speed."""
+        return round(self._expected(_WIND))
+
+
+@register_model("seasonal", "Seasonal prediction.",
+                uses_past_days=True, capabilities=(INCREMENTAL_UPDATE,))
+class SeasonalPrediction(ExponentialPrediction):
+    """Blends exponentially weighted averages with the weather recorded
+    within a week of the next day's date in earlier years.
+
+    The seasonal totals are read from the DayOfYearIndex of the weather
+    data, so nothing is kept for each day of the year. The days of the
+    current season, those in the week before the next day, are left out
+    as they are already in the recent averages. Days pushed that are not
+    in the weather data, such as expected days, and days without a date
+    only contribute to the exponentially weighted averages.
+    """
+    # Share of the prediction taken from previous years.
+    CLIMATOLOGY_WEIGHT = 0.5
+    # Days either side of the next day's date counted as the same season.
+    SEASON_HALF_WIDTH = 7
+
+    def _start(self, snapshot):
+        """Starts the averages from the most recent days of a snapshot.
+
+        Parameters:
+            snapshot (WeatherDataSnapshot): Weather data to start from.
+        """
+        self._latest_date = None
+        super()._start(snapshot)
+
+    def _follow(self, snapshot):
+        """Uses the seasonal totals of the snapshot, see _IncrementalPrediction._follow."""
+        super()._follow(snapshot)
+        self._season_date = None
+        self._season = None
+
+    def push(self, weather_item):
+        """Add the weather for the next day to the prediction in O(1).
+
+        Parameters:
+            weather_item (WeatherDataItem): Weather for the day after the
+                                            most recent day used so far.
+        """
+        super().push(weather_item)
+        if weather_item.get_date() is not None:
+            self._latest_date = weather_item.get_date()
+
+    def _season_averages(self, target):
+        """Average of each field in the season of a date in earlier years.
+
+        Parameters:
+            target (datetime.date): Date at the centre of the season.
+
+        Return:
+            ([float]) Averages in the order of _smoothed_values, or None if
+                      no days were recorded in the season in earlier years.
+        """
+        half_width = self.SEASON_HALF_WIDTH
+        index = self._snapshot.get_day_of_year_index()
+        count = index.get_count(target, half_width)
+        totals = [index.get_total(field, target, half_width) for field in _INDEX_FIELDS]
+
+        # Take out the days of the current season, the most recent in the data
+        season_start = target - timedelta(days=half_width)
+        centre = day_of_year(target)
+        recent_days = self._snapshot.get_data(min(2 * half_width + 1, self._snapshot.size()))
+        for day in reversed(recent_days):
+            recorded = day.get_date()
+            if recorded is None:
+                continue
+            if recorded < season_start:
+                break
+            distance = (day_of_year(recorded) - centre) % DAYS_IN_YEAR
+            if min(distance, DAYS_IN_YEAR - distance) <= half_width:
+                count -= 1
+                for field, value in enumerate(_smoothed_values(day)):
+                    totals[field] -= value
+
+        if count == 0:
+            return None
+        return [total / count for total in totals]
+
+    def _expected(self, field):
+        """(float) Expected value of a field, e.g. _RAIN, for the next day."""
+        recent = super()._expected(field)
+        if self._latest_date is None:
+            return recent
+
+        target = self._latest_date + timedelta(days=1)
+        if target != self._season_date:
+            self._season_date = target
+            self._season = self._season_averages(target)
+        if self._season is None:
+            return recent
+
+        return (self.CLIMATOLOGY_WEIGHT * self._season[field]
+                + (1 - self.CLIMATOLOGY_WEIGHT) * recent)
+
+
+MODEL_REGISTRY.add_capability("simple", INCREMENTAL_UPDATE, OnlineSimplePrediction)
+MODEL_REGISTRY.add_capability("sophisticated", INCREMENTAL_UPDATE, OnlineSophisticatedPrediction)
+
+
 if __name__ == "__main__":
     print("This module provides the weather prediction models",
           "and is not meant to be executed on its own.")
@@ -0,0 +1,166 @@
+"""
+    Fixed capacity window over the most recent days of weather data,
+    used by the incremental prediction models.
+
+    RollingWindow: Running totals, extremes and latest day of a sliding window.
+"""
+
+__author__ = "Jinyuan Chen"
+__email__ = "jinyuan.chen@uqconnect.edu.au"
+
+from collections import deque
+
+# Fields with a running total, and the WeatherDataItem getter for each.
+TOTAL_FIELDS = (
+    ("rain", "get_rainfall"),
+    ("high", "get_high_temperature"),
+    ("low", "get_low_temperature"),
+    ("humidity", "get_humidity"),
+    ("cloud", "get_cloud_cover"),
+    ("wind", "get_average_wind_speed"),
+    ("pressure", "get_air_pressure"),
+)
+_GETTERS = dict(TOTAL_FIELDS)
+# Largest whole number below which every whole number is a float.
+_EXACT_LIMIT = 2 ** 53
+
+
+class RollingWindow(object):
+    """Sliding window over the most recent days of weather data.
+
+    Pushing a day is O(1) amortised: totals are updated by adding the new day
+    and subtracting the evicted one, and monotonic deques hold the candidates
+    for the highest and lowest temperatures still inside the window.
+
+    Each total equals the batch models' sum, which adds the days one at a
+    time from the oldest, rounding after every addition. While every value
+    of a field in the window is a small whole number, such as humidity,
+    cloud cover and wind speed, no addition rounds, so the running total
+    kept by push is that sum. Otherwise the sum is made the batch models'
+    way on the first read after a push and kept until the next push.
+    """
+
+    def __init__(self, capacity):
+        """
+        Parameters:
+            capacity (int): Maximum number of days held in the window.
+
+        Pre-condition:
+            capacity > 0
+        """
+        self._capacity = capacity
+        self._days = deque()
+        # Totals of the whole values, and the number of days with a value
+        # that isn't a whole number small enough to add without rounding.
+        self._totals = dict.fromkeys((name for name, _ in TOTAL_FIELDS), 0)
+        self._inexact = dict.fromkeys(self._totals, 0)
+        self._limit = _EXACT_LIMIT // capacity
+        # Sums of the fields with inexact days, made since the last push
+        self._sums = {}
+        # (position, value) pairs, values decreasing for highs and
+        # increasing for lows, so the extreme is always at the front.
+        self._highs = deque()
+        self._lows = deque()
+        self._pushed = 0
+
+    def push(self, day):
+        """Add the newest day, evicting the oldest day if the window is full.
+
+        Parameters:
+            day (WeatherDataItem): Weather for the day after the latest day.
+        """
+        position = self._pushed
+        self._pushed += 1
+        self._days.append(day)
+        self._sums = {}
+        self._add(day, 1)
+
+        high = day.get_high_temperature()
+        highs = self._highs
+        while highs and highs[-1][1] <= high:
+            highs.pop()
+        highs.append((position, high))
+
+        low = day.get_low_temperature()
+        lows = self._lows
+        while lows and lows[-1][1] >= low:
+            lows.pop()
+        lows.append((position, low))
+
+        if len(self._days) > self._capacity:
+            self._evict()
+
+    def _evict(self):
+        """Remove the oldest day from the window."""
+        oldest = self._days.popleft()
+        oldest_position = self._pushed - len(self._days) - 1
+        if self._highs[0][0] == oldest_position:
+            self._highs.popleft()
+        if self._lows[0][0] == oldest_position:
+            self._lows.popleft()
+
+        self._add(oldest, -1)
+
+    def _add(self, day, sign):
+        """Adds a day's values to the totals, or subtracts them if sign is -1."""
+        totals = self._totals
+        inexact = self._inexact
+        for name, getter in TOTAL_FIELDS:
+            numerator, denominator = getattr(day, getter)().as_integer_ratio()
+            if denominator == 1 and abs(numerator) <= self._limit:
+                totals[name] += sign * numerator
+            else:
+                inexact[name] += sign
+
+    def copy(self):
+        """(RollingWindow) Independent window holding the same days and totals."""
+        window = RollingWindow(self._capacity)
+        window._days = deque(self._days)
+        window._totals = dict(self._totals)
+        window._inexact = dict(self._inexact)
+        window._sums = dict(self._sums)
+        window._highs = deque(self._highs)
+        window._lows = deque(self._lows)
+        window._pushed = self._pushed
+        return window
+
+    def get_capacity(self):
+        """(int) Maximum number of days held in the window."""
+        return self._capacity
+
+    def size(self):
+        """(int) Number of days currently in the window."""
+        return len(self._days)
+
+    def get_total(self, name):
+        """(float) Sum of a field over the window, as the batch models sum it.
+
+        Parameters:
+            name (str): One of rain, high, low, humidity, cloud, wind, pressure.
+        """
+        if not self._inexact[name]:
+            return float(self._totals[name])
+        total = self._sums.get(name)
+        if total is None:
+            getter = _GETTERS[name]
+            total = 0
+            for day in self._days:
+                total += getattr(day, getter)()
+            self._sums[name] = total
+        return total
+
+    def get_highest_temperature(self):
+        """(float) Highest maximum temperature in the window."""
+        return self._highs[0][1]
+
+    def get_lowest_temperature(self):
+        """(float) Lowest minimum temperature in the window."""
+        return self._lows[0][1]
+
+    def get_latest(self):
+        """(WeatherDataItem) Most recent day in the window."""
+        return self._days[-1]
+
+    def get_days(self):
+        """([WeatherDataItem]) Days in the window, ordered from oldest to most recent."""
+        return list(self._days)
@@ -0,0 +1,115 @@
+"""
+    What-if analysis of how advisability responds to the predicted weather.
+
+    ScenarioGrid: Sweeps chosen predicted values over a grid for an event.
+    ScenarioResult: Advisability at every grid point, with sensitivities.
+
+    Predicted values that are not swept are taken from a base prediction.
+    The whole grid is scored in one call to vector_decision.advisability,
+    each swept value along its own axis, so no prediction model or
+    EventDecision is made per grid point. Requires NumPy.
+"""
+
+__author__ = "Jinyuan Chen"
+__email__ = "jinyuan.chen@uqconnect.edu.au"
+
+from collections import OrderedDict
+
+import vector_decision
+from vector_decision import np
+
+# Predicted values that can be swept, in the order vector_decision takes them.
+FIELDS = ("chance_of_rain", "high_temperature", "low_temperature",
+          "humidity", "cloud_cover", "wind_speed")
+
+
+class ScenarioResult(object):
+    """Advisability over a grid of predicted values."""
+
+    def __init__(self, axes, advisability):
+        """
+        Parameters:
+            axes (OrderedDict<str, array<float>>): Values of each swept field,
+                                                   in axis order.
+            advisability (array<float>): Advisability at every grid point.
+        """
+        self._axes = axes
+        self._advisability = advisability
+
+    def get_axes(self):
+        """(OrderedDict<str, array<float>>) Values of each swept field, in axis order."""
+        return OrderedDict(self._axes)
+
+    def get_shape(self):
+        """(tuple<int>) Number of values along each axis."""
+        return self._advisability.shape
+
+    def get_advisability(self):
+        """(array<float>) Advisability at every grid point, indexed by axis."""
+        return self._advisability
+
+    def sensitivity(self, field):
+        """Rate of change of advisability with one swept field.
+
+        Central differences are used inside the grid and one-sided
+        differences at its edges, so unevenly spaced values are allowed.
+
+        Parameters:
+            field (str): Swept field, one of FIELDS.
+
+        Return:
+            (array<float>) Change in advisability per unit of the field,
+                           at every grid point.
+
+        Pre-condition:
+            The field was swept over at least two distinct values.
+        """
+        axis = list(self._axes).index(field)
+        return np.gradient(self._advisability, self._axes[field], axis=axis)
+
+    def sensitivities(self):
+        """(dict<str, array<float>>) sensitivity of every swept field."""
+        return {field: self.sensitivity(field) for field in self._axes}
+
+
+class ScenarioGrid(object):
+    """Sweep of predicted values for an event."""
+
+    def __init__(self, event, base, axes):
+        """
+        Parameters:
+            event (Event): Event whose advisability is calculated.
+            base (WeatherPrediction): Prediction supplying the values of
+                                      fields that are not swept.
+            axes ([(str, [float])]): Field and values for each axis of the
+                                     grid, fields from FIELDS.
+        """
+        if np is None:
+            raise ImportError("scenarios requires NumPy")
+        self._event = event
+        self._base = {field: getattr(base, field)() for field in FIELDS}
+        self._axes = OrderedDict()
+        for field, values in axes:
+            if field not in FIELDS:
+                raise ValueError(f"Can't sweep '{field}', expected one of {', '.join(FIELDS)}")
+            if field in self._axes:
+                raise ValueError(f"'{field}' is swept more than once")
+            self._axes[field] = np.asarray(values, dtype=float)
+
+    def get_shape(self):
+        """(tuple<int>) Number of values along each axis."""
+        return tuple(len(values) for values in self._axes.values())
+
+    def run(self):
+        """(ScenarioResult) Advisability at every point of the grid."""
+        number_axes = len(self._axes)
+        arguments = dict(self._base)
+        for axis, (field, values) in enumerate(self._axes.items()):
+            shape = [1] * number_axes
+            shape[axis] = len(values)
+            arguments[field] = values.reshape(shape)
+
+        advisability = vector_decision.advisability(
+            *(arguments[field] for field in FIELDS), self._event.get_outdoors(),
+            self._event.get_cover_available(), self._event.get_time())
+        return ScenarioResult(OrderedDict(self._axes), np.asarray(advisability))
@@ -0,0 +1,295 @@
+"""
+    Long-running service answering advisability queries over HTTP.
+
+    AdvisabilityService: Answers queries from weather data loaded once.
+    AdvisabilityHandler: Serves the service's answers as JSON.
+    PreforkServer: Loads everything in one process then forks workers.
+
+    A query is a GET request such as
+        /advisability?name=Picnic&outdoors=yes&cover=no&time=13&model=sophisticated&days=7
+    answered with the advisability and its breakdown, see EventDecision.explain.
+
+    The parent process loads the weather data, which builds its seasonal
+    index, and makes the predictions for the usual numbers of days, then
+    freezes the garbage collector's view of those objects before forking.
+    Workers share the parent's memory copy-on-write; as the frozen objects
+    are never visited by a collection in a worker, their pages are not
+    written to and stay shared, and no worker loads or builds anything
+    before serving.
+
+    With --watch each worker follows the weather file, reading rows as they
+    are appended; cached predictions are remade for the new data version.
+"""
+
+__author__ = "Jinyuan Chen"
+__email__ = "jinyuan.chen@uqconnect.edu.au"
+
+import argparse
+import gc
+import json
+import os
+import signal
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from event_decision import Event, EventDecision
+from model_registry import MODEL_REGISTRY
+from weather_data import WeatherData
+from weather_watcher import DEFAULT_INTERVAL, StationWatcher
+
+# Numbers of past days whose predictions are built before forking.
+WARM_PAST_DAYS = (1, 3, 7, 14, 30)
+# Path that advisability queries are sent to.
+ADVISABILITY_PATH = "/advisability"
+# Answers accepted for the outdoors and cover questions, as in UserInteraction.
+YES = ("y", "yes", "true", "1")
+NO = ("n", "no", "false", "0")
+
+
+class AdvisabilityService(object):
+    """Answers advisability queries from weather data loaded once.
+
+    Predictions depend only on the weather data, model and number of days,
+    so each is made once, from a snapshot of the data, and kept for every
+    later query until the data changes version.
+    """
+
+    def __init__(self, weather_data):
+        """
+        Parameters:
+            weather_data (WeatherData): Weather to make predictions from.
+        """
+        self._weather_data = weather_data
+        self._predictions = {}
+
+    def warm(self, past_n_days_options=WARM_PAST_DAYS):
+        """Builds the usual predictions ahead of queries.
+
+        Parameters:
+            past_n_days_options ([int]): Numbers of days to build predictions for.
+        """
+        MODEL_REGISTRY.load_entry_points()
+        for spec in MODEL_REGISTRY.get_specs():
+            options = past_n_days_options if spec.get_uses_past_days() else (None,)
+            for past_n_days in options:
+                if past_n_days is None or past_n_days <= self._weather_data.size():
+                    self.get_prediction(spec.get_name(), past_n_days)
+
+    def get_prediction(self, model, past_n_days=None):
+        """Returns the prediction of a registered model, made on first use.
+
+        Parameters:
+            model (str): Name the model is registered under.
+            past_n_days (int): Number of days the model uses, if it uses past days.
+
+        Return:
+            (WeatherPrediction) The model's prediction.
+        """
+        if not MODEL_REGISTRY.get(model).get_uses_past_days():
+            past_n_days = None
+        snapshot = self._weather_data.snapshot()
+        key = (model, past_n_days, snapshot.get_version())
+        prediction = self._predictions.get(key)
+        if prediction is None:
+            prediction = MODEL_REGISTRY.create(model, snapshot, past_n_days)
+            if any(version != snapshot.get_version() for _, _, version in self._predictions):
+                # Predictions from older data are never asked for again
+                self._predictions = {}
+            self._predictions[key] = prediction
+        return prediction
+
+    def advisability(self, query):
+        """Answers an advisability query.
+
+        Parameters:
+            query (dict<str, str>): name, outdoors, cover, time, model and,
+                                    for models using past days, days.
+
+        Return:
+            (dict<str, object>) The event, model and the fields of the
+                                decision's Explanation.
+
+        Raises:
+            ValueError: If the query is missing a value or has an invalid one.
+        """
+        event = Event(query.get("name", ""), _yes_or_no(query, "outdoors"),
+                      _yes_or_no(query, "cover"), _integer(query, "time", 0, 23))
+        model = query.get("model", "simple")
+        past_n_days = None
+        if MODEL_REGISTRY.get(model).get_uses_past_days():
+            past_n_days = _integer(query, "days", 1, self._weather_data.size())
+        explanation = EventDecision(event, self.get_prediction(model, past_n_days)).explain()
+        answer = {"event": event.get_name(), "time": event.get_time(), "model": model,
+                  "days": past_n_days}
+        answer.update(explanation._asdict())
+        return answer
+
+
+def _yes_or_no(query, key):
+    """(bool) Value of a yes or no question in a query."""
+    value = query.get(key, "").lower()
+    if value in YES:
+        return True
+    if value in NO:
+        return False
+    raise ValueError(f"'{key}' must be yes or no")
+
+
+def _integer(query, key, lowest, highest):
+    """(int) Value of a whole number from lowest to highest in a query."""
+    value = query.get(key, "")
+    if not value.isdigit() or not lowest <= int(value) <= highest:
+        raise ValueError(f"'{key}' must be a whole number from {lowest} to {highest}")
+    return int(value)
+
+
+class AdvisabilityHandler(BaseHTTPRequestHandler):
+    """Serves the answers of the server's AdvisabilityService as JSON."""
+
+    def do_GET(self):
+        """Answers a query, or reports why it can't be answered."""
+        url = urlsplit(self.path)
+        if url.path != ADVISABILITY_PATH:
+            self._send(404, {"error": f"Unknown path '{url.path}'"})
+            return
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            answer = self.server.service.advisability(query)
+        except ValueError as error:
+            self._send(400, {"error": str(error)})
+            return
+        self._send(200, answer)
+
+    def _send(self, status, body):
+        """Sends a JSON response."""
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        """Requests are not logged, workers would interleave their output."""
+
+
+class PreforkServer(object):
+    """HTTP server whose workers are forked after everything is loaded."""
+
+    def __init__(self, service, address=("", 8000), workers=None, watcher=None,
+                 watch_interval=DEFAULT_INTERVAL):
+        """
+        Parameters:
+            service (AdvisabilityService): Service answering the queries.
+            address (tuple<str, int>): Host and port to listen on.
+            workers (int): Number of worker processes, None for one per CPU.
+            watcher (StationWatcher): Follows the file of the service's
+                                      weather data, None to never reload it.
+            watch_interval (float): Seconds between checks of the file.
+        """
+        self._service = service
+        self._address = address
+        self._workers = workers or os.cpu_count() or 1
+        self._watcher = watcher
+        self._watch_interval = watch_interval
+        self._pids = []
+
+    def serve(self):
+        """Warms the service, forks the workers and waits for them to exit.
+
+        Workers are stopped when this process is interrupted or terminated.
+
+        Pre-condition:
+            The operating system supports os.fork.
+        """
+        self._service.warm()
+        listener = socket.create_server(self._address, backlog=128)
+        # Move everything loaded so far out of the collector's reach so
+        # collections in the workers leave the shared pages untouched.
+        gc.freeze()
+
+        for _ in range(self._workers):
+            pid = os.fork()
+            if pid == 0:
+                self._run_worker(listener)
+            self._pids.append(pid)
+        listener.close()
+
+        signal.signal(signal.SIGTERM, lambda number, frame: self.stop())
+        try:
+            while self._pids:
+                pid, _ = os.wait()
+                if pid in self._pids:
+                    self._pids.remove(pid)
+        except KeyboardInterrupt:
+            self.stop()
+        except ChildProcessError:
+            # Every worker was collected by stop
+            pass
+
+    def _run_worker(self, listener):
+        """Serves requests on the shared listening socket until stopped."""
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        server = HTTPServer(self._address, AdvisabilityHandler, bind_and_activate=False)
+        server.socket.close()
+        server.socket = listener
+        server.service = self._service
+        if self._watcher is not None:
+            # Each worker has its own copy of the data to keep up to date
+            threading.Thread(target=self._watcher.run, args=(self._watch_interval,),
+                             daemon=True).start()
+        try:
+            server.serve_forever()
+        finally:
+            os._exit(0)
+
+    def stop(self):
+        """Stops every worker and waits for them to exit."""
+        for pid in self._pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in self._pids:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        self._pids = []
+
+
+def main(arguments=None):
+    """Loads the weather data and serves advisability queries.
+
+    Parameters:
+        arguments ([str]): Command line arguments, defaults to sys.argv.
+    """
+    parser = argparse.ArgumentParser(description="Serve advisability queries over HTTP.")
+    parser.add_argument("--data", default="weather_data.csv", help="weather CSV file to load")
+    parser.add_argument("--host", default="", help="address to listen on (all)")
+    parser.add_argument("--port", type=int, default=8000, help="port to listen on (8000)")
+    parser.add_argument("--workers", type=int, help="worker processes (one per CPU)")
+    parser.add_argument("--watch", type=float, nargs="?", const=DEFAULT_INTERVAL,
+                        metavar="SECONDS",
+                        help="reload the data when its file changes, checking every "
+                             f"SECONDS ({DEFAULT_INTERVAL})")
+    args = parser.parse_args(arguments)
+
+    watcher = None
+    if args.watch is None:
+        weather_data = WeatherData()
+        weather_data.load(args.data)
+    else:
+        watcher = StationWatcher()
+        weather_data = watcher.add_station(args.data, args.data)
+    server = PreforkServer(AdvisabilityService(weather_data), (args.host, args.port),
+                           args.workers, watcher, args.watch or DEFAULT_INTERVAL)
+    print(f"Serving {ADVISABILITY_PATH} on port {args.port}")
+    server.serve()
+
+
+if __name__ == "__main__":
+    main()
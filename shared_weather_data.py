@@ -0,0 +1,252 @@
+"""
+    Weather data shared between processes through one block of shared memory.
+
+    SharedWeatherData: Read-only WeatherData whose days are held in shared
+                       memory, published once and attached to by name.
+
+    The owning process publishes the days as columns of doubles in a
+    multiprocessing.shared_memory block, followed by the totals of their
+    DayOfYearIndex. Worker processes attach to the block by name, which
+    maps the pages rather than copying or parsing them, so every worker
+    reads the same copy of the history and attaching costs the same however
+    long the history is. WeatherDataItem objects are only made for the
+    days that are read, and only the ITEM_CACHE_SIZE most recently read are
+    kept, so scanning the whole history doesn't give each worker its own
+    copy of it.
+"""
+
+__author__ = "Jinyuan Chen"
+__email__ = "jinyuan.chen@uqconnect.edu.au"
+
+from array import array
+from collections import OrderedDict
+from datetime import date
+from multiprocessing import shared_memory
+
+from weather_data import DAYS_IN_YEAR, DayOfYearIndex, WeatherDataItem
+
+# Values stored for each day, in the order WeatherDataItem takes them.
+# Wind directions are stored as positions in the block's table of
+# directions and dates as proleptic Gregorian ordinals, 0 if unknown.
+COLUMNS = ("rain", "high", "low", "sunshine", "humidity", "wind", "wind_max",
+           "wind_direction", "cloud", "pressure", "date")
+# Columns holding whole numbers.
+INTEGER_COLUMNS = ("humidity", "wind", "wind_max", "cloud")
+# Size of each stored value in bytes.
+_DOUBLE = 8
+# Values before the columns: the number of days, the size of the table of
+# wind directions, which follows the seasonal totals, and the version and
+# generation published.
+_HEADER = 4
+# Seasonal totals after the columns: the number of days recorded on each day
+# of the year then the totals of each of DayOfYearIndex.FIELDS.
+_SEASONAL = DAYS_IN_YEAR * (1 + len(DayOfYearIndex.FIELDS))
+# Separates the wind directions in the table.
+_SEPARATOR = "\0"
+# Number of WeatherDataItem objects kept for the days read most recently.
+ITEM_CACHE_SIZE = 1024
+
+
+def _open_block(name=None, size=0):
+    """Creates a shared memory block, or attaches to one if a name is given.
+
+    Blocks attached to are not tracked where Python allows it, so a
+    process that only reads a block never removes it when it exits.
+    """
+    if name is None:
+        return shared_memory.SharedMemory(create=True, size=size)
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python before 3.13, processes started by multiprocessing share
+        # their parent's tracker so still leave the block in place.
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedWeatherData(object):
+    """Read-only collection of weather data held in shared memory.
+
+    Supports the parts of WeatherData used by the prediction models, so it
+    can be used in place of WeatherData, but it cannot be loaded or
+    appended to.
+    """
+
+    def __init__(self, block, owner):
+        """Use publish or attach rather than creating these directly.
+
+        Parameters:
+            block (SharedMemory): Block holding the days.
+            owner (bool): Whether this object created the block.
+        """
+        self._block = block
+        self._owner = owner
+        with block.buf[:_DOUBLE * _HEADER] as header, header.cast("d") as values:
+            self._size = size = int(values[0])
+            table_size = int(values[1])
+            self._version = int(values[2])
+            self._generation = int(values[3])
+        seasonal = _HEADER + len(COLUMNS) * size
+        start = _DOUBLE * (seasonal + _SEASONAL)
+        self._values = block.buf[:start].toreadonly().cast("d")
+        self._columns = {column: self._values[_HEADER + position * size:
+                                              _HEADER + (position + 1) * size]
+                         for position, column in enumerate(COLUMNS)}
+        self._wind_directions = bytes(block.buf[start:start + table_size]).decode().split(_SEPARATOR)
+        # Position -> WeatherDataItem, least recently read first
+        self._items = OrderedDict()
+        totals = [self._values[seasonal + position * DAYS_IN_YEAR:
+                               seasonal + (position + 1) * DAYS_IN_YEAR]
+                  for position in range(1 + len(DayOfYearIndex.FIELDS))]
+        self._day_of_year_index = DayOfYearIndex.from_totals(
+            totals[0], dict(zip(DayOfYearIndex.FIELDS, totals[1:])))
+
+    @classmethod
+    def publish(cls, weather_data):
+        """Copies weather data into a new shared memory block.
+
+        The block stays in place until unlink is called on the returned
+        object, which should be done once no process needs it.
+
+        Parameters:
+            weather_data (WeatherData): Days to share, as they are when published.
+
+        Return:
+            (SharedWeatherData) Owner of the block, see get_name.
+        """
+        snapshot = weather_data.snapshot()
+        days = snapshot.get_data(snapshot.size()) if snapshot.size() else []
+        size = len(days)
+        wind_directions = sorted({day.get_wind_direction() for day in days})
+        positions = {direction: position for position, direction in enumerate(wind_directions)}
+        table = _SEPARATOR.join(wind_directions).encode()
+
+        seasonal = _HEADER + len(COLUMNS) * size
+        start = _DOUBLE * (seasonal + _SEASONAL)
+        block = _open_block(size=start + len(table))
+        values = block.buf[:start].cast("d")
+        try:
+            values[0] = size
+            values[1] = len(table)
+            values[2] = snapshot.get_version()
+            values[3] = snapshot.get_generation()
+            for position, column in enumerate(zip(*(_values(day, positions) for day in days))):
+                offset = _HEADER + position * size
+                values[offset:offset + size] = array("d", column)
+            counts, totals = snapshot.get_day_of_year_index().get_totals()
+            for position, column in enumerate([counts] + [totals[field]
+                                                          for field in DayOfYearIndex.FIELDS]):
+                offset = seasonal + position * DAYS_IN_YEAR
+                values[offset:offset + DAYS_IN_YEAR] = array("d", column)
+        finally:
+            values.release()
+        block.buf[start:start + len(table)] = table
+        return cls(block, True)
+
+    @classmethod
+    def attach(cls, name):
+        """Attaches to weather data published by another process.
+
+        Parameters:
+            name (str): Name of the block, from get_name.
+
+        Return:
+            (SharedWeatherData) Read-only view of the published days.
+        """
+        return cls(_open_block(name), False)
+
+    def get_name(self):
+        """(str) Name that other processes attach to the data with."""
+        return self._block.name
+
+    def get_day(self, position):
+        """Returns the weather for one day.
+
+        Parameters:
+            position (int): Day to return, 0 for the oldest day.
+
+        Return:
+            (WeatherDataItem) Weather recorded on the day.
+        """
+        item = self._items.get(position)
+        if item is not None:
+            self._items.move_to_end(position)
+        else:
+            values = {column: self._columns[column][position] for column in COLUMNS}
+            for column in INTEGER_COLUMNS:
+                values[column] = int(values[column])
+            ordinal = int(values["date"])
+            item = WeatherDataItem(values["rain"], values["high"], values["low"],
+                                   values["sunshine"], values["humidity"], values["wind"],
+                                   values["wind_max"],
+                                   self._wind_directions[int(values["wind_direction"])],
+                                   values["cloud"], values["pressure"],
+                                   date.fromordinal(ordinal) if ordinal else None)
+            self._items[position] = item
+            if len(self._items) > ITEM_CACHE_SIZE:
+                self._items.popitem(last=False)
+        return item
+
+    def get_data(self, number_days):
+        """Returns a specified number of days of weather data.
+
+        Parameters:
+            number_days (int): Number of days of data to retrieve,
+                               counting backwards from the most recent data item.
+
+        Pre-condition:
+            0 < number_days <= size()
+
+        Return:
+            [WeatherDataItem] List of WeatherDataItem objects,
+                              ordered from oldest to most recent.
+        """
+        return [self.get_day(position)
+                for position in range(max(self._size - number_days, 0), self._size)]
+
+    def get_day_of_year_index(self):
+        """(DayOfYearIndex) Seasonal totals of the published data."""
+        return self._day_of_year_index
+
+    def size(self):
+        """(int) Returns the number of days of weather data available."""
+        return self._size
+
+    def get_version(self):
+        """(int) Version of the WeatherData that was published."""
+        return self._version
+
+    def get_generation(self):
+        """(int) Generation of the WeatherData that was published."""
+        return self._generation
+
+    def snapshot(self):
+        """(SharedWeatherData) This data, which never changes."""
+        return self
+
+    def close(self):
+        """Stops using the data in this process, the block stays in place."""
+        self._columns = {}
+        self._values.release()
+        self._block.close()
+
+    def unlink(self):
+        """Closes the data and removes the block, so it can't be attached to.
+
+        Pre-condition:
+            This object published the data.
+        """
+        self.close()
+        if self._owner:
+            self._block.unlink()
+
+
+def _values(day, wind_directions):
+    """(tuple<float>) Values of a day in the order of COLUMNS, using the
+    positions of the wind directions in the table."""
+    recorded = day.get_date()
+    return (day.get_rainfall(), day.get_high_temperature(), day.get_low_temperature(),
+            day.get_sunshine_hours(), day.get_humidity(), day.get_average_wind_speed(),
+            day.get_maximum_wind_speed(), wind_directions[day.get_wind_direction()],
+            day.get_cloud_cover(), day.get_air_pressure(),
+            recorded.toordinal() if recorded is not None else 0)
+
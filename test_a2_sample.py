@@ -12,11 +12,31 @@ your program is working as outlined in the assignment sheet.
 __author__ = "Steven Summers"
 
 import inspect
+import os
+import sys
+import tempfile
+import threading
+
+from datetime import date
 
 from testrunner import (OrderedTestCase, TestMaster, RedirectStdIO,
                         AttributeGuesser, skipIfFailed)
 
-from weather_data import WeatherData, WeatherDataItem
+from weather_data import WeatherData, WeatherDataItem, day_of_year
+from model_registry import MODEL_REGISTRY, ModelRegistry, INCREMENTAL_UPDATE
+from ensemble import EnsembleForecast, EnsembleResult
+from server import AdvisabilityService
+from shared_weather_data import SharedWeatherData
+import ensemble
+import fleet_search
+import horizon
+import instrumentation
+import scenarios
+import shared_weather_data
+import vector_decision
+import weather_generator
+import weather_watcher
+from instrumentation import Instrumentation
 
 
 class TestA2(OrderedTestCase):
@@ -419,13 +439,789 @@ class TestUserInterface(TestA2):
         self.assertEqual(model.__class__.__name__, self.prediction.YesterdaysWeather.__name__)
 
 
+class TestModelRegistry(TestA2):
+    """ Note this class is not assessed """
+    def test_builtin_models(self):
+        """ test built-in models are registered in menu order """
+        self.assertEqual(MODEL_REGISTRY.get_names()[:3], ['yesterday', 'simple', 'sophisticated'])
+        self.assertIs(MODEL_REGISTRY.get('yesterday').get_uses_past_days(), False)
+        self.assertIs(MODEL_REGISTRY.get('simple').get_uses_past_days(), True)
+
+    def test_create(self):
+        """ test creating a registered model """
+        model = MODEL_REGISTRY.create('simple', self.data, 4)
+        self.assertEqual(model.__class__.__name__, 'SimplePrediction')
+        self.assertEqual(model.get_number_days(), 4)
+
+    def test_capabilities(self):
+        """ test declaring and selecting capabilities """
+        registry = ModelRegistry()
+        spec = registry.register('yesterday', self.prediction.YesterdaysWeather, "Yesterday's weather.")
+        self.assertIs(spec.supports(INCREMENTAL_UPDATE), False)
+        self.assertRaises(ValueError, spec.get_implementation, INCREMENTAL_UPDATE)
+        registry.add_capability('yesterday', INCREMENTAL_UPDATE)
+        self.assertEqual(registry.with_capability(INCREMENTAL_UPDATE), [spec])
+        self.assertRaises(ValueError, registry.get, 'unknown')
+
+    def test_get_prediction_model_with_days(self):
+        """ test selecting a model that uses past days """
+        ui = self.event_decision.UserInteraction()
+        with RedirectStdIO(stdinout=True) as stdio:
+            stdio.set_stdin("3\n10\n")
+            model = ui.get_prediction_model(self.data)
+
+        self.assertEqual(model.__class__.__name__, self.prediction.SophisticatedPrediction.__name__)
+        self.assertEqual(model.get_number_days(), 10)
+
+
+class TestOnlinePrediction(TestA2):
+    """ Note this class is not assessed """
+    METHODS = ('get_number_days', 'chance_of_rain', 'high_temperature', 'low_temperature',
+               'humidity', 'cloud_cover', 'wind_speed')
+
+    def assertSamePrediction(self, online, batch):
+        for method in self.METHODS:
+            self.aggregate(self.assertEqual, getattr(online, method)(), getattr(batch, method)(),
+                           tag=method)
+        self.aggregate_tests()
+
+    def test_online_simple_prediction(self):
+        """ test OnlineSimplePrediction matches SimplePrediction """
+        self.assertSamePrediction(self.prediction.OnlineSimplePrediction(self.data, 4),
+                                  self.prediction.SimplePrediction(self.data, 4))
+
+    def test_online_sophisticated_prediction(self):
+        """ test OnlineSophisticatedPrediction matches SophisticatedPrediction """
+        self.assertSamePrediction(self.prediction.OnlineSophisticatedPrediction(self.data, 10),
+                                  self.prediction.SophisticatedPrediction(self.data, 10))
+
+    def test_update(self):
+        """ test online predictions follow days appended to the weather data """
+        days = self.data.get_data(self.data.size())
+        weather_data = WeatherData()
+        for day in days[:-5]:
+            weather_data.append(day)
+        online = self.prediction.OnlineSophisticatedPrediction(weather_data, 7)
+        for day in days[-5:]:
+            weather_data.append(day)
+            online.update()
+
+        self.assertSamePrediction(online, self.prediction.SophisticatedPrediction(self.data, 7))
+
+    def test_sums_like_batch_models(self):
+        """ test window totals round after each day, oldest first, like the batch models """
+        weather_data = WeatherData()
+        for rain in (0.7, 0.1, 0.2, 0.3):
+            weather_data.append(WeatherDataItem(rain, 30, 20, 8, 40, 10, 20, 'N', 1, 1015))
+        window = self.prediction.OnlineSimplePrediction(weather_data, 3)._window
+        self.assertEqual(window.get_total('rain'), 0.1 + 0.2 + 0.3)
+        self.assertNotEqual(window.get_total('rain'), 0.6)
+        self.assertEqual(window.get_total('humidity'), 120)
+        online = self.prediction.OnlineSimplePrediction(weather_data, 2)
+        for rain in (0.1, 0.2):
+            weather_data.append(WeatherDataItem(rain, 30, 20, 8, 40, 10, 20, 'N', 1, 1015))
+            online.update()
+        self.assertSamePrediction(online, self.prediction.SimplePrediction(weather_data, 2))
+
+    def test_update_after_replace(self):
+        """ test incremental predictions start again when the days are replaced """
+        days = self.data.get_data(self.data.size())
+        weather_data = WeatherData()
+        weather_data.replace(days[:10])
+        predictions = [spec.create(weather_data, 3, INCREMENTAL_UPDATE)
+                       for spec in MODEL_REGISTRY.with_capability(INCREMENTAL_UPDATE)]
+        # Just as many days, so only the change of days can be noticed
+        weather_data.replace(days[-10:])
+        for prediction in predictions:
+            prediction.update()
+            fresh = type(prediction)(weather_data, 3)
+            for method in self.METHODS:
+                self.aggregate(self.assertEqual, getattr(prediction, method)(),
+                               getattr(fresh, method)(), tag=f'{type(prediction).__name__}.{method}')
+            self.aggregate(self.assertEqual, prediction.get_data_version(),
+                           weather_data.get_version(), tag='get_data_version')
+
+        self.aggregate_tests()
+
+    def test_registered_capability(self):
+        """ test online predictions are registered as incremental variants """
+        spec = MODEL_REGISTRY.get('simple')
+        self.assertIs(spec.supports(INCREMENTAL_UPDATE), True)
+        self.assertEqual(spec.get_implementation(INCREMENTAL_UPDATE).__name__, 'OnlineSimplePrediction')
+
+
+class TestSmoothedPrediction(TestA2):
+    """ Note this class is not assessed """
+    @staticmethod
+    def make_day(rain, high, low, recorded=None):
+        return WeatherDataItem(rain, high, low, 10, 60, 10, 20, "N", 4, 1015, recorded)
+
+    def test_exponential_prediction(self):
+        """ test ExponentialPrediction weights recent days """
+        weather_data = WeatherData()
+        weather_data.append(self.make_day(0, 30, 20))
+        ep = self.prediction.ExponentialPrediction(weather_data, 3)
+        self.aggregate(self.assertAlmostEqual, ep.high_temperature(), 30, tag='first day')
+
+        ep.push(self.make_day(4, 34, 16))
+        self.aggregate(self.assertEqual, ep.get_number_days(), 3, tag='get_number_days')
+        self.aggregate(self.assertAlmostEqual, ep.high_temperature(), 32, tag='high_temperature')
+        self.aggregate(self.assertAlmostEqual, ep.low_temperature(), 18, tag='low_temperature')
+        self.aggregate(self.assertEqual, ep.chance_of_rain(), 18, tag='chance_of_rain')
+        self.aggregate(self.assertEqual, ep.humidity(), 60, tag='humidity')
+
+        self.aggregate_tests()
+
+    def test_seasonal_prediction(self):
+        """ test SeasonalPrediction blends in the same season of earlier years """
+        weather_data = WeatherData()
+        weather_data.append(self.make_day(0, 40, 20, date(2018, 3, 5)))
+        weather_data.append(self.make_day(0, 10, 0, date(2018, 9, 1)))
+        weather_data.append(self.make_day(0, 20, 10, date(2019, 2, 28)))
+        sp = self.prediction.SeasonalPrediction(weather_data, 1)
+
+        # Recent average is the 2019 day alone, the season around 1 March
+        # in earlier years is 5 March 2018, 28 February 2019 being in the
+        # current season.
+        self.aggregate(self.assertAlmostEqual, sp.high_temperature(), 0.5 * 40 + 0.5 * 20,
+                       tag='high_temperature')
+
+        # Expected days are not added to the seasons of earlier years
+        sp.push(sp.next_day())
+        self.aggregate(self.assertAlmostEqual, sp.low_temperature(), 0.5 * 20 + 0.5 * 15,
+                       tag='push')
+
+        self.aggregate_tests()
+
+    def test_seasonal_prediction_without_dates(self):
+        """ test SeasonalPrediction without dates matches ExponentialPrediction """
+        weather_data = WeatherData()
+        weather_data.append(self.make_day(1, 30, 20))
+        weather_data.append(self.make_day(3, 24, 12))
+        sp = self.prediction.SeasonalPrediction(weather_data, 2)
+        ep = self.prediction.ExponentialPrediction(weather_data, 2)
+        self.assertAlmostEqual(sp.high_temperature(), ep.high_temperature())
+
+
+class TestDayOfYearIndex(TestA2):
+    """ Note this class is not assessed """
+    def test_loaded_index(self):
+        """ test seasonal averages of the loaded weather data """
+        index = self.data.get_day_of_year_index()
+        self.aggregate(self.assertEqual, index.get_count(date(2020, 2, 10)), 15, tag='get_count')
+        self.aggregate(self.assertAlmostEqual, index.get_average('high', date(2020, 2, 10), 0), 32.8,
+                       tag='get_average')
+        self.aggregate(self.assertIsNone, index.get_average('rain', date(2020, 7, 1)), tag='no data')
+
+        self.aggregate_tests()
+
+    def test_wraps_around_year(self):
+        """ test seasons spanning the new year """
+        weather_data = WeatherData()
+        weather_data.append(WeatherDataItem(2, 30, 20, 10, 60, 10, 20, "N", 4, 1015, date(2018, 12, 30)))
+        weather_data.append(WeatherDataItem(4, 30, 20, 10, 60, 10, 20, "N", 4, 1015, date(2019, 1, 2)))
+        index = weather_data.get_day_of_year_index()
+
+        self.aggregate(self.assertEqual, index.get_count(date(2019, 1, 1), 2), 2, tag='get_count')
+        self.aggregate(self.assertAlmostEqual, index.get_average('rain', date(2019, 1, 1), 2), 3,
+                       tag='get_average')
+        self.aggregate(self.assertAlmostEqual, index.get_average('rain', date(2019, 12, 31), 1), 2,
+                       tag='get_average')
+
+        self.aggregate_tests()
+
+    def test_extended_index(self):
+        """ test adding days leaves an index that was already read unchanged """
+        weather_data = WeatherData()
+        weather_data.append(WeatherDataItem(2, 30, 20, 10, 60, 10, 20, "N", 4, 1015, date(2018, 3, 1)))
+        before = weather_data.get_day_of_year_index()
+        self.aggregate(self.assertEqual, before.get_average('rain', date(2019, 3, 2)), 2, tag='before')
+        weather_data.append(WeatherDataItem(6, 30, 20, 10, 60, 10, 20, "N", 4, 1015, date(2019, 3, 3)))
+        weather_data.append(WeatherDataItem(1, 30, 20, 10, 60, 10, 20, "N", 4, 1015, date(2019, 9, 3)))
+        after = weather_data.get_day_of_year_index()
+
+        self.aggregate(self.assertEqual, before.get_average('rain', date(2019, 3, 2)), 2, tag='before')
+        self.aggregate(self.assertEqual, before.get_count(date(2019, 9, 3)), 0, tag='before')
+        self.aggregate(self.assertEqual, after.get_average('rain', date(2019, 3, 2)), 4, tag='after')
+        self.aggregate(self.assertEqual, after.get_totals()[0][day_of_year(date(2019, 9, 3))], 1,
+                       tag='get_totals')
+
+        self.aggregate_tests()
+
+
+class TestWeatherDataVersions(TestA2):
+    """ Note this class is not assessed """
+    def test_snapshot(self):
+        """ test snapshots are not changed by later appends and loads """
+        weather_data = WeatherData()
+        days = self.data.get_data(self.data.size())
+        for day in days[:5]:
+            weather_data.append(day)
+        snapshot = weather_data.snapshot()
+        prediction = self.prediction.SimplePrediction(weather_data, 3)
+        weather_data.append(days[5])
+
+        self.aggregate(self.assertEqual, snapshot.get_version(), 5, tag='get_version')
+        self.aggregate(self.assertEqual, weather_data.get_version(), 6, tag='get_version')
+        self.aggregate(self.assertEqual, snapshot.size(), 5, tag='size')
+        self.aggregate(self.assertEqual, snapshot.get_data(2), days[3:5], tag='get_data')
+        self.aggregate(self.assertEqual, prediction.get_data_version(), 5, tag='get_data_version')
+
+        weather_data.load('weather_data.csv')
+        self.aggregate(self.assertEqual, weather_data.get_version(), 7, tag='load')
+        self.aggregate(self.assertEqual, snapshot.get_data(5), days[:5], tag='load')
+
+        self.aggregate_tests()
+
+    def test_prediction_reads_one_version(self):
+        """ test predictions use the days of the version they record """
+        days = self.data.get_data(self.data.size())
+
+        class AppendedWhileRead(WeatherData):
+            # Another day arrives after each look at the data
+            def snapshot(self):
+                snapshot = super().snapshot()
+                self.append(days[self.size()])
+                return snapshot
+
+            def get_version(self):
+                version = super().get_version()
+                self.append(days[self.size()])
+                return version
+
+        for model in ('YesterdaysWeather', 'SimplePrediction', 'SophisticatedPrediction'):
+            weather_data = AppendedWhileRead()
+            weather_data.extend(days[:10])
+            prediction = (getattr(self.prediction, model)(weather_data) if model == 'YesterdaysWeather'
+                          else getattr(self.prediction, model)(weather_data, 3))
+            self.aggregate(self.assertEqual, prediction.get_data_version(), 1, tag=model)
+            reference = WeatherData()
+            reference.extend(days[:10])
+            reference = (getattr(self.prediction, model)(reference) if model == 'YesterdaysWeather'
+                         else getattr(self.prediction, model)(reference, 3))
+            for method in TestOnlinePrediction.METHODS[1:]:
+                self.aggregate(self.assertEqual, getattr(prediction, method)(),
+                               getattr(reference, method)(), tag=f'{model}.{method}')
+
+        self.aggregate_tests()
+
+    def test_read_during_load(self):
+        """ test readers never see a partly loaded list of days """
+        weather_data = WeatherData()
+        weather_data.load('weather_data.csv')
+        size = weather_data.size()
+        sizes = set()
+        done = threading.Event()
+
+        def read():
+            while not done.is_set():
+                sizes.add(len(weather_data.get_data(size)))
+                sizes.add(weather_data.snapshot().size())
+
+        # Switch threads as often as possible to interleave reads with loads
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        reader = threading.Thread(target=read)
+        reader.start()
+        try:
+            for _ in range(50):
+                weather_data.load('weather_data.csv')
+        finally:
+            done.set()
+            reader.join()
+            sys.setswitchinterval(switch_interval)
+
+        self.assertEqual(sizes, {size})
+
+    def test_read_index_during_appends(self):
+        """ test seasonal averages can be read while days are appended """
+        days = self.data.get_data(self.data.size())
+        weather_data = WeatherData()
+        mismatches = []
+        errors = []
+        done = threading.Event()
+
+        def read():
+            try:
+                while not done.is_set():
+                    snapshot = weather_data.snapshot()
+                    index = snapshot.get_day_of_year_index()
+                    # Every day is dated, so the whole year counts every day
+                    if index.get_count(date(2020, 1, 1), 183) != snapshot.size():
+                        mismatches.append(snapshot.get_version())
+                    index.get_average('rain', date(2020, 2, 10))
+            except Exception as error:
+                errors.append(error)
+
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        readers = [threading.Thread(target=read) for _ in range(2)]
+        for reader in readers:
+            reader.start()
+        try:
+            for _ in range(20):
+                for day in days:
+                    weather_data.append(day)
+        finally:
+            done.set()
+            for reader in readers:
+                reader.join()
+            sys.setswitchinterval(switch_interval)
+
+        self.aggregate(self.assertEqual, errors, [], tag='errors')
+        self.aggregate(self.assertEqual, mismatches, [], tag='get_count')
+        self.aggregate(self.assertEqual, weather_data.get_day_of_year_index().get_count(
+            date(2020, 1, 1), 183), 20 * len(days), tag='get_count')
+
+        self.aggregate_tests()
+
+
+class TestWeatherWatcher(TestA2):
+    """ Note this class is not assessed """
+    def test_poll(self):
+        """ test appended rows are read on their own and rewrites reload the file """
+        with open('weather_data.csv') as weather_file:
+            lines = weather_file.readlines()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'station.csv')
+            with open(path, 'w') as weather_file:
+                weather_file.writelines(lines[:10])
+            stations = weather_watcher.StationWatcher()
+            weather_data = stations.add_station('station', path)
+            cache = weather_watcher.PredictionCache(stations)
+            prediction = cache.get('station', 'simple', 3)
+
+            self.aggregate(self.assertEqual, stations.poll(), {}, tag='unchanged')
+            # The last line is still being written
+            with open(path, 'a') as weather_file:
+                weather_file.writelines(lines[10:15])
+                weather_file.write(lines[15][:5])
+            self.aggregate(self.assertEqual, stations.poll(), {'station': weather_watcher.APPENDED},
+                           tag='appended')
+            self.aggregate(self.assertEqual, weather_data.size(), 14, tag='size')
+            self.aggregate(self.assertIsNot, cache.get('station', 'simple', 3), prediction,
+                           tag='invalidated')
+            with open(path, 'a') as weather_file:
+                weather_file.write(lines[15][5:])
+            stations.poll()
+            self.aggregate(self.assertEqual, [str(day) for day in weather_data.get_data(15)],
+                           [str(day) for day in self.data.get_data(self.data.size())[:15]],
+                           tag='get_data')
+
+            with open(path, 'w') as weather_file:
+                weather_file.writelines(lines[:1] + lines[20:])
+            self.aggregate(self.assertEqual, stations.poll(), {'station': weather_watcher.RELOADED},
+                           tag='reloaded')
+            self.aggregate(self.assertEqual, weather_data.size(), len(lines) - 20, tag='size')
+
+        self.aggregate_tests()
+
+
+class TestSharedWeatherData(TestA2):
+    """ Note this class is not assessed """
+    def test_attach(self):
+        """ test data attached to by name matches the published data """
+        published = SharedWeatherData.publish(self.data)
+        attached = SharedWeatherData.attach(published.get_name())
+        try:
+            expected = self.data.get_data(self.data.size())
+            days = attached.get_data(attached.size())
+            self.aggregate(self.assertEqual, attached.size(), self.data.size(), tag='size')
+            self.aggregate(self.assertEqual, [str(day) for day in days],
+                           [str(day) for day in expected], tag='get_data')
+            self.aggregate(self.assertEqual, [day.get_date() for day in days],
+                           [day.get_date() for day in expected], tag='get_date')
+            self.aggregate(self.assertEqual,
+                           self.prediction.SophisticatedPrediction(attached, 7).chance_of_rain(),
+                           self.prediction.SophisticatedPrediction(self.data, 7).chance_of_rain(),
+                           tag='prediction')
+            index = self.data.get_day_of_year_index()
+            self.aggregate(self.assertEqual,
+                           attached.get_day_of_year_index().get_count(date(2020, 2, 10)),
+                           index.get_count(date(2020, 2, 10)), tag='get_day_of_year_index')
+            self.aggregate(self.assertEqual,
+                           attached.get_day_of_year_index().get_average('high', date(2020, 2, 10)),
+                           index.get_average('high', date(2020, 2, 10)), tag='get_day_of_year_index')
+        finally:
+            attached.close()
+            published.unlink()
+
+        self.aggregate_tests()
+
+    def test_items_not_all_kept(self):
+        """ test reading the whole history keeps only the most recently read days """
+        cache_size = shared_weather_data.ITEM_CACHE_SIZE
+        shared_weather_data.ITEM_CACHE_SIZE = 5
+        published = SharedWeatherData.publish(self.data)
+        try:
+            days = published.get_data(published.size())
+            latest = published.get_day(published.size() - 1)
+            self.aggregate(self.assertEqual, len(published._items), 5, tag='kept')
+            self.aggregate(self.assertIs, published.get_day(published.size() - 1), latest,
+                           tag='reused')
+            self.aggregate(self.assertEqual, [str(day) for day in days],
+                           [str(day) for day in self.data.get_data(self.data.size())], tag='get_data')
+        finally:
+            shared_weather_data.ITEM_CACHE_SIZE = cache_size
+            published.unlink()
+
+        self.aggregate_tests()
+
+
+class TestEnsemble(TestA2):
+    """ Note this class is not assessed """
+    def test_deterministic(self):
+        """ test ensemble forecasts are reproducible from the seed """
+        event = self.event_decision.Event('My Event', True, False, 13)
+        first = EnsembleForecast(self.data, event, 5, resamples=300, seed=7, processes=1).run()
+        second = EnsembleForecast(self.data, event, 5, resamples=300, seed=7, processes=1).run()
+
+        self.assertEqual(first.size(), 300)
+        self.assertEqual(first.get_advisabilities(), second.get_advisabilities())
+        low, middle, high = (first.percentile(p) for p in (10, 50, 90))
+        self.assertTrue(-5 <= low <= middle <= high <= 5)
+
+    def test_vectorised_matches_models(self):
+        """ test the NumPy forecast is reproducible and agrees with the model classes """
+        if ensemble.np is None:
+            self.skipTest('NumPy is not installed')
+        event = self.event_decision.Event('My Event', True, False, 13)
+        for past_n_days in (1, 7, 30):
+            vectorised = EnsembleForecast(self.data, event, past_n_days, resamples=600,
+                                          seed=3).run()
+            numpy, ensemble.np = ensemble.np, None
+            try:
+                models = EnsembleForecast(self.data, event, past_n_days, resamples=600,
+                                          seed=3, processes=1).run()
+            finally:
+                ensemble.np = numpy
+            for percent in (10, 50, 90):
+                self.aggregate(self.assertAlmostEqual, vectorised.percentile(percent),
+                               models.percentile(percent), delta=ensemble.PERCENTILE_TOLERANCE,
+                               tag=f'past_n_days={past_n_days} percentile={percent}')
+            again = EnsembleForecast(self.data, event, past_n_days, resamples=600, seed=3).run()
+            self.aggregate(self.assertEqual, vectorised.get_advisabilities(),
+                           again.get_advisabilities(), tag=f'past_n_days={past_n_days} seed')
+
+        self.aggregate_tests()
+
+    def test_percentiles(self):
+        """ test interpolated percentiles """
+        result = EnsembleResult([4, 1, 3, 2, 5])
+        self.assertEqual(result.percentiles((0, 50, 90, 100)), {0: 1, 50: 3, 90: 4.6, 100: 5})
+
+
+class TestStartTimes(TestA2):
+    """ Note this class is not assessed """
+    def test_rank_start_times(self):
+        """ test ranking every start hour of an event """
+        prediction = self.prediction.FixedPrediction(10, 32, 3, 50, 2, 12)
+        event = self.event_decision.Event('My Event', True, False, 13)
+        ranked = self.event_decision.EventDecision(event, prediction).rank_start_times()
+
+        self.aggregate(self.assertEqual, sorted(option.time for option in ranked), list(range(24)),
+                       tag='hours')
+        # A hot day (-0.4) is better than a cold night (-0.5), earliest hours first
+        self.aggregate(self.assertEqual, ranked[0].time, 6, tag='best time')
+        self.aggregate(self.assertAlmostEqual, ranked[0].advisability, 1.6, tag='best advisability')
+        self.aggregate(self.assertEqual, ranked[-1], (1.5, 23, True, False), tag='worst')
+        self.aggregate(self.assertEqual, ranked,
+                       self.event_decision.rank_start_times(prediction, (True,), (False,)),
+                       tag='rank_start_times')
+
+        self.aggregate_tests()
+
+
+class TestExplain(TestA2):
+    """ Note this class is not assessed """
+    def test_explain(self):
+        """ test the breakdown of an advisability """
+        prediction = self.prediction.FixedPrediction(10, 32, 3, 50, 2, 12)
+        event = self.event_decision.Event('My Event', True, False, 13)
+        decision = self.event_decision.EventDecision(event, prediction)
+        explanation = decision.explain()
+
+        self.aggregate(self.assertEqual, explanation.advisability, decision.advisability(),
+                       tag='advisability')
+        self.aggregate(self.assertAlmostEqual, explanation.temperature_factor, -0.4,
+                       tag='temperature_factor')
+        self.aggregate(self.assertEqual, explanation.temperature_rule, 'hot_outdoors',
+                       tag='temperature_rule')
+        self.aggregate(self.assertFalse, explanation.temperature_mitigated, tag='temperature_mitigated')
+        self.aggregate(self.assertEqual, explanation.rain_factor, 2.0, tag='rain_factor')
+        self.aggregate(self.assertEqual, explanation.rain_rule, 'low_chance', tag='rain_rule')
+        self.aggregate(self.assertEqual, explanation.rain_adjustment, 'none', tag='rain_adjustment')
+
+        self.aggregate_tests()
+
+
+class TestHorizon(TestA2):
+    """ Note this class is not assessed """
+    def test_first_day_matches_model(self):
+        """ test the first day of a forecast is the model's prediction """
+        forecast = horizon.forecast('sophisticated', self.data, 7, 14)
+        model = MODEL_REGISTRY.create('sophisticated', self.data, 7)
+        values = forecast.get_values(0)
+
+        self.aggregate(self.assertEqual, forecast.get_number_days(), 14, tag='get_number_days')
+        self.aggregate(self.assertEqual, forecast.get_date(0), date(2019, 3, 1), tag='get_date')
+        for field in horizon.FIELDS:
+            self.aggregate(self.assertAlmostEqual, values[field], getattr(model, field)(), tag=field)
+
+        self.aggregate_tests()
+
+    def test_roll_forward(self):
+        """ test rolling a model forward leaves the model unchanged """
+        model = MODEL_REGISTRY.create('simple', self.data, 3, INCREMENTAL_UPDATE)
+        high_temperature = model.high_temperature()
+        forecast = horizon.roll_forward(model, 5)
+        event = self.event_decision.Event('My Event', True, False, 13)
+
+        self.aggregate(self.assertEqual, model.high_temperature(), high_temperature, tag='model')
+        self.aggregate(self.assertEqual, len(forecast.advisabilities(event)), 5, tag='advisabilities')
+        self.aggregate(self.assertEqual, len(forecast.to_columns()['humidity']), 5, tag='to_columns')
+
+        self.aggregate_tests()
+
+    def test_predictions_fed_back(self):
+        """ test each later day follows the model's own predictions for the day before """
+        for name in ('simple', 'sophisticated', 'exponential', 'seasonal'):
+            model = MODEL_REGISTRY.create(name, self.data, 7, INCREMENTAL_UPDATE)
+            expected = model.next_day()
+            for field, getter in (('high_temperature', 'get_high_temperature'),
+                                  ('low_temperature', 'get_low_temperature'),
+                                  ('humidity', 'get_humidity'), ('cloud_cover', 'get_cloud_cover'),
+                                  ('wind_speed', 'get_average_wind_speed')):
+                self.aggregate(self.assertEqual, getattr(expected, getter)(), getattr(model, field)(),
+                               tag=f'{name}.{field}')
+            model.push(expected)
+            forecast = horizon.forecast(name, self.data, 7, 2)
+            for field in horizon.FIELDS:
+                self.aggregate(self.assertAlmostEqual, forecast.get_values(1)[field],
+                               getattr(model, field)(), tag=f'{name} day 1 {field}')
+
+        self.aggregate_tests()
+
+
+class TestFleetSearch(TestA2):
+    """ Note this class is not assessed """
+    def test_top_k(self):
+        """ test finding the best stations, days and hours """
+        forecasts = {'here': horizon.forecast('simple', self.data, 7, 3),
+                     'there': horizon.forecast('sophisticated', self.data, 7, 3)}
+        event = self.event_decision.Event('My Event', True, False, 13)
+        best = fleet_search.top_k(event, forecasts, 5)
+
+        self.aggregate(self.assertEqual, len(best), 5, tag='k')
+        self.aggregate(self.assertEqual, [result[0] for result in best],
+                       sorted((result[0] for result in best), reverse=True), tag='order')
+        advisability, station, day, hour = best[0]
+        prediction = forecasts[station].get_prediction(day)
+        self.aggregate(self.assertEqual, advisability, self.event_decision.EventDecision(
+            self.event_decision.Event('My Event', True, False, hour), prediction).advisability(),
+                       tag='advisability')
+
+        self.aggregate_tests()
+
+
+class TestScenarios(TestA2):
+    """ Note this class is not assessed """
+    def test_grid(self):
+        """ test sweeping predicted values and their sensitivities """
+        if vector_decision.np is None:
+            self.skipTest('NumPy is not installed')
+        event = self.event_decision.Event('My Event', True, False, 13)
+        base = self.prediction.FixedPrediction(10, 32, 18, 50, 2, 12)
+        grid = scenarios.ScenarioGrid(event, base, [('high_temperature', [30, 32, 34, 36]),
+                                                    ('humidity', [50, 80])])
+        result = grid.run()
+
+        self.aggregate(self.assertEqual, result.get_shape(), (4, 2), tag='get_shape')
+        prediction = self.prediction.FixedPrediction(10, 34, 18, 80, 2, 12)
+        self.aggregate(self.assertEqual, result.get_advisability()[2, 1],
+                       self.event_decision.EventDecision(event, prediction).advisability(),
+                       tag='get_advisability')
+        # Hot days outdoors lose 0.2 per degree
+        self.aggregate(self.assertAlmostEqual, result.sensitivity('high_temperature')[1, 0], -0.2,
+                       tag='sensitivity')
+        self.aggregate(self.assertRaises, ValueError, scenarios.ScenarioGrid, event, base,
+                       [('pressure', [1000])], tag='unknown field')
+
+        self.aggregate_tests()
+
+
+class TestAdvisabilityService(TestA2):
+    """ Note this class is not assessed """
+    def test_advisability(self):
+        """ test answering queries from predictions made once """
+        service = AdvisabilityService(self.data)
+        service.warm((7,))
+        query = {'name': 'Picnic', 'outdoors': 'yes', 'cover': 'no', 'time': '13',
+                 'model': 'sophisticated', 'days': '7'}
+        answer = service.advisability(query)
+        prediction = MODEL_REGISTRY.create('sophisticated', self.data, 7)
+        event = self.event_decision.Event('Picnic', True, False, 13)
+
+        self.aggregate(self.assertAlmostEqual, answer['advisability'],
+                       self.event_decision.EventDecision(event, prediction).advisability(),
+                       tag='advisability')
+        self.aggregate(self.assertIs, service.get_prediction('sophisticated', 7),
+                       service.get_prediction('sophisticated', 7), tag='get_prediction')
+        self.aggregate(self.assertRaises, ValueError, service.advisability,
+                       dict(query, time='24'), tag='invalid time')
+        self.aggregate(self.assertRaises, ValueError, service.advisability,
+                       dict(query, model='unknown'), tag='unknown model')
+
+        self.aggregate_tests()
+
+
+class TestInstrumentation(TestA2):
+    """ Note this class is not assessed """
+    def test_enable_and_disable(self):
+        """ test instrumented calls are recorded only while enabled """
+        get_data = WeatherData.get_data
+        recorder = Instrumentation()
+        instrumentation.enable(recorder)
+        try:
+            self.aggregate(self.assertIs, instrumentation.is_enabled(), True, tag='is_enabled')
+            model = MODEL_REGISTRY.create('simple', self.data, 4)
+            model.humidity()
+            model.humidity()
+        finally:
+            instrumentation.disable()
+        model.humidity()
+
+        name = type(model).__name__
+        self.aggregate(self.assertEqual, recorder.get_calls(f'{name}.__init__'), 1, tag='__init__')
+        self.aggregate(self.assertEqual, recorder.get_calls(f'{name}.humidity'), 2, tag='humidity')
+        self.aggregate(self.assertEqual, recorder.get_counter(f'rows_scanned:{name}.__init__'), 4,
+                       tag='rows_scanned')
+        self.aggregate(self.assertIs, WeatherData.get_data, get_data, tag='disable')
+
+        self.aggregate_tests()
+
+    def test_rows_scanned(self):
+        """ test rows read through snapshots are counted once, by the method asking """
+        days = self.data.get_data(self.data.size())
+        weather_data = WeatherData()
+        weather_data.extend(days[:10])
+        recorder = Instrumentation()
+        instrumentation.enable(recorder)
+        try:
+            online = MODEL_REGISTRY.create('simple', weather_data, 4, INCREMENTAL_UPDATE)
+            seasonal = MODEL_REGISTRY.create('seasonal', weather_data, 4)
+            weather_data.extend(days[10:13])
+            online.update()
+            seasonal.push(days[13])
+        finally:
+            instrumentation.disable()
+
+        name = type(online).__name__
+        self.aggregate(self.assertEqual, recorder.get_counter(f'rows_scanned:{name}.__init__'), 4,
+                       tag='__init__')
+        self.aggregate(self.assertEqual, recorder.get_counter(f'rows_scanned:{name}.update'), 3,
+                       tag='update')
+        # The 10 days started from and the one pushed
+        self.aggregate(self.assertEqual, recorder.get_calls('SeasonalPrediction.push'), 11, tag='push')
+        self.aggregate(self.assertEqual, recorder.get_calls('ExponentialPrediction.push'), 0,
+                       tag='super().push')
+
+        self.aggregate_tests()
+
+
+class TestWeatherGenerator(TestA2):
+    """ Note this class is not assessed """
+    def test_days(self):
+        """ test generated days are reproducible, consecutive and plausible """
+        days = list(weather_generator.WeatherGenerator(5).days(400))
+        self.aggregate(self.assertEqual, days, list(weather_generator.WeatherGenerator(5).days(400)),
+                       tag='seed')
+        self.aggregate(self.assertEqual, [day[0] for day in days],
+                       [date.fromordinal(weather_generator.DEFAULT_START.toordinal() + position)
+                        for position in range(400)], tag='dates')
+        self.aggregate(self.assertTrue, all(day[3] >= 0 and 0 <= day[4] <= 13.5 and 10 <= day[5] <= 100
+                                            and 0 <= day[6] <= 9 for day in days), tag='values')
+        self.aggregate(self.assertEqual, [day for day in days if day[2] < day[1]], [],
+                       tag='high below low')
+
+        self.aggregate_tests()
+
+    def test_dates_wrap(self):
+        """ test dates start again instead of passing the year 9999 """
+        days = weather_generator.WeatherGenerator(0, date(9999, 12, 30)).days(5)
+        self.assertEqual([day[0] for day in days],
+                         [date(9999, 12, 30), date(9999, 12, 31), date(9999, 12, 30),
+                          date(9999, 12, 31), date(9999, 12, 30)])
+
+    def test_write_csv(self):
+        """ test written CSV files load as the generated days """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'weather.csv')
+            weather_generator.write_csv(path, 30, seed=2)
+            weather_data = WeatherData()
+            weather_data.load(path)
+
+        expected = list(weather_generator.WeatherGenerator(2).days(30))
+        days = weather_data.get_data(weather_data.size())
+        self.aggregate(self.assertEqual, weather_data.size(), 30, tag='size')
+        self.aggregate(self.assertEqual,
+                       [(day.get_date(), day.get_low_temperature(), day.get_high_temperature(),
+                         day.get_rainfall(), day.get_sunshine_hours(), day.get_humidity(),
+                         day.get_cloud_cover(), day.get_wind_direction(),
+                         day.get_average_wind_speed(), day.get_maximum_wind_speed(),
+                         day.get_air_pressure()) for day in days],
+                       expected, tag='rows')
+
+        self.aggregate_tests()
+
+    def test_write_columnar(self):
+        """ test columns written in several chunks read back as the generated days """
+        chunk_days = weather_generator.CHUNK_DAYS
+        weather_generator.CHUNK_DAYS = 7
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                weather_generator.write_columnar(directory, 30, seed=2)
+                columns = weather_generator.read_columns(directory)
+        finally:
+            weather_generator.CHUNK_DAYS = chunk_days
+
+        expected = list(weather_generator.WeatherGenerator(2).days(30))
+        self.aggregate(self.assertEqual, list(columns), list(weather_generator.CSV_HEADER),
+                       tag='columns')
+        self.aggregate(self.assertEqual, list(columns['Date']),
+                       [day[0].toordinal() for day in expected], tag='Date')
+        self.aggregate(self.assertEqual,
+                       [weather_generator.DIRECTIONS[code] for code in columns['Wind Direction']],
+                       [day[7] for day in expected], tag='Wind Direction')
+        self.aggregate(self.assertEqual, list(columns['MSL Pressure (hPa)']),
+                       [day[10] for day in expected], tag='MSL Pressure (hPa)')
+
+        self.aggregate_tests()
+
+
 def main():
     test_cases = [
         TestDesign,
         TestFunctionality,
         TestHighTempEdgeCases,
         TestEventDecisionEdgeCases,
-        TestUserInterface
+        TestUserInterface,
+        TestModelRegistry,
+        TestOnlinePrediction,
+        TestSmoothedPrediction,
+        TestDayOfYearIndex,
+        TestWeatherDataVersions,
+        TestWeatherWatcher,
+        TestSharedWeatherData,
+        TestEnsemble,
+        TestStartTimes,
+        TestExplain,
+        TestHorizon,
+        TestFleetSearch,
+        TestScenarios,
+        TestAdvisabilityService,
+        TestInstrumentation,
+        TestWeatherGenerator,
     ]
 
     master = TestMaster(max_diff=None,
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+
+"""
+Differential tests of the optimised prediction engines against the
+reference models they replace, over randomly generated weather.
+
+Each registered model with an INCREMENTAL_UPDATE implementation is built
+from part of a random history and then fed the remaining days one at a
+time. After every day its predictions, and the advisability of random
+events, must equal those of the registered model built from scratch.
+The start time and fleet searches, and the NumPy form of the rules, are
+checked against EventDecision for every hour.
+
+Values have one decimal place, like those in weather_data.csv, so most
+sums of them are rounded, and the engines must still agree exactly. Days
+are made a batch at a time from columns of random values.
+
+Set DIFFERENTIAL_SEED to reproduce a failure and DIFFERENTIAL_CASES to
+change the number of days checked for each model.
+
+    DIFFERENTIAL_SEED=3 DIFFERENTIAL_CASES=100000 python test_differential.py
+"""
+
+__author__ = "Jinyuan Chen"
+
+import os
+import random
+from datetime import date, timedelta
+
+from testrunner import OrderedTestCase, TestMaster
+
+import fleet_search
+import horizon
+import vector_decision
+from event_decision import (Event, EventDecision, RAIN_ADJUSTMENTS, RAIN_RULES, TEMPERATURE_RULES,
+                            rank_start_times)
+from model_registry import MODEL_REGISTRY, INCREMENTAL_UPDATE
+from prediction import ExponentialPrediction, FixedPrediction
+from weather_data import WeatherData, WeatherDataItem
+
+SEED = int(os.environ.get('DIFFERENTIAL_SEED', 0))
+CASES = int(os.environ.get('DIFFERENTIAL_CASES', 2_000))
+# Largest past_n_days of a generated model
+MAX_PAST_DAYS = 30
+# Random events scored after every day
+EVENTS_PER_DAY = 4
+PREDICTIONS = ('get_number_days', 'chance_of_rain', 'high_temperature', 'low_temperature',
+               'humidity', 'cloud_cover', 'wind_speed')
+
+DIRECTIONS = ('N', 'NNE', 'NE', 'ENE', 'E', 'ESE', 'SE', 'SSE',
+              'S', 'SSW', 'SW', 'WSW', 'W', 'WNW', 'NW', 'NNW', '')
+# Mostly dry days, then light to very heavy rain
+RAIN_VALUES = [0.0] * 200 + [value / 10 for value in range(1, 601)]
+SUNSHINE_VALUES = [value / 10 for value in range(0, 141)]
+PRESSURE_VALUES = [value / 10 for value in range(9900, 10351)]
+
+
+def random_days(generator, number_days, start):
+    """
+    Days of random weather, generated a column at a time.
+
+    Parameters:
+        generator (random.Random): Source of the random values.
+        number_days (int): Number of days to make.
+        start (datetime.date): Date of the first day.
+
+    Return:
+        [WeatherDataItem] Days ordered from oldest to most recent.
+    """
+    choices, randrange = generator.choices, generator.randrange
+    rain = choices(RAIN_VALUES, k=number_days)
+    low = [randrange(-50, 300) / 10 for _ in range(number_days)]
+    spread = [randrange(0, 200) / 10 for _ in range(number_days)]
+    sunshine = choices(SUNSHINE_VALUES, k=number_days)
+    humidity = [randrange(5, 101) for _ in range(number_days)]
+    wind = [randrange(0, 40) for _ in range(number_days)]
+    gust = [randrange(0, 120) for _ in range(number_days)]
+    direction = choices(DIRECTIONS, k=number_days)
+    cloud = [randrange(0, 10) for _ in range(number_days)]
+    pressure = choices(PRESSURE_VALUES, k=number_days)
+
+    return [WeatherDataItem(rain[i], low[i] + spread[i], low[i], sunshine[i], humidity[i],
+                            wind[i], wind[i] + gust[i], direction[i], cloud[i], pressure[i],
+                            start + timedelta(days=i))
+            for i in range(number_days)]
+
+
+def random_events(generator, number_events):
+    """ [Event] Events at random hours, outdoors or not and with or without cover """
+    return [Event(f'Event {i}', generator.random() < 0.5, generator.random() < 0.5,
+                  generator.randrange(24))
+            for i in range(number_events)]
+
+
+class TestIncrementalModels(OrderedTestCase):
+    """ Incremental implementations must match the registered models exactly """
+
+    def check_model(self, spec, seed):
+        """
+        Feed a random history to the incremental implementation of spec a day
+        at a time, comparing it with spec's model built on each day's data.
+        """
+        generator = random.Random(f'{SEED}:{spec.get_name()}:{seed}')
+        past_n_days = generator.randint(1, MAX_PAST_DAYS)
+        # Exponentially weighted models only start from the latest
+        # WARMUP_SPANS * past_n_days days when built from scratch
+        history = generator.randint(1, ExponentialPrediction.WARMUP_SPANS * past_n_days)
+        days = random_days(generator, history, date(2000, 1, 1) + timedelta(generator.randrange(366)))
+        events = random_events(generator, EVENTS_PER_DAY)
+        first_days = generator.randint(1, history)
+
+        weather_data = WeatherData()
+        weather_data.extend(days[:first_days])
+        fast = spec.create(weather_data, past_n_days, INCREMENTAL_UPDATE)
+
+        for number_days in range(first_days, history + 1):
+            if number_days > first_days:
+                weather_data.append(days[number_days - 1])
+                fast.update()
+            reference = spec.create(weather_data, past_n_days)
+            case = f'{spec.get_name()} seed={SEED}:{seed} n={past_n_days} day={number_days}'
+
+            for method in PREDICTIONS:
+                self.assertEqual(getattr(fast, method)(), getattr(reference, method)(),
+                                 f'{method} differs for {case}')
+            for event in events:
+                self.assertEqual(EventDecision(event, fast).advisability(),
+                                 EventDecision(event, reference).advisability(),
+                                 f'advisability differs for {case} {event}')
+        return history - first_days + 1
+
+    def check_models(self, spec):
+        cases = seed = 0
+        while cases < CASES:
+            cases += self.check_model(spec, seed)
+            seed += 1
+
+    def test_registered_engines(self):
+        """ every model has an incremental engine to compare """
+        self.assertTrue(MODEL_REGISTRY.with_capability(INCREMENTAL_UPDATE))
+
+    def test_simple(self):
+        """ OnlineSimplePrediction matches SimplePrediction """
+        self.check_models(MODEL_REGISTRY.get('simple'))
+
+    def test_sophisticated(self):
+        """ OnlineSophisticatedPrediction matches SophisticatedPrediction """
+        self.check_models(MODEL_REGISTRY.get('sophisticated'))
+
+    def test_other_incremental_models(self):
+        """ updated incremental models match the same models built from scratch """
+        for spec in MODEL_REGISTRY.with_capability(INCREMENTAL_UPDATE):
+            if spec.get_name() not in ('simple', 'sophisticated'):
+                self.check_models(spec)
+
+
+class TestStartTimes(OrderedTestCase):
+    """ The start time search must match EventDecision for every hour and setting """
+
+    def test_rank_start_times(self):
+        """ rank_start_times matches EventDecision.advisability """
+        generator = random.Random(f'{SEED}:start times')
+        for case in range(CASES // 10):
+            days = random_days(generator, generator.randint(1, MAX_PAST_DAYS), date(2000, 1, 1))
+            weather_data = WeatherData()
+            weather_data.extend(days)
+            spec = generator.choice(MODEL_REGISTRY.get_specs())
+            model = spec.create(weather_data, generator.randint(1, MAX_PAST_DAYS))
+
+            ranked = rank_start_times(model)
+            self.assertEqual(len(ranked), 24 * 4)
+            for advisability, time, outdoors, cover_available in ranked:
+                event = Event('Event', outdoors, cover_available, time)
+                self.assertEqual(advisability, EventDecision(event, model).advisability(),
+                                 f'{spec.get_name()} seed={SEED} case={case} {event}')
+            self.assertEqual([option.advisability for option in ranked],
+                             sorted((option.advisability for option in ranked), reverse=True))
+
+
+class TestFleetSearch(OrderedTestCase):
+    """ The fleet search must find the same best times as scoring every hour """
+
+    def test_top_k(self):
+        """ top_k matches EventDecision over every station, day and hour """
+        generator = random.Random(f'{SEED}:fleet')
+        for case in range(max(CASES // 100, 1)):
+            forecasts = {}
+            for station in range(generator.randint(1, 8)):
+                days = random_days(generator, generator.randint(1, MAX_PAST_DAYS), date(2000, 1, 1))
+                weather_data = WeatherData()
+                weather_data.extend(days)
+                spec = generator.choice(MODEL_REGISTRY.with_capability(INCREMENTAL_UPDATE))
+                forecasts[f'station {station}'] = horizon.forecast(
+                    spec.get_name(), weather_data, generator.randint(1, MAX_PAST_DAYS),
+                    generator.randint(1, 14))
+            event = random_events(generator, 1)[0]
+            k = generator.randint(1, 50)
+
+            expected = []
+            for position, (station, forecast) in enumerate(forecasts.items()):
+                for day in range(forecast.get_number_days()):
+                    prediction = forecast.get_prediction(day)
+                    for hour in range(24):
+                        hour_event = Event('Event', event.get_outdoors(), event.get_cover_available(), hour)
+                        expected.append((EventDecision(hour_event, prediction).advisability(),
+                                         position, day, hour, station))
+            expected.sort(key=lambda result: (-result[0],) + result[1:4])
+
+            self.assertEqual(fleet_search.top_k(event, forecasts, k),
+                             [(advisability, station, day, hour)
+                              for advisability, _, day, hour, station in expected[:k]],
+                             f'seed={SEED} case={case} k={k} {event}')
+
+
+class TestVectorDecision(OrderedTestCase):
+    """ The NumPy rules must give exactly the advisability of EventDecision """
+
+    def test_advisability(self):
+        """ vector_decision.advisability and explain match EventDecision """
+        if vector_decision.np is None:
+            self.skipTest('NumPy is not installed')
+        np = vector_decision.np
+        generator = random.Random(f'{SEED}:vector')
+        # Thresholds of the rules and the values either side of them
+        temperatures = [-20.5, -0.5, 0, 0.5, 4.5, 5, 5.5, 15, 15.5, 29.5, 30, 30.5, 44.5, 45, 45.5]
+        number = max(CASES // 2, 1)
+        predictions = [
+            [generator.choice([0, 19, 20, 21, 49, 50, 51, 100] + list(range(101))) for _ in range(number)],
+            [generator.choice(temperatures + [value / 10 for value in range(-100, 500)]) for _ in range(number)],
+            [generator.choice(temperatures + [value / 10 for value in range(-200, 400)]) for _ in range(number)],
+            [generator.choice([0, 69, 70, 71, 100] + list(range(101))) for _ in range(number)],
+            [generator.randrange(10) for _ in range(number)],
+            [generator.choice([0, 3, 4, 5, 9, 10, 15, 16, 200] + list(range(40))) for _ in range(number)],
+        ]
+        settings = [(outdoors, cover_available) for outdoors in (True, False)
+                    for cover_available in (True, False)]
+        outdoors = np.array([setting[0] for setting in settings])[:, None]
+        cover_available = np.array([setting[1] for setting in settings])[:, None]
+
+        # (prediction, setting, hour) grid
+        grid = vector_decision.advisability(
+            *(np.array(values)[:, None, None] for values in predictions),
+            outdoors, cover_available, np.arange(24))
+        self.assertEqual(grid.shape, (number, len(settings), 24))
+        explanations = vector_decision.explain(
+            *(np.array(values)[:, None, None] for values in predictions),
+            outdoors, cover_available, np.arange(24))
+        names = [None, None, TEMPERATURE_RULES, None, None, RAIN_RULES, RAIN_ADJUSTMENTS]
+
+        for case, values in enumerate(zip(*predictions)):
+            prediction = FixedPrediction(*values)
+            for position, (outdoors, cover_available) in enumerate(settings):
+                for hour in range(24):
+                    event = Event('Event', outdoors, cover_available, hour)
+                    self.assertEqual(grid[case, position, hour].item(),
+                                     EventDecision(event, prediction).advisability(),
+                                     f'seed={SEED} case={case} {values} {event}')
+                    explanation = tuple(
+                        field[case, position, hour].item() if rules is None
+                        else rules[field[case, position, hour]]
+                        for field, rules in zip(explanations, names))
+                    self.assertEqual(explanation, tuple(EventDecision(event, prediction).explain()),
+                                     f'seed={SEED} case={case} {values} {event}')
+
+
+class TestPredictionProperties(OrderedTestCase):
+    """ Every registered model keeps its predictions within their ranges """
+
+    def test_ranges(self):
+        """ predictions and advisability stay within their documented ranges """
+        generator = random.Random(f'{SEED}:ranges')
+        for case in range(CASES // 10):
+            days = random_days(generator, generator.randint(1, 3 * MAX_PAST_DAYS), date(2000, 1, 1))
+            weather_data = WeatherData()
+            weather_data.extend(days)
+            past_n_days = generator.randint(1, MAX_PAST_DAYS)
+            for spec in MODEL_REGISTRY.get_specs():
+                model = spec.create(weather_data, past_n_days)
+                label = f'{spec.get_name()} seed={SEED} case={case}'
+                self.assertTrue(0 <= model.chance_of_rain() <= 100, label)
+                self.assertTrue(0 <= model.humidity() <= 100, label)
+                self.assertTrue(0 <= model.cloud_cover() <= 9, label)
+                self.assertTrue(model.wind_speed() >= 0, label)
+                for event in random_events(generator, EVENTS_PER_DAY):
+                    self.assertTrue(-5 <= EventDecision(event, model).advisability() <= 5, label)
+
+
+def main():
+    test_cases = [
+        TestIncrementalModels,
+        TestStartTimes,
+        TestFleetSearch,
+        TestVectorDecision,
+        TestPredictionProperties,
+    ]
+
+    master = TestMaster(max_diff=None, timeout=0)
+    master.run(test_cases)
+
+
+if __name__ == '__main__':
+    main()
@@ -8,36 +8,45 @@ import importlib.util
 import inspect
 import io
 import json
+import math
+import multiprocessing
 import re
+import signal
 import sys
 import textwrap
 import threading
 import time
 import traceback
+import tracemalloc
 import unittest
 
 from bdb import Bdb
 from collections import OrderedDict
 from enum import Enum, unique
-from functools import wraps
+from functools import partial, wraps
 from types import FunctionType, ModuleType, TracebackType
-from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type, Union
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, TextIO, Tuple, Type, Union
 
 
 # GLOBALS TO EXCLUDE FILES IN TRACEBACK
 __TEST_RUNNER = True
 setattr(threading, '__TEST_RUNNER', True)  # Don't like this but otherwise regex
 
-__all__ = ['AttributeGuesser', 'OrderedTestCase', 'RedirectStdIO', 'TestCase', 'TestMaster',
-           'skipIfFailed', 'timeout']
+__all__ = ['AttributeGuesser', 'BenchmarkCase', 'OrderedTestCase', 'RedirectStdIO', 'TestCase',
+           'TestMaster', 'skipIfFailed', 'timeout']
 
 # DEFAULTS
 DEFAULT_TIMEOUT = 0
+DEFAULT_TIMEOUT_MODE = 'trace'
+DEFAULT_REGRESSION_THRESHOLD = 1.5
+DEFAULT_BENCHMARK_WARMUP = 1
+DEFAULT_BENCHMARK_REPEAT = 5
 # MIN_PY_VERSION = (3, 7, 0)
 
 # CONSTANTS
 DIFF_OMITTED = '\nDiff is {} characters long. Set TestMaster(max_diff=None) to see it.'
 DUPLICATE_MSG = 'AS ABOVE'
+REGRESSION_MIN_TIME = 0.01  # seconds slower than the baseline before a test can count as a regression
 CLOSE_MATCH_CUTOFF = 0.8
 TAB_SIZE = 4
 BLOCK_WIDTH = 80
@@ -48,6 +57,12 @@ BLOCK_TEMPLATE = """\
 """.format('-' * (BLOCK_WIDTH - 2), BLOCK_WIDTH - 2)
 
 
+@unique
+class TimeoutMode(Enum):
+    TRACE = 'trace'
+    SIGNAL = 'signal'
+
+
 @unique
 class TestOutcome(Enum):
     SUCCESS = '+'
@@ -121,12 +136,77 @@ def import_module(name: str, path: str) -> Tuple[Optional[ModuleType], Optional[
             return None, sys.exc_info()
 
 
+class _TestTimeoutExpired(BaseException):
+    """
+    Raised in the main thread by the SIGALRM handler, derived from BaseException
+    so tests catching Exception don't swallow it
+    """
+
+
+def _signal_alarm_handler(_signum, _frame):
+    raise _TestTimeoutExpired
+
+
+def _can_use_signal_timeout() -> bool:
+    return hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread()
+
+
+def _run_with_trace_timeout(test_func, self, secs: float):
+    """
+    Runs the test function in a killable thread which checks if it has been
+    killed on every line executed using a trace function
+    """
+    try:
+        thread = _TimeoutThread(name=test_func.__qualname__,
+                                target=test_func, args=(self,))
+        threading.settrace(thread.global_trace)
+        thread.start()
+        thread.join(secs)
+        alive = thread.is_alive()
+        thread.kill()
+        # re-join to ensure thread completes any blocking operations. This is
+        # really only required because long blocking calls may result
+        # in sequential tests using RedirectStdIO not setting back correctly
+        thread.join()
+    finally:
+        threading.settrace(None)
+
+    if alive:
+        raise unittest.SkipTest(f'Function ran longer than {secs} second(s)')
+
+    if thread.exc_info is not None:
+        raise thread.exc_info[1].with_traceback(thread.exc_info[2])
+
+
+def _run_with_signal_timeout(test_func, self, secs: float):
+    """
+    Runs the test function in the main thread with a SIGALRM timer that
+    interrupts it once secs have passed. Nothing is traced so the test runs
+    at full speed, but the alarm is only acted on between bytecodes so a long
+    running call into C code is not interrupted until it returns.
+    """
+    previous_handler = signal.signal(signal.SIGALRM, _signal_alarm_handler)
+    signal.setitimer(signal.ITIMER_REAL, secs)
+    try:
+        test_func(self)
+    except _TestTimeoutExpired:
+        raise unittest.SkipTest(f'Function ran longer than {secs} second(s)') from None
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+
 def _timeout_wrapper(test_func):
     """
-    Runs the test function in a killable thread, the seconds value
+    Runs the test function with a time limit, the seconds value
     is obtained from the __timeout__ attribute which can be set globally
     using TestMaster(timeout=value) or apply to specific classes or functions
-    using the timeout decorator, if seconds <= 0 the test is not threaded.
+    using the timeout decorator, if seconds <= 0 the test is not limited.
+
+    With TimeoutMode.TRACE the test runs in a killable thread, with
+    TimeoutMode.SIGNAL it runs under a SIGALRM timer, falling back to
+    TRACE where SIGALRM is not available (Windows or outside the main thread).
+    Either way a test running too long is skipped.
     """
 
     @wraps(test_func)
@@ -138,26 +218,10 @@ def _timeout_wrapper(test_func):
         if secs <= 0:
             return test_func(self)
 
-        try:
-            thread = _TimeoutThread(name=test_func.__qualname__,
-                                    target=test_func, args=(self,))
-            threading.settrace(thread.global_trace)
-            thread.start()
-            thread.join(secs)
-            alive = thread.isAlive()
-            thread.kill()
-            # re-join to ensure thread completes any blocking operations. This is
-            # really only required because long blocking calls may result
-            # in sequential tests using RedirectStdIO not setting back correctly
-            thread.join()
-        finally:
-            threading.settrace(None)
-
-        if alive:
-            raise unittest.SkipTest(f'Function ran longer than {secs} second(s)')
-
-        if thread.exc_info is not None:
-            raise thread.exc_info[1].with_traceback(thread.exc_info[2])
+        if _TimeoutThread.mode is TimeoutMode.SIGNAL and _can_use_signal_timeout():
+            _run_with_signal_timeout(test_func, self, secs)
+        else:
+            _run_with_trace_timeout(test_func, self, secs)
 
         return None
 
@@ -312,24 +376,36 @@ class RecursionDetector(Bdb):
         self._stack.remove(frame.f_code)
 
 
+# Attributes of AttributeGuesser itself rather than the wrapped object
+_GUESSER_ATTRIBUTES = frozenset(('_AttributeGuesser__object', '_AttributeGuesser__cache',
+                                 '_AttributeGuesser__resolved', '_AttributeGuesser__guess_attribute',
+                                 '_AttributeGuesser__fail'))
+
+
 class AttributeGuesser:
     """
     Wrapper class for objects to return the attribute with the
     closest matching name. If fail is True then a TestCase.failureException
     is raised if no possible match is found.
-    """
 
-    def __init__(self, obj: Any, fail: bool = True):
+    If cache is True every attribute looked up, found or guessed, is stored
+    so later lookups of the same name are a dict hit. Assigning or deleting
+    through the wrapper clears the stored attributes, changes made directly on
+    the wrapped object are only seen after clear_cache or with cache=False.
+    """
+    def __init__(self, obj: Any, fail: bool = True, cache: bool = True):
         """
         Parameters:
             obj: Object to wrap for guessing attributes of
             fail: if attribute can't be found
                 raise exception iff True otherwise return None
+            cache: store resolved attributes iff True
         """
         if isinstance(obj, AttributeGuesser):
             obj = getattr(obj, '_AttributeGuesser__object')
         self.__object = obj
         self.__cache = {}
+        self.__resolved = {} if cache else None
         self.__fail = fail
 
     @classmethod
@@ -338,6 +414,15 @@ class AttributeGuesser:
             raise ValueError('attr_guesser must be an instance of AttributeGuesser')
         return object.__getattribute__(attr_guesser, '_AttributeGuesser__object')
 
+    @classmethod
+    def clear_cache(cls, attr_guesser):
+        """ Forget the resolved attributes of attr_guesser """
+        if not isinstance(attr_guesser, AttributeGuesser):
+            raise ValueError('attr_guesser must be an instance of AttributeGuesser')
+        resolved = object.__getattribute__(attr_guesser, '_AttributeGuesser__resolved')
+        if resolved is not None:
+            resolved.clear()
+
     def __guess_attribute(self, obj: Any, name: str):
         attributes = dict(inspect.getmembers(obj))
         matches = difflib.get_close_matches(name, attributes, n=1, cutoff=CLOSE_MATCH_CUTOFF)
@@ -349,10 +434,24 @@ class AttributeGuesser:
         return attributes[matches[0]]
 
     def __getattribute__(self, key: str):
-        if key in ('_AttributeGuesser__object', '_AttributeGuesser__cache',
-                   '_AttributeGuesser__guess_attribute', '_AttributeGuesser__fail'):
+        resolved = object.__getattribute__(self, '_AttributeGuesser__resolved')
+        if resolved is not None:
+            try:
+                return resolved[key]
+            except KeyError:
+                pass
+        if key in _GUESSER_ATTRIBUTES:
             return object.__getattribute__(self, key)
-        return getattr(object.__getattribute__(self, '_AttributeGuesser__object'), key)
+
+        try:
+            attr = getattr(object.__getattribute__(self, '_AttributeGuesser__object'), key)
+        except AttributeError:
+            if resolved is None:
+                raise  # left to __getattr__
+            attr = object.__getattribute__(self, '__getattr__')(key)
+        if resolved is not None:
+            resolved[key] = attr
+        return attr
 
     def __getattr__(self, key: str):
         cache = self._AttributeGuesser__cache
@@ -364,11 +463,19 @@ class AttributeGuesser:
         return attr
 
     def __setattr__(self, key: str, value: Any):
-        if key in ('_AttributeGuesser__object', '_AttributeGuesser__cache',
-                   '_AttributeGuesser__fail'):
+        if key in _GUESSER_ATTRIBUTES:
             return object.__setattr__(self, key, value)
+        AttributeGuesser.clear_cache(self)
+        self._AttributeGuesser__cache.clear()
         return setattr(self._AttributeGuesser__object, key, value)
 
+    def __delattr__(self, key: str):
+        if key in _GUESSER_ATTRIBUTES:
+            return object.__delattr__(self, key)
+        AttributeGuesser.clear_cache(self)
+        self._AttributeGuesser__cache.clear()
+        return delattr(self._AttributeGuesser__object, key)
+
     def __repr__(self):
         return f'AttributeGuesser({self._AttributeGuesser__object!r})'
 
@@ -378,6 +485,7 @@ class _TimeoutThread(threading.Thread):
     Killable thread
     """
     timeout: float = DEFAULT_TIMEOUT
+    mode: TimeoutMode = TimeoutMode(DEFAULT_TIMEOUT_MODE)
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -620,6 +728,10 @@ class TestCase(unittest.TestCase, metaclass=_TestCaseMeta):
     def name(self) -> str:
         return self._testMethodName
 
+    @property
+    def class_name(self) -> str:
+        return self.__class__.__name__
+
     @property
     def description(self) -> str:
         short_desc = self.shortDescription()
@@ -634,16 +746,90 @@ class OrderedTestCase(TestCase):
         return f'{self.member_names.index(self.name) + 1}. {super().description}'
 
 
+class BenchmarkCase(OrderedTestCase):
+    """
+    TestCase for performance benchmarks. Test methods time functions using
+    self.benchmark, the statistics of every call are reported by TestMaster
+    alongside the outcome of the test.
+    """
+    warmup: int = DEFAULT_BENCHMARK_WARMUP
+    repeat: int = DEFAULT_BENCHMARK_REPEAT
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.benchmarks: List[Dict[str, Any]] = []
+
+    def benchmark(self, func: Callable, *args, name: str = None, warmup: int = None,
+                  repeat: int = None, **kwargs) -> Dict[str, Any]:
+        """
+        Call func(*args, **kwargs) warmup times untimed then repeat times timed,
+        followed by one call under tracemalloc to find the peak memory allocated
+        (kept separate as tracing allocations slows the function down).
+
+        Returns a dict of the name, repeat count and the min, median, p95 and
+        mean times in seconds along with peak_memory in bytes.
+        """
+        warmup = self.warmup if warmup is None else warmup
+        repeat = self.repeat if repeat is None else repeat
+        if repeat < 1:
+            raise ValueError('repeat must be at least 1')
+
+        for _ in range(warmup):
+            func(*args, **kwargs)
+
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func(*args, **kwargs)
+            times.append(time.perf_counter() - start)
+        times.sort()
+
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        try:
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+            func(*args, **kwargs)
+            peak_memory = tracemalloc.get_traced_memory()[1] - start_memory
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+
+        middle = len(times) // 2
+        median = times[middle] if len(times) % 2 else (times[middle - 1] + times[middle]) / 2
+        p95 = times[math.ceil(0.95 * len(times)) - 1]  # nearest rank
+        stats = dict(name=name or get_object_name(func), repeat=repeat, min=times[0], median=median,
+                     p95=p95, mean=sum(times) / len(times), peak_memory=peak_memory)
+        self.benchmarks.append(stats)
+        return stats
+
+
 class TestResult(unittest.TestResult):
     """
-    TestResult stores the result of each test in the order they were executed
+    TestResult stores the result of each test in the order they were executed.
+    If jsonl is given each outcome is also written to it as a line of JSON as
+    soon as the test finishes.
+    If keep is given only the results of the TestCases named in it are
+    stored, e.g. those skipIfFailed checks, so memory use does not grow with
+    the number of tests. Failed and skipped tests are always kept by unittest.
     """
-    def __init__(self, stream=None, descriptions=None, verbosity=None):
+    def __init__(self, stream=None, descriptions=None, verbosity=None, jsonl: Optional[TextIO] = None,
+                 keep: Optional[Set[str]] = None):
         super().__init__(stream, descriptions, verbosity)
+        self._jsonl = jsonl
+        self._keep = keep
+        # id of each failed or skipped test  position in the run, to list them in order
+        self.problem_order: Dict[int, int] = {}
         self._start = 0
         self._stop = 0
         # TestCaseClassName  TestCaseName
         self.results: Dict[str, Dict[str, Tuple[TestCase, TestOutcome]]] = OrderedDict()
+        # TestCaseClassName  TestCaseName  (wall time, CPU time)
+        self.timings: Dict[str, Dict[str, Tuple[float, float]]] = OrderedDict()
+        # TestCaseClassName  TestCaseName  statistics from BenchmarkCase.benchmark
+        self.benchmarks: Dict[str, Dict[str, List[Dict[str, Any]]]] = OrderedDict()
+        self._test_start = (0.0, 0.0)
 
     def startTestRun(self):
         self._start = time.time()
@@ -657,9 +843,16 @@ class TestResult(unittest.TestResult):
     def run_time(self):
         return self._stop - self._start
 
+    @property
+    def keeps_all(self):
+        return self._keep is None
+
+    def _keeps(self, test_cls_name: str) -> bool:
+        return self._keep is None or test_cls_name in self._keep
+
     def startTest(self, test: TestCase):
         test_cls_name = test.__class__.__name__
-        if test_cls_name not in self.results:
+        if self._keeps(test_cls_name) and test_cls_name not in self.results:
             self.results[test_cls_name] = OrderedDict()
 
         test_method = getattr(test.__class__, test.name)
@@ -667,6 +860,7 @@ class TestResult(unittest.TestResult):
         self._apply_skip(test, test_method)
 
         super().startTest(test)
+        self._test_start = (time.perf_counter(), time.process_time())
 
     def _apply_skip(self, test: TestCase, test_item: Union[Type[TestCase], FunctionType]):
         """
@@ -718,8 +912,26 @@ class TestResult(unittest.TestResult):
     def addSubTest(self, test, subtest, err):
         raise NotImplementedError("TODO")
 
-    def add_outcome(self, test: TestCase, outcome: TestOutcome):
-        self.results[test.__class__.__name__][test.name] = (test, outcome)
+    def add_outcome(self, test: TestCase, outcome: TestOutcome, err=None, reason: str = None):
+        wall_start, cpu_start = self._test_start
+        wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+        benchmarks = getattr(test, 'benchmarks', None)
+        if outcome != TestOutcome.SUCCESS:
+            self.problem_order[id(test)] = len(self.problem_order)
+        if self._keep is None:
+            self.timings.setdefault(test.__class__.__name__, OrderedDict())[test.name] = (wall, cpu)
+            if benchmarks:
+                self.benchmarks.setdefault(test.__class__.__name__, OrderedDict())[test.name] = benchmarks
+        if self._keeps(test.__class__.__name__):
+            self.results[test.__class__.__name__][test.name] = (test, outcome)
+
+        if self._jsonl is not None:
+            message = self._exc_info_to_string(err, test) if err is not None else reason
+            self._jsonl.write(json.dumps(dict(
+                event='outcome', test_class=test.class_name, test=test.name,
+                description=test.description, outcome=outcome.value, message=message,
+                wall=wall, cpu=cpu, benchmarks=benchmarks or [])) + '\n')
+            self._jsonl.flush()
 
     def addSuccess(self, test: TestCase):
         self.add_outcome(test, TestOutcome.SUCCESS)
@@ -727,16 +939,16 @@ class TestResult(unittest.TestResult):
 
     @unittest.result.failfast
     def addFailure(self, test: TestCase, err: Tuple[Type[BaseException], BaseException, TracebackType]):
-        self.add_outcome(test, TestOutcome.FAIL)
+        self.add_outcome(test, TestOutcome.FAIL, err=err)
         super().addFailure(test, err)
 
     @unittest.result.failfast
     def addError(self, test: TestCase, err: Tuple[Type[Exception], BaseException, TracebackType]):
-        self.add_outcome(test, TestOutcome.FAIL)
+        self.add_outcome(test, TestOutcome.FAIL, err=err)
         super().addError(test, err)
 
     def addSkip(self, test: TestCase, reason: str):
-        self.add_outcome(test, TestOutcome.SKIP)
+        self.add_outcome(test, TestOutcome.SKIP, reason=reason)
         super().addSkip(test, reason)
 
     def _is_relevant_tb_level(self, tb):
@@ -753,6 +965,60 @@ class TestResult(unittest.TestResult):
             for test_cls, res in self.results.items()
         }
 
+    def iter_results(self) -> Iterable[Tuple[str, Iterable[Tuple[str, str]]]]:
+        """ to_dict as nested (key, value) generators, for _JsonWriter """
+        return ((test_cls, ((name, outcome.value) for name, (test, outcome) in res.items()))
+                for test_cls, res in self.results.items())
+
+    def timings_to_dict(self):
+        return {
+            test_cls:
+                {name: dict(wall=wall, cpu=cpu) for name, (wall, cpu) in res.items()}
+            for test_cls, res in self.timings.items()
+        }
+
+    def iter_timings(self) -> Iterable[Tuple[str, Iterable[Tuple[str, Dict[str, float]]]]]:
+        """ timings_to_dict as nested (key, value) generators, for _JsonWriter """
+        return ((test_cls, ((name, dict(wall=wall, cpu=cpu)) for name, (wall, cpu) in res.items()))
+                for test_cls, res in self.timings.items())
+
+    def slowest(self, count: int) -> List[Tuple[TestCase, float, float]]:
+        """ The count tests with the longest wall time, slowest first """
+        tests = [(test, *self.timings[test_cls][name])
+                 for test_cls, res in self.results.items()
+                 for name, (test, _outcome) in res.items()]
+        tests.sort(key=lambda t: t[1], reverse=True)
+        return tests[:count]
+
+
+class _JsonWriter:
+    """
+    Writes a JSON object to a stream piece by piece, laid out the same as
+    json.dump(obj, stream, indent=indent). Values given as generators of
+    (key, value) pairs are written as nested objects while they are produced,
+    so large results never need to be built up as a single dict first.
+    """
+    def __init__(self, stream, indent: int = TAB_SIZE):
+        self._stream = stream
+        self._indent = indent
+
+    def write(self, items: Iterable[Tuple[str, Any]], level: int = 0):
+        write = self._stream.write
+        inner = '\n' + ' ' * (self._indent * (level + 1))
+        separator = '{' + inner
+        for key, value in items:
+            write(f'{separator}{json.dumps(key)}: ')
+            separator = ',' + inner
+            if inspect.isgenerator(value):
+                self.write(value, level + 1)
+            else:
+                # strings are escaped by json so every newline is layout
+                write(json.dumps(value, indent=self._indent).replace('\n', inner))
+        if separator == '{' + inner:
+            write('{}')
+        else:
+            write('\n' + ' ' * (self._indent * level) + '}')
+
 
 class TestNoPrint(TestCase):
     def __init__(self, stdio: RedirectStdIO):
@@ -764,6 +1030,133 @@ class TestNoPrint(TestCase):
         self.assertEqual(self._stdio.stdout, '')
 
 
+class _TestRecord:
+    """
+    Picklable summary of a test run in a worker process, standing in for the
+    TestCase when the results of all workers are merged
+    """
+    def __init__(self, class_name: str, name: str, description: str):
+        self.class_name = class_name
+        self.name = name
+        self.description = description
+
+
+# (class name, test name, description, outcome, flavour, message, wall time, CPU time, benchmarks)
+_Record = Tuple[str, str, str, TestOutcome, Optional[str], Optional[str], float, float,
+                Optional[List[Dict[str, Any]]]]
+
+
+def _record_results(result: TestResult) -> Tuple[List[_Record], int]:
+    """
+    Summarise each test in result, in the order they were run, and count the
+    tests run. If result only kept some tests just the failed and skipped
+    tests are summarised, without timings.
+    """
+    messages = {}
+    for flavour, tests in (('FAIL', result.failures), ('ERROR', result.errors), ('SKIP', result.skipped)):
+        for test, msg in tests:
+            messages[id(test)] = (flavour, msg)
+
+    if not result.keeps_all:
+        problems = sorted(result.failures + result.errors + result.skipped,
+                          key=lambda t: result.problem_order.get(id(t[0]), len(result.problem_order)))
+        return [(test.__class__.__name__, test.name, test.description,
+                 TestOutcome.SKIP if messages[id(test)][0] == 'SKIP' else TestOutcome.FAIL,
+                 *messages[id(test)], 0.0, 0.0, None)
+                for test, _msg in problems], result.testsRun
+
+    records = []
+    for test_cls_name, tests in result.results.items():
+        for name, (test, outcome) in tests.items():
+            flavour, msg = messages.get(id(test), (None, None))
+            wall, cpu = result.timings[test_cls_name][name]
+            benchmarks = result.benchmarks.get(test_cls_name, {}).get(name)
+            records.append((test_cls_name, name, test.description, outcome, flavour, msg, wall, cpu,
+                            benchmarks))
+    return records, result.testsRun
+
+
+def _skip_dependencies(test_cases: List) -> Set[str]:
+    """ Names of the TestCases whose outcomes skipIfFailed checks in test_cases """
+    names = set()
+    for test_case in test_cases:
+        test_cls = test_case if isinstance(test_case, type) else type(test_case)
+        items = [test_cls] + [getattr(test_cls, name, None)
+                              for name in TestLoader().getTestCaseNames(test_cls)]
+        for item in items:
+            for dependency, _test_name, _tag in getattr(item, '__skip_test__', None) or ():
+                names.add((dependency or test_cls).__name__)
+    return names
+
+
+def _test_case_dependencies(test_case: Type[unittest.TestCase]) -> List[Type[unittest.TestCase]]:
+    """ TestCases that tests in test_case are skipped on by skipIfFailed """
+    items = [test_case] + [getattr(test_case, name, None)
+                           for name in TestLoader().getTestCaseNames(test_case)]
+    return [test_cls for item in items
+            for test_cls, _test_name, _tag in getattr(item, '__skip_test__', None) or ()
+            if test_cls is not None]
+
+
+def _group_dependent_test_cases(test_cases: List) -> List[List]:
+    """
+    Partition test_cases so that any TestCases linked by skipIfFailed are in
+    the same group, keeping the original order within and across groups
+    """
+    classes = [test_case if isinstance(test_case, type) else type(test_case)
+               for test_case in test_cases]
+    parent = list(range(len(test_cases)))
+
+    def find(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    for index, test_cls in enumerate(classes):
+        for dependency in _test_case_dependencies(test_cls):
+            for other, other_cls in enumerate(classes):
+                if other_cls is dependency:
+                    parent[find(other)] = find(index)
+
+    groups = OrderedDict()
+    for index, test_case in enumerate(test_cases):
+        groups.setdefault(find(index), []).append(test_case)
+    return list(groups.values())
+
+
+# Set in each worker process by _start_test_worker
+_worker_groups: List[List] = []
+_worker_suppress_stdout = True
+_worker_jsonl: Optional[TextIO] = None
+_worker_keep: Optional[Set[str]] = None
+
+
+def _start_test_worker(groups: List[List], suppress_stdout: bool, jsonl_path: Optional[str],
+                       keep: Optional[Set[str]]):
+    global _worker_groups, _worker_suppress_stdout, _worker_jsonl, _worker_keep
+    _worker_groups = groups
+    _worker_suppress_stdout = suppress_stdout
+    # Each worker appends whole lines so the outcomes of all workers interleave cleanly
+    _worker_jsonl = open(jsonl_path, 'a') if jsonl_path is not None else None
+    _worker_keep = keep
+
+
+def _run_test_group(index: int) -> Tuple[List[_Record], int, str]:
+    """
+    Run a group of TestCases in a worker returning the records, number of
+    tests run and captured stdout
+    """
+    suite = TestLoader().loadTestCases(_worker_groups[index])
+    with RedirectStdIO(stdout=_worker_suppress_stdout, stderr=True) as stdio:
+        runner = unittest.TextTestRunner(stream=None, verbosity=0,
+                                         resultclass=partial(TestResult, jsonl=_worker_jsonl,
+                                                             keep=_worker_keep))
+        result = runner.run(suite)
+    records, tests_run = _record_results(result)
+    return records, tests_run, stdio.stdout if _worker_suppress_stdout else ''
+
+
 class TestMaster:
     """
     Core driving class which creates the TestSuite from the provided TestCases
@@ -781,10 +1174,17 @@ class TestMaster:
                  max_diff: int = None,
                  suppress_stdout: bool = True,
                  timeout: float = DEFAULT_TIMEOUT,
+                 timeout_mode: str = DEFAULT_TIMEOUT_MODE,
                  output_json: bool = False,
                  hide_paths: bool = True,
                  ignore_import_fails: bool = False,
                  include_no_print: bool = False,
+                 workers: int = 1,
+                 slowest: int = 0,
+                 baseline: str = None,
+                 regression_threshold: float = DEFAULT_REGRESSION_THRESHOLD,
+                 save_timings: str = None,
+                 jsonl: str = None,
                  scripts: List[Tuple[str, str]] = ()):
         """
         Parameters:
@@ -793,6 +1193,9 @@ class TestMaster:
             suppress_stdout: If True all uncaught stdout output is suppressed
             timeout: global timeout value in seconds, if a timeout > 0 is
                 specified then the tests are run in killable threads.
+            timeout_mode: how timeouts are enforced, 'trace' runs tests in
+                threads checked on every line (slows tests down considerably),
+                'signal' uses a SIGALRM timer with no per-line cost.
             output_json: outputs text summary if True else in json format.
             hide_paths: if True file paths in traceback messages for failures
                 are removed to only contain the filename.
@@ -801,6 +1204,18 @@ class TestMaster:
                 Otherwise all tests will run.
             include_no_print: iff True adds a test for uncaught prints during
                 tests. Requires suppress_stdout to be set as well.
+            workers: number of worker processes to run TestCases in. TestCases
+                linked by skipIfFailed run in order in the same worker. Only
+                used where processes can be forked, otherwise tests run serially.
+            slowest: if > 0 the text summary lists this many of the slowest tests.
+            baseline: path of a JSON file with the timings of an earlier run, either
+                the --json output or a file written using save_timings. Tests
+                slower than regression_threshold times their baseline are reported.
+            regression_threshold: ratio of wall time to baseline wall time above
+                which a test is reported as a regression.
+            save_timings: path of a JSON file to write the per test timings to.
+            jsonl: path of a file to write each test outcome to as a line of
+                JSON as soon as the test finishes, followed by a summary line.
             scripts: list of tuples, these tuples are a pair of module name and
                 module path that gets imported using 'path' with the __name__
                 attribute of the module set to 'name'. On successful import a
@@ -823,6 +1238,38 @@ class TestMaster:
                             action="store",
                             default=timeout,
                             type=float)
+        parser.add_argument("--timeout-mode",
+                            help="How test timeouts are enforced",
+                            choices=[mode.value for mode in TimeoutMode],
+                            default=timeout_mode)
+        parser.add_argument("-w", "--workers",
+                            help="The number of processes to run TestCases in",
+                            action="store",
+                            default=workers,
+                            type=int)
+        parser.add_argument("--slowest",
+                            help="The number of slowest tests to list",
+                            action="store",
+                            default=slowest,
+                            type=int)
+        parser.add_argument("--baseline",
+                            help="JSON file of timings to check for regressions against",
+                            action="store",
+                            default=baseline)
+        parser.add_argument("--regression-threshold",
+                            help="Ratio of time to baseline time reported as a regression",
+                            action="store",
+                            default=regression_threshold,
+                            type=float)
+        parser.add_argument("--save-timings",
+                            help="JSON file to save per test timings to",
+                            action="store",
+                            default=save_timings)
+        parser.add_argument("--jsonl",
+                            help="File to stream test outcomes to as JSON lines, passed tests are then "
+                                 "not kept in memory unless another report needs them",
+                            action="store",
+                            default=jsonl)
         parser.add_argument('-p', '--paths', nargs="+")
         parser.add_argument('-s', '--scripts', nargs="+")
         parser.add_argument("--hide-tb-paths",
@@ -849,6 +1296,7 @@ class TestMaster:
 
         TestCase.maxDiff = args.diff
         _TimeoutThread.timeout = args.timeout
+        _TimeoutThread.mode = TimeoutMode(args.timeout_mode)
 
         if args.scripts or args.paths:
             if len(args.scripts or ()) != len(args.paths or ()):
@@ -877,7 +1325,9 @@ class TestMaster:
     def print_results(self, failed_tests: List[Tuple[str, TestCase, str]], result: TestResult):
         # print summary
         print(BLOCK_TEMPLATE.format('Summary of Results'))
-        for test_cls, test_cases in result.results.items():
+        if not result.keeps_all:
+            print(f'{self.indent}outcome of every test written to {self._args.jsonl}')
+        for test_cls, test_cases in (result.results.items() if result.keeps_all else ()):
             print(test_cls)
             for _test_name, (test, outcome) in test_cases.items():
                 print(f'{self.indent}{outcome.value} {test.description}')
@@ -906,9 +1356,9 @@ class TestMaster:
 
     def print_error(self, flavour: str, test: TestCase, msg: str):
         print(self.separator1)
-        print(f'{flavour}: {test.__class__.__name__} {test.description}')
+        print(f'{flavour}: {test.class_name} {test.description}')
         print(self.separator2)
-        if self._args.hide_tb_paths:
+        if self._args.hide_tb_paths and 'File "' in msg:
             msg = self._remove_path.sub(r'File "\1"', msg)
         # msg = self._remove_threading.sub('', msg)
         print(textwrap.indent(msg, self.indent))
@@ -933,33 +1383,107 @@ class TestMaster:
             err_type = 'exception'
 
         err_msg = ''.join(traceback.format_exception(exc_type, exc_value, exc_traceback))
-        err_msg = self._remove_importlib.sub('', err_msg)
-        if self._args.hide_tb_paths:
+        if 'importlib' in err_msg:
+            err_msg = self._remove_importlib.sub('', err_msg)
+        if self._args.hide_tb_paths and 'File "' in err_msg:
             err_msg = self._remove_path.sub(r'File "\1"', err_msg)
 
         return err_type, msg, err_msg
 
-    def output_results(self, all_tests: List[TestCase], result: TestResult):
+    def timing_regressions(self, result: TestResult) -> List[Tuple[str, str, float, float]]:
+        """
+        Compare the wall time of each test against the baseline file
+        returning (class name, test name, baseline time, time) for regressions
+        """
+        if self._args.baseline is None:
+            return []
+
+        with open(self._args.baseline) as file:
+            baseline = json.load(file)
+        baseline = baseline.get('timings', baseline)
+
+        regressions = []
+        for test_cls, timings in result.timings.items():
+            for name, (wall, _cpu) in timings.items():
+                base = baseline.get(test_cls, {}).get(name)
+                if base is None:
+                    continue
+                if wall > base['wall'] * self._args.regression_threshold and \
+                        wall - base['wall'] > REGRESSION_MIN_TIME:
+                    regressions.append((test_cls, name, base['wall'], wall))
+        return regressions
+
+    def print_benchmarks(self, result: TestResult):
+        if not result.benchmarks:
+            return
+        print(self.separator2)
+        print(BLOCK_TEMPLATE.format('Benchmarks'))
+        print(f'{self.indent}{"name":<40} {"min":>10} {"median":>10} {"p95":>10} {"peak mem":>10}')
+        for test_cls, tests in result.benchmarks.items():
+            for name, benchmarks in tests.items():
+                print(f'{test_cls}.{name}')
+                for stats in benchmarks:
+                    print(f'{self.indent}{stats["name"]:<40} {stats["min"]:>9.6f}s {stats["median"]:>9.6f}s '
+                          f'{stats["p95"]:>9.6f}s {stats["peak_memory"] / 1024:>8.0f}KB')
+
+    def print_timings(self, result: TestResult, regressions: List[Tuple[str, str, float, float]]):
+        if self._args.slowest > 0:
+            print(self.separator2)
+            print(BLOCK_TEMPLATE.format('Slowest Tests'))
+            for test, wall, cpu in result.slowest(self._args.slowest):
+                print(f'{self.indent}{wall:8.3f}s wall {cpu:8.3f}s cpu  {test.class_name} {test.description}')
+
+        if regressions:
+            print(self.separator2)
+            print(BLOCK_TEMPLATE.format('Timing Regressions'))
+            for test_cls, name, base, wall in regressions:
+                print(f'{self.indent}{test_cls}.{name}: {base:.3f}s -> {wall:.3f}s ({wall / base:.1f}x)'
+                      if base > 0 else f'{self.indent}{test_cls}.{name}: {base:.3f}s -> {wall:.3f}s')
+
+    def _keep(self, test_cases: List[Union[TestCase, Type[TestCase]]]) -> Optional[Set[str]]:
+        """
+        Names of the TestCases whose results are kept, see TestResult. With
+        --jsonl tests are only kept for skipIfFailed, unless a report that
+        lists every test is also asked for.
+        """
+        args = self._args
+        if args.jsonl is None or args.json or args.slowest > 0 or args.baseline or args.save_timings:
+            return None
+        return _skip_dependencies(test_cases)
+
+    def output_results(self, result: TestResult):
         runtime = result.run_time
         total = result.testsRun
         fails, skips = len(result.failures) + len(result.errors), len(result.skipped)
         passed = total - fails - skips
+        regressions = self.timing_regressions(result)
+
+        if self._args.save_timings is not None:
+            with open(self._args.save_timings, 'w') as file:
+                json.dump(dict(timings=result.timings_to_dict()), file, indent=4)
 
         if self._args.json:
             errors = []
             for err_type, msg, err_msg in self._import_errors:
                 errors.append(dict(error=err_type, error_message=f'{msg}\n{err_msg}'))
-            data = dict(total=total, failed=fails, skipped=skips, passed=passed,
-                        time=runtime, results=result.to_dict(), errors=errors)
-            json.dump(data, sys.stdout, indent=4)
+            _JsonWriter(sys.stdout).write([
+                ('total', total), ('failed', fails), ('skipped', skips), ('passed', passed),
+                ('time', runtime), ('results', result.iter_results()), ('errors', errors),
+                ('timings', result.iter_timings()), ('benchmarks', result.benchmarks),
+                ('regressions', [dict(test=f'{test_cls}.{name}', baseline=base, time=wall)
+                                 for test_cls, name, base, wall in regressions])])
         else:
-            # Join the lists sorted by the test order
+            # Join the lists sorted by the test order, tests without an
+            # outcome (e.g. setUpClass errors) go last
+            order = result.problem_order
             failed_tests = sorted(
                 self._add_flavour('FAIL', result.failures) +
                 self._add_flavour('ERROR', result.errors) +
                 self._add_flavour('SKIP', result.skipped),
-                key=lambda t: all_tests.index(t[1]))
+                key=lambda t: order.get(id(t[1]), len(order)))
             self.print_results(failed_tests, result)
+            self.print_benchmarks(result)
+            self.print_timings(result, regressions)
             print(self.separator2)
             print(f'Ran {total} tests in {runtime:.3f} seconds with '
                   f'{passed} passed/{skips} skipped/{fails} failed.')
@@ -977,19 +1501,111 @@ class TestMaster:
             return None
 
         suite = TestLoader().loadTestCases(test_cases)
+        parallel = self._args.workers > 1 and 'fork' in multiprocessing.get_all_start_methods()
+        keep = self._keep(test_cases)
 
-        # hide unittest output
-        with RedirectStdIO(stdout=self._args.suppress_stdout, stderr=True) as stdio:
-            runner = unittest.TextTestRunner(stream=None,
-                                             verbosity=0,
-                                             resultclass=TestResult)
-            if self._args.include_no_print:
-                if not self._args.suppress_stdout:
-                    raise RuntimeError("Can't test for no print without suppressing stdout")
-                suite.addTest(TestNoPrint(stdio))
+        jsonl = None
+        if self._args.jsonl is not None:
+            # truncate then append, so lines from worker processes are not overwritten
+            open(self._args.jsonl, 'w').close()
+            jsonl = open(self._args.jsonl, 'a')
+
+        try:
+            # hide unittest output
+            with RedirectStdIO(stdout=self._args.suppress_stdout, stderr=True) as stdio:
+                runner = unittest.TextTestRunner(stream=None,
+                                                 verbosity=0,
+                                                 resultclass=partial(TestResult, jsonl=jsonl, keep=keep))
+                no_print = None
+                if self._args.include_no_print:
+                    if not self._args.suppress_stdout:
+                        raise RuntimeError("Can't test for no print without suppressing stdout")
+                    no_print = TestNoPrint(stdio)
+
+                if parallel:
+                    result = self._run_parallel(test_cases, runner, no_print, keep)
+                else:
+                    if no_print is not None:
+                        suite.addTest(no_print)
+                    result = runner.run(suite)
+
+            self.output_results(result)
+            if jsonl is not None:
+                fails = len(result.failures) + len(result.errors)
+                jsonl.write(json.dumps(dict(
+                    event='summary', total=result.testsRun, failed=fails, skipped=len(result.skipped),
+                    passed=result.testsRun - fails - len(result.skipped), time=result.run_time)) + '\n')
+        finally:
+            if jsonl is not None:
+                jsonl.close()
+        return result
 
-            all_tests = list(suite)
-            result = runner.run(suite)
+    def _run_parallel(self, test_cases: List[Union[TestCase, Type[TestCase]]],
+                      runner: unittest.TextTestRunner,
+                      no_print: Optional[TestNoPrint],
+                      keep: Optional[Set[str]]) -> TestResult:
+        """
+        Run groups of dependent TestCases across forked worker processes and
+        merge their outcomes into a single TestResult ordered as test_cases.
+        The no print test runs last in this process over the stdout of all workers.
+        """
+        groups = _group_dependent_test_cases(test_cases)
+        start = time.time()
+        context = multiprocessing.get_context('fork')
+        with context.Pool(min(self._args.workers, len(groups)), initializer=_start_test_worker,
+                          initargs=(groups, self._args.suppress_stdout, self._args.jsonl, keep)) as pool:
+            outputs = pool.map(_run_test_group, range(len(groups)), chunksize=1)
+
+        record_lists = []
+        tests_run = 0
+        for records, group_tests_run, stdout in outputs:
+            record_lists.append(records)
+            tests_run += group_tests_run
+            sys.stdout.write(stdout)
+        if no_print is not None:
+            records, no_print_tests_run = _record_results(runner.run(no_print))
+            record_lists.append(records)
+            tests_run += no_print_tests_run
+
+        result = self._merge_records(test_cases, record_lists, keep)
+        result.testsRun = tests_run
+        result._start = start
+        result._stop = time.time()
+        return result
 
-        self.output_results(all_tests, result)
+    @staticmethod
+    def _merge_records(test_cases: List[Union[TestCase, Type[TestCase]]],
+                       record_lists: List[List[_Record]],
+                       keep: Optional[Set[str]] = None) -> TestResult:
+        class_order = {}
+        for test_case in test_cases:
+            test_cls = test_case if isinstance(test_case, type) else type(test_case)
+            class_order.setdefault(test_cls.__name__, len(class_order))
+
+        by_class = OrderedDict()
+        for records in record_lists:
+            for test_cls_name, name, description, outcome, flavour, msg, wall, cpu, benchmarks in records:
+                by_class.setdefault(test_cls_name, []).append(
+                    (_TestRecord(test_cls_name, name, description), outcome, flavour, msg, wall, cpu,
+                     benchmarks))
+
+        result = TestResult(keep=keep)
+        for test_cls_name in sorted(by_class, key=lambda cls_name: class_order.get(cls_name, len(class_order))):
+            if keep is None:
+                result.results[test_cls_name] = OrderedDict()
+                result.timings[test_cls_name] = OrderedDict()
+            for test, outcome, flavour, msg, wall, cpu, benchmarks in by_class[test_cls_name]:
+                if keep is None:
+                    result.results[test_cls_name][test.name] = (test, outcome)
+                    result.timings[test_cls_name][test.name] = (wall, cpu)
+                    if benchmarks:
+                        result.benchmarks.setdefault(test_cls_name, OrderedDict())[test.name] = benchmarks
+                if flavour is not None:
+                    result.problem_order[id(test)] = len(result.problem_order)
+                if flavour == 'FAIL':
+                    result.failures.append((test, msg))
+                elif flavour == 'ERROR':
+                    result.errors.append((test, msg))
+                elif flavour == 'SKIP':
+                    result.skipped.append((test, msg))
         return result
@@ -0,0 +1,218 @@
+"""
+    The rules of EventDecision applied to whole arrays of predictions and
+    event settings at once, using NumPy.
+
+    adjusted_temperatures: Temperatures adjusted for humidity.
+    temperature_factor: Temperature factor of every combination.
+    rain_factor: Rain factor of every combination.
+    advisability: Advisability of every combination, limited to -5 to +5.
+    explain: Advisability of every combination with its factors and the
+             rules that set them.
+
+    Arguments may be arrays or scalars of any shapes that broadcast together,
+    e.g. predictions with shape (days, 1) and times with shape (24,) give a
+    (days, 24) grid. Each value is calculated with the same floating point
+    operations, in the same order, as the scalar rules in event_decision,
+    so results are identical to EventDecision.advisability.
+
+    NumPy is optional for the rest of the application, these functions
+    raise ImportError without it.
+"""
+
+__author__ = "Jinyuan Chen"
+__email__ = "jinyuan.chen@uqconnect.edu.au"
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from event_decision import HUMIDITY_FACTOR, Explanation
+
+
+def _require_numpy():
+    """Raise ImportError if NumPy is not installed."""
+    if np is None:
+        raise ImportError("vector_decision requires NumPy")
+
+
+def adjusted_temperatures(humidity, high_temperature, low_temperature):
+    """Temperatures as they feel once humidity is taken into account.
+
+    Parameters:
+        humidity (array<int>): Predicted humidity.
+        high_temperature (array<float>): Predicted high temperature.
+        low_temperature (array<float>): Predicted low temperature.
+
+    Return:
+        (tuple<array<float>, array<float>>) Adjusted high and low temperatures.
+    """
+    _require_numpy()
+    humidity = np.asarray(humidity)
+    high_temperature = np.asarray(high_temperature, dtype=float)
+    low_temperature = np.asarray(low_temperature, dtype=float)
+
+    humid = humidity > HUMIDITY_FACTOR
+    humidity_factor = humidity / 20
+    high_temperature = np.select(
+        [humid & (high_temperature > 0), humid & (high_temperature < 0)],
+        [high_temperature + humidity_factor, high_temperature - humidity_factor],
+        high_temperature)
+    low_temperature = np.select(
+        [humid & (low_temperature > 0), humid & (low_temperature < 0)],
+        [low_temperature + humidity_factor, low_temperature - humidity_factor],
+        low_temperature)
+    return high_temperature, low_temperature
+
+
+def temperature_factor(high_temperature, low_temperature, cloud_cover, wind_speed,
+                       outdoors, cover_available, time):
+    """Temperature factor of every combination of the arguments.
+
+    Parameters:
+        high_temperature (array<float>): High temperature from adjusted_temperatures.
+        low_temperature (array<float>): Low temperature from adjusted_temperatures.
+        cloud_cover (array<int>): Predicted amount of cloud cover.
+        wind_speed (array<int>): Predicted average wind speed.
+        outdoors (array<bool>): Whether the event is outdoors.
+        cover_available (array<bool>): Whether there is cover available.
+        time (array<int>): The closest hour to the starting time of the event.
+
+    Return:
+        (array<float>) Temperature Factor
+    """
+    return _temperature_rule(high_temperature, low_temperature, cloud_cover, wind_speed,
+                             outdoors, cover_available, time)[0]
+
+
+def _temperature_rule(high_temperature, low_temperature, cloud_cover, wind_speed,
+                      outdoors, cover_available, time):
+    """Temperature factor with the position in TEMPERATURE_RULES of the rule
+    that set its initial value and whether it was mitigated.
+
+    Return:
+        (tuple<array<float>, array<int>, array<bool>>) Factor, rule and mitigated.
+    """
+    _require_numpy()
+    high_temperature = np.asarray(high_temperature, dtype=float)
+    low_temperature = np.asarray(low_temperature, dtype=float)
+    cloud_cover = np.asarray(cloud_cover)
+    wind_speed = np.asarray(wind_speed)
+    outdoors = np.asarray(outdoors, dtype=bool)
+    cover_available = np.asarray(cover_available, dtype=bool)
+    time = np.asarray(time)
+
+    daytime = (6 <= time) & (time <= 19)
+    night = ((0 <= time) & (time <= 5)) | ((20 <= time) & (time <= 23))
+    # In the order of TEMPERATURE_RULES
+    conditions = [daytime & outdoors & (high_temperature >= 30),
+                  high_temperature >= 45,
+                  night & (low_temperature < 5) & (high_temperature < 45),
+                  (low_temperature > 15) & (high_temperature < 30)]
+    initial = np.select(
+        conditions,
+        [high_temperature / -5 + 6,
+         high_temperature / -5 + 6,
+         low_temperature / 5 - 1.1,
+         (high_temperature - low_temperature) / 5],
+        0.0)
+    rule = np.select(conditions, range(len(conditions)), len(conditions))
+
+    # Each mitigation sets the factor to initial + 1, they do not add up
+    mitigated = (initial < 0) & (cover_available | ((3 < wind_speed) & (wind_speed < 10))
+                                 | (cloud_cover > 4))
+    return np.where(mitigated, initial + 1, initial), rule, mitigated
+
+
+def rain_factor(chance_of_rain, wind_speed, outdoors, cover_available):
+    """Rain factor of every combination of the arguments.
+
+    Parameters:
+        chance_of_rain (array<int>): Predicted percentage chance of rain.
+        wind_speed (array<int>): Predicted average wind speed.
+        outdoors (array<bool>): Whether the event is outdoors.
+        cover_available (array<bool>): Whether there is cover available.
+
+    Return:
+        (array<float>) Rain Factor
+    """
+    return _rain_rule(chance_of_rain, wind_speed, outdoors, cover_available)[0]
+
+
+def _rain_rule(chance_of_rain, wind_speed, outdoors, cover_available):
+    """Rain factor with the positions in RAIN_RULES and RAIN_ADJUSTMENTS of
+    the rule that set its initial value and the adjustment applied to it.
+
+    Return:
+        (tuple<array<float>, array<int>, array<int>>) Factor, rule and adjustment.
+    """
+    _require_numpy()
+    chance_of_rain = np.asarray(chance_of_rain)
+    wind_speed = np.asarray(wind_speed)
+    outdoors = np.asarray(outdoors, dtype=bool)
+    cover_available = np.asarray(cover_available, dtype=bool)
+
+    conditions = [chance_of_rain < 20, chance_of_rain > 50]
+    initial = np.select(conditions,
+                        [chance_of_rain / -5 + 4, chance_of_rain / -20 + 1],
+                        0.0)
+    rule = np.select(conditions, range(len(conditions)), len(conditions))
+    # In the order of RAIN_ADJUSTMENTS
+    adjustments = [(initial < 2) & (wind_speed > 15),
+                   outdoors & cover_available & (wind_speed < 5)]
+    factor = np.select(
+        adjustments,
+        [np.maximum(initial + (wind_speed / -15), -9), initial + 1],
+        initial)
+    return factor, rule, np.select(adjustments, range(len(adjustments)), len(adjustments))
+
+
+def advisability(chance_of_rain, high_temperature, low_temperature, humidity,
+                 cloud_cover, wind_speed, outdoors, cover_available, time):
+    """Advisability of every combination of predictions and event settings.
+
+    Parameters:
+        chance_of_rain (array<int>): Predicted percentage chance of rain.
+        high_temperature (array<float>): Predicted high temperature.
+        low_temperature (array<float>): Predicted low temperature.
+        humidity (array<int>): Predicted humidity.
+        cloud_cover (array<int>): Predicted amount of cloud cover.
+        wind_speed (array<int>): Predicted average wind speed.
+        outdoors (array<bool>): Whether the event is outdoors.
+        cover_available (array<bool>): Whether there is cover available.
+        time (array<int>): The closest hour to the starting time of the event.
+
+    Return:
+        (array<float>) Values in range of -5 to +5, shaped by broadcasting
+                       the arguments together.
+    """
+    high_temperature, low_temperature = adjusted_temperatures(
+        humidity, high_temperature, low_temperature)
+    total = (temperature_factor(high_temperature, low_temperature, cloud_cover, wind_speed,
+                                outdoors, cover_available, time)
+             + rain_factor(chance_of_rain, wind_speed, outdoors, cover_available))
+    return np.clip(total, -5, 5)
+
+
+def explain(chance_of_rain, high_temperature, low_temperature, humidity,
+            cloud_cover, wind_speed, outdoors, cover_available, time):
+    """Advisability of every combination with the factors that make it up.
+
+    The arguments are the same as for advisability. The rules are given as
+    positions rather than names, e.g. TEMPERATURE_RULES[rule], so every
+    field is a plain array.
+
+    Return:
+        (Explanation) Arrays with the shape of advisability's result:
+            advisability, temperature_factor, temperature_rule (positions in
+            TEMPERATURE_RULES), temperature_mitigated, rain_factor, rain_rule
+            (positions in RAIN_RULES) and rain_adjustment (positions in
+            RAIN_ADJUSTMENTS).
+    """
+    high_temperature, low_temperature = adjusted_temperatures(
+        humidity, high_temperature, low_temperature)
+    temperature = _temperature_rule(high_temperature, low_temperature, cloud_cover,
+                                    wind_speed, outdoors, cover_available, time)
+    rain = _rain_rule(chance_of_rain, wind_speed, outdoors, cover_available)
+    total = np.clip(temperature[0] + rain[0], -5, 5)
+    return Explanation(*np.broadcast_arrays(total, *temperature, *rain))
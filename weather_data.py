@@ -3,7 +3,9 @@
     used in the second assignment for CSSE1001/7030.
 
     WeatherData: Holds data about weather over a period of time.
+    WeatherDataSnapshot: WeatherData as it was at one version.
     WeatherDataItem: Record of weather data for a 24 hour period.
+    DayOfYearIndex: Weather totals for each day of the year across all years.
 """
 
 __author__ = "Richard Thomas"
@@ -12,6 +14,16 @@ __date__ = "24/03/2019"
 __copyright__ = "The University of Queensland, 2019"
 
 import csv
+import threading
+from datetime import date
+from itertools import accumulate
+from operator import add
+
+# Columns of the weather CSV files, in the order they appear in the file.
+CSV_HEADER = ("Date", "Minimum Temperature (C)", "Maximum Temperature (C)",
+              "Rainfall (mm)", "Sunshine (hours)", "Relative Humidity (%)",
+              "Cloud Cover (oktas)", "Wind Direction", "Wind Speed (km/h)",
+              "Maximum Wind Gust (km/h)", "MSL Pressure (hPa)")
 
 
 class WeatherDataItem(object):
@@ -19,7 +31,7 @@ class WeatherDataItem(object):
 
     def __init__(self, rain, temperature_high, temperature_low, sunshine_hours,
                  humidity, wind_speed_average, wind_speed_max, wind_direction,
-                 cloud_cover, air_pressure):
+                 cloud_cover, air_pressure, date=None):
         """
         Parameters:
             rain (float): Amount of rainfall (mm).
@@ -36,6 +48,7 @@ class WeatherDataItem(object):
                                0 is clear, 8 is full cloud cover,
                                9 means sky is not visible (e.g. foggy).
             air_pressure (float): Mean sea level air pressure (hPa).
+            date (datetime.date): Day the data was recorded, if known.
         """
         self._rain = rain
         self._temperature_high = temperature_high
@@ -47,6 +60,7 @@ class WeatherDataItem(object):
         self._wind_direction = wind_direction
         self._cloud_cover = cloud_cover
         self._air_pressure = air_pressure
+        self._date = date
 
     def get_rainfall(self):
         """(float) Amount of rainfall (mm)."""
@@ -88,6 +102,10 @@ class WeatherDataItem(object):
         """(float) Mean sea level air pressure (hPa)."""
         return self._air_pressure
 
+    def get_date(self):
+        """(datetime.date) Day the data was recorded, or None if unknown."""
+        return self._date
+
     def __str__(self):
         """(str) Readable representation of the object's data."""
         return (f"Rain: {self.get_rainfall()}\n"
@@ -103,13 +121,298 @@ class WeatherDataItem(object):
                 )
 
 
+def parse_row(row):
+    """Converts a row of the weather CSV file.
+
+    Parameters:
+        row (dict<str, str>): Values of the row by column name, see CSV_HEADER.
+
+    Return:
+        (WeatherDataItem) The day's weather.
+    """
+    return WeatherDataItem(float(row["Rainfall (mm)"]),
+                           float(row["Maximum Temperature (C)"]),
+                           float(row["Minimum Temperature (C)"]),
+                           float(row["Sunshine (hours)"]),
+                           int(row["Relative Humidity (%)"]),
+                           int(row["Wind Speed (km/h)"]),
+                           int(row["Maximum Wind Gust (km/h)"]),
+                           row["Wind Direction"],
+                           int(row["Cloud Cover (oktas)"]),
+                           float(row["MSL Pressure (hPa)"]),
+                           parse_date(row.get("Date")))
+
+
+def parse_date(text):
+    """Converts a date from the weather CSV file.
+
+    Parameters:
+        text (str): Date in day/month/year format, e.g. 1/02/2019.
+
+    Return:
+        (datetime.date) The date, or None if text is empty or None.
+    """
+    if not text:
+        return None
+    day, month, year = text.split("/")
+    return date(int(year), int(month), int(day))
+
+
+def day_of_year(day):
+    """Position of a date in the year, counting 29 February every year.
+
+    Counting 29 February in all years keeps each calendar day at the same
+    position, e.g. 1 March is always 60.
+
+    Parameters:
+        day (datetime.date): Date to find the position of.
+
+    Return:
+        (int) Value from 0 (1 January) to 365 (31 December).
+    """
+    return _DAYS_BEFORE_MONTH[day.month - 1] + day.day - 1
+
+
+# Days before the first of each month in a leap year.
+_DAYS_BEFORE_MONTH = (0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335)
+# Number of positions returned by day_of_year.
+DAYS_IN_YEAR = 366
+
+
+class DayOfYearIndex(object):
+    """Totals of the weather recorded on each day of the year, across years.
+
+    An index never changes once made, so it can be read by any number of
+    threads. Adding days makes a new index that shares the totals of every
+    day of the year the new days don't fall on, so the cost depends on the
+    number of days added, not on the history. Circular prefix sums over the
+    days of the year are built the first time a field is looked up, after
+    which any run of days around a date can be averaged in O(1).
+    """
+    # Field names and the WeatherDataItem getter providing each field.
+    FIELDS = {
+        "rain": "get_rainfall",
+        "high": "get_high_temperature",
+        "low": "get_low_temperature",
+        "sunshine": "get_sunshine_hours",
+        "humidity": "get_humidity",
+        "wind": "get_average_wind_speed",
+        "wind_max": "get_maximum_wind_speed",
+        "cloud": "get_cloud_cover",
+        "pressure": "get_air_pressure",
+    }
+    # Position of each field in the totals of a day, after the count of days.
+    _COLUMNS = {field: column for column, field in enumerate(FIELDS, 1)}
+    # Totals of a day of the year with no recorded days.
+    _NO_DAYS = (0,) * (1 + len(FIELDS))
+    # Days either side of a date included by default.
+    DEFAULT_HALF_WIDTH = 7
+
+    def __init__(self, weather_items=(), previous=None):
+        """
+        Parameters:
+            weather_items ([WeatherDataItem]): Days to add to the totals,
+                                               those without a date are ignored.
+            previous (DayOfYearIndex): Index whose totals are added to, which
+                                       is left unchanged. None to start from
+                                       no days.
+        """
+        slots = list(previous._slots) if previous is not None else [self._NO_DAYS] * DAYS_IN_YEAR
+        getters = tuple(self.FIELDS.values())
+        for weather_item in weather_items:
+            recorded = weather_item.get_date()
+            if recorded is None:
+                continue
+            position = day_of_year(recorded)
+            values = (1,) + tuple(getattr(weather_item, getter)() for getter in getters)
+            slots[position] = tuple(map(add, slots[position], values))
+        self._build(slots)
+
+    @classmethod
+    def from_totals(cls, counts, totals):
+        """Makes an index from the totals of another, see get_totals.
+
+        Parameters:
+            counts ([int]): Number of days recorded on each day of the year.
+            totals (dict<str, [float]>): Total of each of FIELDS on each day of the year.
+
+        Return:
+            (DayOfYearIndex) Index holding the totals.
+        """
+        index = cls.__new__(cls)
+        columns = [[int(count) for count in counts]] + [list(totals[field]) for field in cls.FIELDS]
+        index._build(list(zip(*columns)))
+        return index
+
+    def _build(self, slots):
+        """Stores the totals of each day of the year, as tuples holding the
+        number of days then the total of each field."""
+        self._slots = slots
+        # Prefix sums of each column, made on first use
+        self._prefix_sums = {}
+
+    def get_totals(self):
+        """Returns the totals held by the index.
+
+        Return:
+            (tuple<[int], dict<str, [float]>>) Number of days recorded on each
+                day of the year, and the total of each of FIELDS on each day.
+        """
+        return self._column(0), {field: self._column(column)
+                                 for field, column in self._COLUMNS.items()}
+
+    def extended(self, weather_items):
+        """Returns an index that also holds more days.
+
+        Parameters:
+            weather_items ([WeatherDataItem]): Days to add.
+
+        Return:
+            (DayOfYearIndex) New index, this one is unchanged.
+        """
+        return DayOfYearIndex(weather_items, self)
+
+    def _column(self, column):
+        """([float]) One value of the totals of each day of the year."""
+        return [slot[column] for slot in self._slots]
+
+    def _prefix_sum(self, column):
+        """([float]) Running totals of a column, starting from 0."""
+        prefix = self._prefix_sums.get(column)
+        if prefix is None:
+            # Threads building the same sums at once store equal lists
+            prefix = list(accumulate(self._column(column), initial=0))
+            self._prefix_sums[column] = prefix
+        return prefix
+
+    @staticmethod
+    def _range_sum(prefix, first, last):
+        """(float) Sum of positions first to last inclusive, wrapping around the year."""
+        if last - first + 1 >= DAYS_IN_YEAR:
+            return prefix[DAYS_IN_YEAR]
+        if first < 0:
+            return prefix[DAYS_IN_YEAR] - prefix[first + DAYS_IN_YEAR] + prefix[last + 1]
+        if last >= DAYS_IN_YEAR:
+            return prefix[DAYS_IN_YEAR] - prefix[first] + prefix[last - DAYS_IN_YEAR + 1]
+        return prefix[last + 1] - prefix[first]
+
+    def get_count(self, day, half_width=DEFAULT_HALF_WIDTH):
+        """Returns the number of days recorded around a date in all years.
+
+        Parameters:
+            day (datetime.date): Date at the centre of the season.
+            half_width (int): Number of days either side of the date to include.
+
+        Return:
+            (int) Number of recorded days.
+        """
+        position = day_of_year(day)
+        return self._range_sum(self._prefix_sum(0), position - half_width,
+                               position + half_width)
+
+    def get_average(self, field, day, half_width=DEFAULT_HALF_WIDTH):
+        """Returns the typical value of a field around a date in all years.
+
+        Parameters:
+            field (str): Key of FIELDS, e.g. "rain".
+            day (datetime.date): Date at the centre of the season.
+            half_width (int): Number of days either side of the date to include.
+
+        Return:
+            (float) Average of the field over the recorded days,
+                    or None if no days were recorded in the season.
+        """
+        count = self.get_count(day, half_width)
+        if count == 0:
+            return None
+        return self.get_total(field, day, half_width) / count
+
+    def get_total(self, field, day, half_width=DEFAULT_HALF_WIDTH):
+        """Returns the total of a field around a date in all years.
+
+        Parameters:
+            field (str): Key of FIELDS, e.g. "rain".
+            day (datetime.date): Date at the centre of the season.
+            half_width (int): Number of days either side of the date to include.
+
+        Return:
+            (float) Total of the field over the recorded days.
+        """
+        position = day_of_year(day)
+        return self._range_sum(self._prefix_sum(self._COLUMNS[field]), position - half_width,
+                               position + half_width)
+
+
+class WeatherDataSnapshot(object):
+    """Read-only view of WeatherData as it was at one version.
+
+    Days appended to or loaded into the WeatherData afterwards are not
+    seen, so a model reading a snapshot several times sees the same days
+    and the same seasonal totals.
+    """
+
+    def __init__(self, days, size, version, day_of_year_index, generation):
+        """
+        Parameters:
+            days ([WeatherDataItem]): List that days are only ever appended to.
+            size (int): Number of days of the list in this version.
+            version (int): Version of the WeatherData.
+            day_of_year_index (DayOfYearIndex): Seasonal totals of the days
+                                                in this version.
+            generation (int): Number of times the days had been replaced.
+        """
+        self._days = days
+        self._size = size
+        self._version = version
+        self._day_of_year_index = day_of_year_index
+        self._generation = generation
+
+    def get_data(self, number_days):
+        """Returns a specified number of days of weather data, see WeatherData.get_data."""
+        return self._days[max(self._size - number_days, 0):self._size]
+
+    def get_version(self):
+        """(int) Version of the WeatherData the snapshot was taken from."""
+        return self._version
+
+    def get_day_of_year_index(self):
+        """(DayOfYearIndex) Seasonal totals of the days in the snapshot."""
+        return self._day_of_year_index
+
+    def get_generation(self):
+        """(int) Number of times the days had been replaced, e.g. by a load.
+
+        Snapshots of the same generation share their older days, so a later
+        one only has days appended to those of an earlier one.
+        """
+        return self._generation
+
+    def snapshot(self):
+        """(WeatherDataSnapshot) This snapshot, which never changes."""
+        return self
+
+    def size(self):
+        """(int) Returns the number of days of weather data in the snapshot."""
+        return self._size
+
+
 class WeatherData(object):
-    """Collection of weather data over a period of time."""
+    """Collection of weather data over a period of time.
+
+    Reading is safe while another thread appends or loads. Days are only
+    appended to the list of days, and a load fills a new list which then
+    replaces the old one, so a reader sees either all of the old days or
+    all of the new ones. Each change also publishes a new snapshot, with a
+    new DayOfYearIndex, which readers take without locking; only changes
+    are serialised.
+    """
 
     def __init__(self):
         """
         """
         self._weather_data = []
+        self._snapshot = WeatherDataSnapshot(self._weather_data, 0, 0, DayOfYearIndex(), 0)
+        self._write_lock = threading.Lock()
 
     def load(self, weather_file) :
         """Loads a fresh set of weather data from a CSV file.
@@ -121,22 +424,24 @@ class WeatherData(object):
             weather_file != ""
             weather_file is CSV file containing the accessed columns.
         """
-        self._weather_data.clear()
         with open(weather_file) as weather_details :
             file_reader = csv.DictReader(weather_details)
+            self.replace([parse_row(row) for row in file_reader])
+
+    def replace(self, weather_items):
+        """Replaces all of the weather data in one step.
 
-            for row in file_reader:
-                self._weather_data.append(
-                    WeatherDataItem(float(row["Rainfall (mm)"]),
-                                    float(row["Maximum Temperature (C)"]),
-                                    float(row["Minimum Temperature (C)"]),
-                                    float(row["Sunshine (hours)"]),
-                                    int(row["Relative Humidity (%)"]),
-                                    int(row["Wind Speed (km/h)"]),
-                                    int(row["Maximum Wind Gust (km/h)"]),
-                                    row["Wind Direction"],
-                                    int(row["Cloud Cover (oktas)"]),
-                                    float(row["MSL Pressure (hPa)"])))
+        Readers see either all of the old days or all of the new ones.
+
+        Parameters:
+            weather_items ([WeatherDataItem]): Days ordered from oldest to most recent.
+        """
+        weather_data = list(weather_items)
+        day_of_year_index = DayOfYearIndex(weather_data)
+
+        with self._write_lock:
+            self._weather_data = weather_data
+            self._publish(day_of_year_index, self._snapshot.get_generation() + 1)
 
     def get_data(self, number_days):
         """Returns a specified number of days of weather data.
@@ -157,6 +462,64 @@ class WeatherData(object):
         # Slice list number_days from end to end.
         return self._weather_data[(-1 * number_days):]
 
+    def append(self, weather_item):
+        """Adds the weather for the day after the most recent data item.
+
+        Parameters:
+            weather_item (WeatherDataItem): Weather data for the new day.
+        """
+        self.extend((weather_item,))
+
+    def extend(self, weather_items):
+        """Adds the weather for several days as one new version.
+
+        Parameters:
+            weather_items ([WeatherDataItem]): Days following the most recent
+                                               data item, oldest first.
+        """
+        weather_items = list(weather_items)
+        with self._write_lock:
+            # Including any days added to the list directly since the last change
+            added = self._weather_data[self._snapshot.size():] + weather_items
+            day_of_year_index = self._snapshot.get_day_of_year_index().extended(added)
+            self._weather_data.extend(weather_items)
+            self._publish(day_of_year_index, self._snapshot.get_generation())
+
+    def _publish(self, day_of_year_index, generation):
+        """Replaces the snapshot with one of the next version, holding the
+        write lock.
+
+        Parameters:
+            day_of_year_index (DayOfYearIndex): Seasonal totals of all the days.
+            generation (int): Number of times the days have been replaced.
+        """
+        self._snapshot = WeatherDataSnapshot(self._weather_data, len(self._weather_data),
+                                             self._snapshot.get_version() + 1,
+                                             day_of_year_index, generation)
+
+    def snapshot(self):
+        """(WeatherDataSnapshot) The data as it is now, unaffected by later changes."""
+        snapshot = self._snapshot
+        if snapshot.size() != len(self._weather_data):
+            # Days added to the list directly, as the original tests do, or
+            # a change still being published
+            with self._write_lock:
+                added = self._weather_data[self._snapshot.size():]
+                if added:
+                    self._publish(self._snapshot.get_day_of_year_index().extended(added),
+                                  self._snapshot.get_generation())
+                snapshot = self._snapshot
+        return snapshot
+
+    def get_version(self):
+        """(int) Number of times data has been appended or loaded, starting from 0."""
+        return self._snapshot.get_version()
+
+    def get_day_of_year_index(self):
+        """(DayOfYearIndex) Seasonal totals of the loaded and appended data,
+        as of the current snapshot."""
+        return self._snapshot.get_day_of_year_index()
+
     def size(self):
         """(int) Returns the number of days of weather data available,
                  after loading data from file.
@@ -0,0 +1,278 @@
+"""
+    Generates synthetic weather data files for scale testing.
+
+    WeatherGenerator: Endless stream of plausible daily weather for a station.
+    write_csv: Write days to a CSV file in the format WeatherData.load reads.
+    write_columnar: Write days as one binary file per column.
+    read_columns: Read the columns written by write_columnar.
+    generate: Write files for a number of stations.
+
+    Days are produced and written one at a time (columnar files in fixed
+    size chunks), so memory use does not grow with the number of rows.
+    Dates start again from the first date before passing the year 9999, a
+    whole number of 400 year calendar cycles later, so any number of rows
+    can be produced.
+
+    Usage:
+        python weather_generator.py output_dir --rows 1000000 --stations 4
+"""
+
+__author__ = "Jinyuan Chen"
+__email__ = "jinyuan.chen@uqconnect.edu.au"
+
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import sys
+from array import array
+from datetime import date, timedelta
+
+from weather_data import CSV_HEADER
+
+DEFAULT_START = date(1990, 1, 1)
+DIRECTIONS = ("N", "NNE", "NE", "ENE", "E", "ESE", "SE", "SSE",
+              "S", "SSW", "SW", "WSW", "W", "WNW", "NW", "NNW")
+# Days held in memory at once when writing columnar files.
+CHUNK_DAYS = 65536
+# Days in 400 years, after which the Gregorian calendar repeats.
+CALENDAR_CYCLE = 146097
+# Array type code of each column in columnar files, keyed by CSV column.
+# Dates are stored as proleptic Gregorian ordinals, wind directions as
+# the position in DIRECTIONS.
+COLUMN_TYPES = {
+    "Date": "l",
+    "Minimum Temperature (C)": "d",
+    "Maximum Temperature (C)": "d",
+    "Rainfall (mm)": "d",
+    "Sunshine (hours)": "d",
+    "Relative Humidity (%)": "l",
+    "Cloud Cover (oktas)": "l",
+    "Wind Direction": "b",
+    "Wind Speed (km/h)": "l",
+    "Maximum Wind Gust (km/h)": "l",
+    "MSL Pressure (hPa)": "d",
+}
+METADATA_FILE = "columns.json"
+
+
+class WeatherGenerator(object):
+    """Plausible daily weather for a subtropical station.
+
+    Temperatures and pressure follow an annual cycle plus day to day
+    anomalies that persist (AR(1) processes). Rain follows a two state
+    Markov chain, so wet days cluster, and wet days are cloudier, more
+    humid, cooler by day and have lower pressure and less sunshine.
+    """
+
+    def __init__(self, seed=0, start=DEFAULT_START):
+        """
+        Parameters:
+            seed (int|str): Seed for the random numbers, the same seed
+                            always produces the same days.
+            start (datetime.date): Date of the first day produced.
+        """
+        self._random = random.Random(seed)
+        self._start = start
+
+    def days(self, number_days):
+        """Produce the weather for consecutive days.
+
+        Parameters:
+            number_days (int): Number of days to produce.
+
+        Return:
+            Iterator of (date, low, high, rain, sunshine, humidity, cloud,
+            direction, wind, gust, pressure) tuples, in CSV column order.
+        """
+        rng = self._random
+        gauss = rng.gauss
+        first = self._start.toordinal()
+        cycle = _date_cycle(self._start)
+        temperature_anomaly = 0.0
+        pressure_anomaly = 0.0
+        wet = False
+
+        for position in range(number_days):
+            day = date.fromordinal(first + position % cycle)
+            # Peaks at the start of January (southern hemisphere summer).
+            season = math.cos(2 * math.pi * (day.timetuple().tm_yday - 1) / 365.25)
+
+            wet = rng.random() < (0.55 if wet else 0.18) + 0.08 * season
+            temperature_anomaly = 0.7 * temperature_anomaly + gauss(0, 1.5)
+            pressure_anomaly = 0.8 * pressure_anomaly + gauss(0, 2)
+
+            low = 15 + 5 * season + temperature_anomaly + gauss(0, 1)
+            # Daily range, never below 0 so the high is never under the low
+            spread = max(0, (6 if wet else 10) + 2 * season + gauss(0, 1.5))
+            high = low + spread
+            rain = rng.expovariate(1 / 8) if wet else 0
+            cloud = rng.randint(5, 8) if wet else rng.randint(0, 6)
+            if cloud == 8 and rng.random() < 0.05:
+                cloud = 9
+            sunshine = min(13.5, max(0, 12 + 1.5 * season - 1.3 * cloud + gauss(0, 1)))
+            humidity = min(100, max(10, round(58 + (20 if wet else 0) + 4 * season
+                                              + gauss(0, 8))))
+            wind = max(0, round(gauss(9, 4)))
+            gust = wind + 8 + round(rng.expovariate(1 / 12))
+            pressure = 1015 - 4 * season + pressure_anomaly - (3 if wet else 0)
+
+            yield (day, round(low, 1), round(high, 1), round(rain, 1),
+                   round(sunshine, 1), humidity, cloud, rng.choice(DIRECTIONS),
+                   wind, gust, round(pressure, 1))
+
+
+def _date_cycle(start):
+    """Number of days after which the dates produced from start repeat.
+
+    Parameters:
+        start (datetime.date): Date of the first day produced.
+
+    Return:
+        (int) Whole calendar cycles that fit before date.max, or every day
+              up to date.max if not even one cycle fits.
+    """
+    available = date.max.toordinal() - start.toordinal() + 1
+    if available < CALENDAR_CYCLE:
+        return available
+    return available // CALENDAR_CYCLE * CALENDAR_CYCLE
+
+
+def _format_date(day):
+    """(str) Date in the day/month/year format of the weather CSV files."""
+    return f"{day.day}/{day.month:02}/{day.year}"
+
+
+def write_csv(path, number_days, seed=0, start=DEFAULT_START):
+    """Write synthetic days to a CSV file readable by WeatherData.load.
+
+    Parameters:
+        path (str): File to write.
+        number_days (int): Number of rows of data.
+        seed (int|str): Seed for the random numbers.
+        start (datetime.date): Date of the first row.
+    """
+    with open(path, "w", newline="") as weather_file:
+        writer = csv.writer(weather_file)
+        writer.writerow(CSV_HEADER)
+        for row in WeatherGenerator(seed, start).days(number_days):
+            writer.writerow((_format_date(row[0]),) + row[1:])
+
+
+def write_columnar(directory, number_days, seed=0, start=DEFAULT_START):
+    """Write synthetic days as one binary file per column.
+
+    Each column is a file of native machine values with the type code from
+    COLUMN_TYPES, named by its position in CSV_HEADER. METADATA_FILE records
+    the number of rows, column names, files and type codes.
+
+    Parameters:
+        directory (str): Directory to write the files into, created if needed.
+        number_days (int): Number of rows of data.
+        seed (int|str): Seed for the random numbers.
+        start (datetime.date): Date of the first row.
+    """
+    os.makedirs(directory, exist_ok=True)
+    file_names = [f"column_{position:02}.bin" for position in range(len(CSV_HEADER))]
+    files = [open(os.path.join(directory, name), "wb") for name in file_names]
+    try:
+        chunk = [array(COLUMN_TYPES[column]) for column in CSV_HEADER]
+        direction_codes = {direction: code for code, direction in enumerate(DIRECTIONS)}
+        for row in WeatherGenerator(seed, start).days(number_days):
+            values = list(row)
+            values[0] = row[0].toordinal()
+            values[7] = direction_codes[row[7]]
+            for column, value in zip(chunk, values):
+                column.append(value)
+            if len(chunk[0]) >= CHUNK_DAYS:
+                for column, column_file in zip(chunk, files):
+                    column.tofile(column_file)
+                chunk = [array(column.typecode) for column in chunk]
+        for column, column_file in zip(chunk, files):
+            column.tofile(column_file)
+    finally:
+        for column_file in files:
+            column_file.close()
+
+    metadata = dict(rows=number_days, directions=DIRECTIONS,
+                    columns=[dict(name=column, file=name, type=COLUMN_TYPES[column])
+                             for column, name in zip(CSV_HEADER, file_names)])
+    with open(os.path.join(directory, METADATA_FILE), "w") as metadata_file:
+        json.dump(metadata, metadata_file, indent=4)
+
+
+def read_columns(directory):
+    """Read the columns written by write_columnar.
+
+    Parameters:
+        directory (str): Directory given to write_columnar.
+
+    Return:
+        (dict<str, array>) Values of each column, keyed by CSV column name.
+    """
+    with open(os.path.join(directory, METADATA_FILE)) as metadata_file:
+        metadata = json.load(metadata_file)
+
+    columns = {}
+    for column in metadata["columns"]:
+        values = array(column["type"])
+        with open(os.path.join(directory, column["file"]), "rb") as column_file:
+            values.fromfile(column_file, metadata["rows"])
+        columns[column["name"]] = values
+    return columns
+
+
+def generate(output, number_days, stations=1, seed=0, file_format="csv"):
+    """Write synthetic weather for a number of stations.
+
+    Station n is written to station_<n>.csv, or the directory station_<n>
+    for the columnar format, with its own random stream derived from seed.
+
+    Parameters:
+        output (str): Directory to write the files into, created if needed.
+        number_days (int): Number of rows of data for each station.
+        stations (int): Number of stations.
+        seed (int): Seed for the random numbers.
+        file_format (str): "csv" or "columnar".
+
+    Return:
+        ([str]) Paths written, one per station.
+    """
+    os.makedirs(output, exist_ok=True)
+    paths = []
+    for station in range(1, stations + 1):
+        station_seed = f"{seed}:{station}"
+        if file_format == "csv":
+            path = os.path.join(output, f"station_{station:03}.csv")
+            write_csv(path, number_days, station_seed)
+        elif file_format == "columnar":
+            path = os.path.join(output, f"station_{station:03}")
+            write_columnar(path, number_days, station_seed)
+        else:
+            raise ValueError(f"Unknown file format '{file_format}'")
+        paths.append(path)
+    return paths
+
+
+def main(arguments=None):
+    """Command line interface to generate."""
+    parser = argparse.ArgumentParser(description="Generate synthetic weather data files.")
+    parser.add_argument("output", help="Directory to write the files into")
+    parser.add_argument("-r", "--rows", type=int, default=365,
+                        help="Number of days of data for each station")
+    parser.add_argument("-n", "--stations", type=int, default=1,
+                        help="Number of stations")
+    parser.add_argument("-s", "--seed", type=int, default=0,
+                        help="Seed for the random numbers")
+    parser.add_argument("-f", "--format", choices=("csv", "columnar"), default="csv",
+                        help="Output file format")
+    args = parser.parse_args(arguments)
+
+    for path in generate(args.output, args.rows, args.stations, args.seed, args.format):
+        print(path, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
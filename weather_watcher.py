@@ -0,0 +1,232 @@
+"""
+    Keeps weather data in memory up to date with the CSV files it came from.
+
+    WeatherFileWatcher: Follows one weather CSV file by polling its status.
+    StationWatcher: Follows the files of several stations and reports changes.
+    PredictionCache: Predictions for each station, dropped when its data changes.
+
+    Files are checked with os.stat only, no other service is needed. When
+    a file has grown and the bytes last read are unchanged, only the new
+    rows are read and appended, and only they are added to the seasonal
+    index. Any other change, such as the file being rewritten or replaced,
+    reloads the whole file. Either way the WeatherData publishes a new
+    version, so readers never see a partly read file.
+
+    Rows are only read once their line has ended, so a row being written
+    when the file is polled is picked up by a later poll.
+"""
+
+__author__ = "Jinyuan Chen"
+__email__ = "jinyuan.chen@uqconnect.edu.au"
+
+import csv
+import os
+import threading
+
+from model_registry import MODEL_REGISTRY
+from weather_data import WeatherData, parse_row
+
+# Changes reported by poll.
+APPENDED = "appended"
+RELOADED = "reloaded"
+# Seconds between polls by default.
+DEFAULT_INTERVAL = 1.0
+# Bytes before the end of what was read that must be unchanged for a
+# larger file to be treated as appended to.
+_TAIL_SIZE = 256
+
+
+class WeatherFileWatcher(object):
+    """Follows one weather CSV file, keeping a WeatherData up to date."""
+
+    def __init__(self, weather_file, weather_data=None):
+        """Reads the whole file.
+
+        Parameters:
+            weather_file (str): Name of the CSV file to follow.
+            weather_data (WeatherData): Data to keep up to date, replaced with
+                                        the file's rows. A new WeatherData
+                                        if None.
+        """
+        self._weather_file = weather_file
+        self._weather_data = weather_data if weather_data is not None else WeatherData()
+        self._reload()
+
+    def get_weather_data(self):
+        """(WeatherData) Data kept up to date with the file."""
+        return self._weather_data
+
+    def poll(self):
+        """Reads any change made to the file since it was last read.
+
+        Return:
+            (str) APPENDED if only new rows were read, RELOADED if the whole
+                  file was read again, None if the file is unchanged or
+                  can't be read just now, e.g. while it is being replaced.
+        """
+        try:
+            status = os.stat(self._weather_file)
+        except OSError:
+            return None
+        if (status.st_dev, status.st_ino) != self._identity:
+            return self._reload()
+        if status.st_size == self._size and status.st_mtime_ns == self._modified:
+            return None
+        if status.st_size > self._size and self._read_appended():
+            return APPENDED
+        return self._reload()
+
+    def _reload(self):
+        """Reads the whole file, returning RELOADED."""
+        with open(self._weather_file, "rb") as weather_file:
+            content = weather_file.read()
+            self._remember(os.fstat(weather_file.fileno()), content)
+        reader = csv.DictReader(content[:self._offset].decode().splitlines())
+        days = [parse_row(row) for row in reader]
+        self._fieldnames = reader.fieldnames
+        self._weather_data.replace(days)
+        return RELOADED
+
+    def _read_appended(self):
+        """Reads the rows added to the end of the file.
+
+        Return:
+            (bool) True if the rows were read, False if the bytes already
+                   read have changed, so the file must be read again.
+        """
+        if self._fieldnames is None:
+            # The header was still being written, it is read with the rows
+            return False
+        start = self._offset - len(self._tail)
+        with open(self._weather_file, "rb") as weather_file:
+            weather_file.seek(start)
+            content = weather_file.read()
+            status = os.fstat(weather_file.fileno())
+        if not content.startswith(self._tail):
+            return False
+        offset = self._offset
+        self._remember(status, content, start)
+        rows = content[offset - start:self._offset - start].decode().splitlines()
+        days = [parse_row(row) for row in csv.DictReader(rows, fieldnames=self._fieldnames)]
+        if days:
+            self._weather_data.extend(days)
+        return True
+
+    def _remember(self, status, content, start=0):
+        """Records how much of the file has been read, up to the last whole line.
+
+        Parameters:
+            status (os.stat_result): Status of the file when content was read.
+            content (bytes): Content of the file from start to its end.
+            start (int): Position in the file that content starts from.
+        """
+        self._identity = (status.st_dev, status.st_ino)
+        self._size = start + len(content)
+        self._modified = status.st_mtime_ns
+        self._offset = start + content.rfind(b"\n") + 1
+        self._tail = content[max(self._offset - start - _TAIL_SIZE, 0):self._offset - start]
+
+
+class StationWatcher(object):
+    """Follows the weather files of several stations."""
+
+    def __init__(self):
+        """
+        """
+        self._watchers = {}
+        self._listeners = []
+
+    def add_station(self, station, weather_file, weather_data=None):
+        """Starts following a station's weather file, reading it all.
+
+        Parameters:
+            station (str): Name of the station.
+            weather_file (str): Name of the station's CSV file.
+            weather_data (WeatherData): Data to keep up to date, see WeatherFileWatcher.
+
+        Return:
+            (WeatherData) The station's data, kept up to date by poll.
+        """
+        watcher = WeatherFileWatcher(weather_file, weather_data)
+        self._watchers[station] = watcher
+        return watcher.get_weather_data()
+
+    def get_stations(self):
+        """([str]) Names of the stations followed, in the order they were added."""
+        return list(self._watchers)
+
+    def get_weather_data(self, station):
+        """(WeatherData) Data of a station, kept up to date by poll."""
+        return self._watchers[station].get_weather_data()
+
+    def add_listener(self, listener):
+        """Calls a function whenever a station's data changes.
+
+        Parameters:
+            listener (callable): Given the station and APPENDED or RELOADED.
+        """
+        self._listeners.append(listener)
+
+    def poll(self):
+        """Reads any changes made to the stations' files.
+
+        Return:
+            (dict<str, str>) APPENDED or RELOADED for each station that changed.
+        """
+        changes = {}
+        for station, watcher in self._watchers.items():
+            change = watcher.poll()
+            if change is not None:
+                changes[station] = change
+                for listener in self._listeners:
+                    listener(station, change)
+        return changes
+
+    def run(self, interval=DEFAULT_INTERVAL, stop=None):
+        """Polls until stopped, e.g. in a background thread.
+
+        Parameters:
+            interval (float): Seconds between polls.
+            stop (threading.Event): Set to stop polling, polls forever if None.
+        """
+        stop = stop if stop is not None else threading.Event()
+        while not stop.wait(interval):
+            self.poll()
+
+
+class PredictionCache(object):
+    """Predictions of each station, kept until the station's data changes."""
+
+    def __init__(self, station_watcher):
+        """
+        Parameters:
+            station_watcher (StationWatcher): Stations to make predictions for.
+        """
+        self._station_watcher = station_watcher
+        self._predictions = {}
+        station_watcher.add_listener(lambda station, _change: self.invalidate(station))
+
+    def get(self, station, model, past_n_days=None):
+        """Returns a prediction for a station, made on first use.
+
+        Parameters:
+            station (str): Name of the station.
+            model (str): Name the model is registered under.
+            past_n_days (int): Number of days the model uses, if it uses past days.
+
+        Return:
+            (WeatherPrediction) The model's prediction from the station's data.
+        """
+        snapshot = self._station_watcher.get_weather_data(station).snapshot()
+        predictions = self._predictions.setdefault(station, {})
+        key = (model, past_n_days)
+        prediction = predictions.get(key)
+        # Also checked as the data may change while a prediction is made
+        if prediction is None or prediction.get_data_version() != snapshot.get_version():
+            prediction = MODEL_REGISTRY.create(model, snapshot, past_n_days)
+            predictions[key] = prediction
+        return prediction
+
+    def invalidate(self, station):
+        """Drops the predictions of a station, e.g. after its data changed."""
+        self._predictions.pop(station, None)